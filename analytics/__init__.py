@@ -0,0 +1,3 @@
+from .intake import BUCKETS, bucket_starts, intake_series
+
+__all__ = ['BUCKETS', 'bucket_starts', 'intake_series']
@@ -0,0 +1,97 @@
+"""攝取量統計模組
+
+此模組把 SQL 已依區間及食物種類加總的每日彙總（DailyFoodIntake）轉為 NumPy 陣列，
+以向量運算對齊到完整的區間序列、彙整各欄位並視需要降低資料點數，不為每筆記錄建立 Python 物件。
+"""
+import math
+from datetime import date
+import numpy as np
+
+BUCKETS = ('day', 'week', 'month')
+EPOCH = date(1970, 1, 1)
+
+def bucket_starts(days, bucket):
+    """每個日期所屬區間的第一天（距 1970-01-01 的天數）"""
+    if bucket == 'day':
+        return days
+    if bucket == 'week':
+        # 1970-01-01 是星期四
+        return days - (days + 3) % 7
+    return days.astype('datetime64[D]').astype('datetime64[M]').astype('datetime64[D]').astype(np.int64)
+
+def _merge(values, factor):
+    """每 factor 個相鄰區間合併為一點（沿最後一個維度加總）"""
+    pad = -values.shape[-1] % factor
+    if pad:
+        values = np.pad(values, [(0, 0)] * (values.ndim - 1) + [(0, pad)])
+    # 明確指定合併後的點數：沒有任何食物種類時 values 為 (0, n)，reshape 無法推算 -1
+    return values.reshape(values.shape[:-1] + (values.shape[-1] // factor, factor)).sum(axis=-1)
+
+def intake_series(rows, start, end, bucket, daily_needs, treat_type='貓條', max_points=None):
+    """產生攝取量時間序列
+
+    Args:
+        rows: (區間第一天距 1970-01-01 的天數, 食物種類, 份量, 卡路里, 記錄數) 的序列，已依區間加總
+        start: 第一天（本地日期，含）
+        end: 最後一天（本地日期，含）
+        bucket: 'day'、'week' 或 'month'
+        daily_needs: 每日建議攝取的卡路里
+        treat_type: 計入貓條數量的食物種類
+        max_points: 區間數超過此值時，將相鄰區間合併以降低資料點數
+
+    Returns:
+        dict: 各欄位為與 start 等長的陣列（可直接序列化為 JSON）
+    """
+    first_day, last_day = (start - EPOCH).days, (end - EPOCH).days
+    starts, bucket_days = np.unique(bucket_starts(np.arange(first_day, last_day + 1), bucket), return_counts=True)
+    size = len(starts)
+
+    food_types = []
+    amounts = np.zeros((0, size))
+    counts = np.zeros((0, size))
+    calories = np.zeros(size)
+    if rows:
+        keys, foods, amount, calorie, count = zip(*rows)
+        index = np.searchsorted(starts, np.array(keys, dtype=np.int64))
+        names, codes = np.unique(np.array(foods, dtype=str), return_inverse=True)
+        food_types = names.tolist()
+        # 以 (食物種類, 區間) 的攤平索引一次填入所有組合
+        cell = codes * size + index
+        amounts = np.bincount(cell, np.array(amount, dtype=float), len(names) * size).reshape(-1, size)
+        counts = np.bincount(cell, np.array(count, dtype=float), len(names) * size).reshape(-1, size)
+        calories = np.bincount(index, np.array(calorie, dtype=float), size)
+
+    treats = counts[food_types.index(treat_type)] if treat_type in food_types else np.zeros(size)
+    records = counts.sum(axis=0)
+    factor = math.ceil(size / max_points) if max_points and size > max_points else 1
+    if factor > 1:
+        starts = starts[::factor]
+        bucket_days, calories, treats, records = (_merge(values, factor) for values in (bucket_days, calories, treats, records))
+        amounts = _merge(amounts, factor)
+
+    needs = daily_needs * bucket_days
+    return {
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'bucket': bucket,
+        'buckets_per_point': factor,
+        'daily_needs': round(daily_needs, 1),
+        'totals': {
+            'calories': round(float(calories.sum()), 1),
+            'record_count': int(records.sum()),
+            'treat_count': int(treats.sum()),
+            'avg_daily_calories': round(float(calories.sum()) / (last_day - first_day + 1), 1),
+            'intake_ratio': round(float(calories.sum()) / (daily_needs * (last_day - first_day + 1)), 3),
+        },
+        'series': {
+            'start': starts.astype('datetime64[D]').astype(str).tolist(),
+            'days': bucket_days.tolist(),
+            'calories': calories.round(1).tolist(),
+            'avg_daily_calories': (calories / bucket_days).round(1).tolist(),
+            'needs': needs.round(1).tolist(),
+            'intake_ratio': (calories / needs).round(3).tolist(),
+            'treat_count': treats.astype(int).tolist(),
+            'record_count': records.astype(int).tolist(),
+            'amount_by_food_type': {name: amounts[i].round(1).tolist() for i, name in enumerate(food_types)},
+        },
+    }
@@ -1,38 +1,151 @@
-from flask import Flask, render_template, request, redirect, url_for, flash, send_from_directory, jsonify
+from flask import Flask, Request, render_template, request, redirect, url_for, flash, send_from_directory, jsonify, stream_with_context
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime, timedelta
 from flask_login import LoginManager, UserMixin, login_user, login_required, logout_user, current_user
-from werkzeug.security import generate_password_hash, check_password_hash
+from werkzeug.security import check_password_hash, safe_join
 from werkzeug.utils import secure_filename
+from werkzeug.middleware.proxy_fix import ProxyFix
 import os
+import csv
+import io
+import math
+import time
+import mimetypes
 import pytz
+from types import SimpleNamespace
 from dotenv import load_dotenv
 import json
-from auth.limiter import init_limiter, rate_limit_by_ip, rate_limit_by_user, block_ip, is_ip_blocked
+from sqlalchemy import and_, or_
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from media import DERIVATIVE_SIZES, derivative_filename, fallback_extension, generate_derivatives, remove_derivatives
+from media import HashingFile, append_chunk, blob_lock, cleanup_stale_uploads, create_upload, file_etag, finish_upload, get_upload, store_stream
+from cache import PageCache
+from analytics import BUCKETS as ANALYTICS_BUCKETS, intake_series
+from database import configure_sqlite
+from metrics import DEFAULT_METRICS_DIR, init_metrics, init_profiling, query_budget
+from auth import PasswordPolicy, PasswordValidator, init_password_scorer, warm_up_scorer
+from auth.login_attempts import clear_failures, pending_failures, record_failure
+from flask_limiter.util import get_remote_address
+from auth.limiter import init_limiter, rate_limit_by_ip, rate_limit_by_user, block_ip, is_ip_blocked, check_ip_block
 
 # 載入環境變數
 load_dotenv()
 
 app = Flask(__name__)
+# 位於反向代理之後時，以代理附加的 X-Forwarded-For 作為客戶端 IP（值為信任的代理層數，0 表示不信任）；
+# 速率限制及 IP 封鎖都以 request.remote_addr 為鍵，未設定時所有訪客會共用代理的位址
+app.config['PROXY_FIX_X_FOR'] = int(os.getenv('PROXY_FIX_X_FOR', 0))
+if app.config['PROXY_FIX_X_FOR']:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config['PROXY_FIX_X_FOR'], x_proto=app.config['PROXY_FIX_X_FOR'])
 app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL', 'sqlite:///instance/catfeed.db')
+# SQLite 連線設定：WAL 讓讀取不被寫入阻擋，busy_timeout（毫秒）讓寫入等待鎖而非立即失敗，
+# mmap_size（位元組）與 cache_size（負值為 KiB）減少讀取時的系統呼叫
+app.config['SQLITE_JOURNAL_MODE'] = os.getenv('SQLITE_JOURNAL_MODE', 'WAL')
+app.config['SQLITE_SYNCHRONOUS'] = os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL')
+app.config['SQLITE_BUSY_TIMEOUT'] = int(os.getenv('SQLITE_BUSY_TIMEOUT', 5000))
+app.config['SQLITE_MMAP_SIZE'] = int(os.getenv('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))
+app.config['SQLITE_CACHE_SIZE'] = int(os.getenv('SQLITE_CACHE_SIZE', -20000))
+# gevent 模式下所有協程共用同一個執行緒，若一個協程持有 SQLite 寫入鎖時切換出去，
+# 另一個協程在 C 層等待鎖會凍結整個進程。因此以連線池限制同時持有連線的協程數量，
+# 其餘協程在連線池佇列中協作式等待；工作階段依應用上下文（每個請求協程各自一個）劃分
+app.config['GEVENT_ENABLED'] = os.getenv('GUNICORN_WORKER_CLASS', 'sync') == 'gevent'
+if app.config['GEVENT_ENABLED']:
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+        'pool_size': int(os.getenv('DB_POOL_SIZE', 1)),
+        'max_overflow': 0,
+        'pool_timeout': float(os.getenv('DB_POOL_TIMEOUT', 10)),
+    }
 app.config['SECRET_KEY'] = os.getenv('FLASK_SECRET_KEY')
 if not app.config['SECRET_KEY']:
     raise ValueError("No SECRET_KEY set for Flask application. Please set FLASK_SECRET_KEY in .env file")
     
 app.config['UPLOAD_FOLDER'] = os.getenv('UPLOAD_FOLDER', 'uploads')
 app.config['MAX_CONTENT_LENGTH'] = int(os.getenv('MAX_CONTENT_LENGTH', 16 * 1024 * 1024))
+# 分段上傳的單張照片大小上限及建議的分段大小
+app.config['MAX_PHOTO_SIZE'] = int(os.getenv('MAX_PHOTO_SIZE', 64 * 1024 * 1024))
+app.config['UPLOAD_CHUNK_SIZE'] = int(os.getenv('UPLOAD_CHUNK_SIZE', 1024 * 1024))
+
+# 照片檔案傳送模式：none（由 Python 傳送）、x-accel（Nginx X-Accel-Redirect）、x-sendfile
+app.config['UPLOADS_SENDFILE_MODE'] = os.getenv('UPLOADS_SENDFILE_MODE', 'none').lower()
+app.config['UPLOADS_ACCEL_PREFIX'] = os.getenv('UPLOADS_ACCEL_PREFIX', '/protected-uploads/')
+app.config['USE_X_SENDFILE'] = app.config['UPLOADS_SENDFILE_MODE'] == 'x-sendfile'
 
 # Redis 配置
 app.config['REDIS_ENABLED'] = os.getenv('REDIS_ENABLED', 'false').lower() == 'true'
 app.config['REDIS_HOST'] = os.getenv('REDIS_HOST', 'localhost')
 app.config['REDIS_PORT'] = int(os.getenv('REDIS_PORT', 6379))
 app.config['REDIS_DB'] = int(os.getenv('REDIS_DB', 0))
-
-# 速率限制配置
+app.config['REDIS_MAX_CONNECTIONS'] = int(os.getenv('REDIS_MAX_CONNECTIONS', 10))
+app.config['REDIS_SOCKET_TIMEOUT'] = float(os.getenv('REDIS_SOCKET_TIMEOUT', 0.5))
+app.config['REDIS_HEALTH_CHECK_INTERVAL'] = int(os.getenv('REDIS_HEALTH_CHECK_INTERVAL', 30))
+# 連續失敗次數達門檻後，暫停使用 Redis 的秒數
+app.config['REDIS_FAILURE_THRESHOLD'] = int(os.getenv('REDIS_FAILURE_THRESHOLD', 3))
+app.config['REDIS_RETRY_INTERVAL'] = int(os.getenv('REDIS_RETRY_INTERVAL', 30))
+# 各工作進程從 Redis 同步 IP 封鎖清單的間隔（秒）
+app.config['BLOCKLIST_SYNC_INTERVAL'] = float(os.getenv('BLOCKLIST_SYNC_INTERVAL', 5))
+
+# 速率限制配置（RATELIMIT_ENABLED 僅供基準測試等情境關閉限制）
+app.config['RATELIMIT_ENABLED'] = os.getenv('RATELIMIT_ENABLED', 'true').lower() == 'true'
 app.config['RATELIMIT_DEFAULT'] = os.getenv('RATELIMIT_DEFAULT', '200 per day')
 app.config['RATELIMIT_LOGIN_LIMIT'] = os.getenv('RATELIMIT_LOGIN_LIMIT', '5 per minute')
 app.config['RATELIMIT_SIGNUP_LIMIT'] = os.getenv('RATELIMIT_SIGNUP_LIMIT', '2 per hour')
 app.config['RATELIMIT_API_LIMIT'] = os.getenv('RATELIMIT_API_LIMIT', '30 per minute')
+# 限制策略：fixed-window、moving-window（精確，無窗口邊界突發）、sliding-window-counter
+app.config['RATELIMIT_STRATEGY'] = os.getenv('RATELIMIT_STRATEGY', 'moving-window')
+# 未啟用 Redis 時的存儲後端，預設為所有工作進程共用的共享記憶體存儲
+app.config['RATELIMIT_STORAGE_URI'] = os.getenv(
+    'RATELIMIT_STORAGE_URI',
+    'shm:///dev/shm/catfeed-ratelimit.db' if os.path.isdir('/dev/shm') else 'memory://'
+)
+
+# 密碼強度評分：PASSWORD_SCORER_PROCESSES 大於 0 時交由獨立進程池評分，
+# 請求最多等待 PASSWORD_SCORER_TIMEOUT 秒，避免 CPU 密集的評分佔住工作進程
+app.config['PASSWORD_SCORER_PROCESSES'] = int(os.getenv('PASSWORD_SCORER_PROCESSES', 0))
+app.config['PASSWORD_SCORER_TIMEOUT'] = float(os.getenv('PASSWORD_SCORER_TIMEOUT', 2.0))
+
+# 尚未寫入資料庫的登入失敗次數在共享存儲中保留的秒數
+app.config['LOGIN_FAILURE_TTL'] = int(os.getenv('LOGIN_FAILURE_TTL', 86400))
+
+# 密碼雜湊方法及工作因子（werkzeug 格式），決定登入及更改密碼時每次雜湊計算的耗時
+app.config['PASSWORD_HASH_METHOD'] = os.getenv('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+
+# 時區快取配置（秒），讓其他工作進程在時區更新後也能於期限內重新讀取
+app.config['TIMEZONE_CACHE_TTL'] = int(os.getenv('TIMEZONE_CACHE_TTL', 60))
+# 更新時區時改寫此檔案，所有工作進程在下次讀取時區時發現檔案變更即重新讀取設定
+app.config['TIMEZONE_VERSION_FILE'] = os.getenv('TIMEZONE_VERSION_FILE', os.path.join(app.instance_path, 'timezone_version'))
+
+# 背景工作佇列配置
+app.config['JOB_MAX_ATTEMPTS'] = int(os.getenv('JOB_MAX_ATTEMPTS', 3))
+app.config['JOB_LEASE_SECONDS'] = int(os.getenv('JOB_LEASE_SECONDS', 300))
+app.config['JOB_POLL_INTERVAL'] = float(os.getenv('JOB_POLL_INTERVAL', 1.0))
+
+# 頁面快取配置
+app.config['PAGE_CACHE_ENABLED'] = os.getenv('PAGE_CACHE_ENABLED', 'true').lower() == 'true'
+app.config['PAGE_CACHE_TIMEOUT'] = int(os.getenv('PAGE_CACHE_TIMEOUT', 60))
+app.config['PAGE_CACHE_MAX_ENTRIES'] = int(os.getenv('PAGE_CACHE_MAX_ENTRIES', 256))
+
+# 請求指標配置：各工作進程的數值寫入 METRICS_DIR，由 /metrics 端點彙總；
+# 未登入時需以 Authorization: Bearer <METRICS_TOKEN> 存取
+app.config['METRICS_ENABLED'] = os.getenv('METRICS_ENABLED', 'true').lower() == 'true'
+app.config['METRICS_DIR'] = os.getenv('METRICS_DIR', DEFAULT_METRICS_DIR)
+app.config['METRICS_TOKEN'] = os.getenv('METRICS_TOKEN')
+
+# 慢請求分析：耗時超過 PROFILE_THRESHOLD_MS 的請求，將堆疊取樣（collapsed stack）及 SQL 語句寫入 PROFILE_DIR
+app.config['PROFILE_SLOW_REQUESTS'] = os.getenv('PROFILE_SLOW_REQUESTS', 'false').lower() == 'true'
+app.config['PROFILE_THRESHOLD_MS'] = float(os.getenv('PROFILE_THRESHOLD_MS', 500))
+app.config['PROFILE_INTERVAL_MS'] = float(os.getenv('PROFILE_INTERVAL_MS', 5))
+app.config['PROFILE_DIR'] = os.getenv('PROFILE_DIR', os.path.join(app.instance_path, 'profiles'))
+# 路由查詢預算：超過時記錄警告；設為 true 時改為回傳錯誤（測試模式下一律如此）
+app.config['QUERY_BUDGET_STRICT'] = os.getenv('QUERY_BUDGET_STRICT', 'false').lower() == 'true'
+
+# 餵食歷史記錄分頁配置
+app.config['HISTORY_PAGE_SIZE'] = int(os.getenv('HISTORY_PAGE_SIZE', 20))
+app.config['HISTORY_MAX_PAGE_SIZE'] = int(os.getenv('HISTORY_MAX_PAGE_SIZE', 100))
+# 餵食記錄匯出時每批讀取的筆數，以及匯入時每個交易寫入的筆數
+app.config['EXPORT_BATCH_SIZE'] = int(os.getenv('EXPORT_BATCH_SIZE', 1000))
+app.config['IMPORT_CHUNK_SIZE'] = int(os.getenv('IMPORT_CHUNK_SIZE', 1000))
+# 攝取量統計 API 單次可查詢的最多天數
+app.config['ANALYTICS_MAX_DAYS'] = int(os.getenv('ANALYTICS_MAX_DAYS', 3660))
 
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
 
@@ -40,7 +153,27 @@ ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
 if not os.path.exists(app.config['UPLOAD_FOLDER']):
     os.makedirs(app.config['UPLOAD_FOLDER'])
 
+class UploadRequest(Request):
+    """上傳的檔案在 multipart 解析時直接寫入上傳目錄並同步計算雜湊"""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return HashingFile(app.config['UPLOAD_FOLDER'])
+
+app.request_class = UploadRequest
+
+@app.teardown_request
+def discard_upload_files(exc):
+    """清除本次請求中未被使用的上傳暫存檔"""
+    # 只處理已解析的上傳內容，避免在此觸發解析
+    files = request.__dict__.get('files')
+    if files:
+        for file in files.values():
+            if isinstance(file.stream, HashingFile):
+                file.stream.discard()
+
 db = SQLAlchemy(app)
+with app.app_context():
+    configure_sqlite(db.engine, app.config)
 login_manager = LoginManager()
 login_manager.init_app(app)
 login_manager.login_view = 'admin_login'
@@ -48,6 +181,21 @@ login_manager.login_view = 'admin_login'
 # 初始化速率限制器
 limiter = init_limiter(app)
 
+# 初始化密碼強度評分
+init_password_scorer(app)
+
+# 初始化頁面快取
+page_cache = PageCache(app)
+
+# 初始化請求指標
+init_metrics(app, db, limiter)
+
+# 初始化查詢預算檢查及慢請求分析
+init_profiling(app, db)
+
+# 拒絕被封鎖 IP 的請求（查詢本工作進程的封鎖清單，不需每次連線 Redis）
+app.before_request(check_ip_block())
+
 # 錯誤處理
 @app.errorhandler(429)
 def ratelimit_handler(e):
@@ -62,7 +210,7 @@ def get_rate_limit_key():
         # 已登入用戶使用用戶ID作為限制鍵
         return str(current_user.id)
     # 未登入用戶使用IP
-    return request.remote_addr
+    return get_remote_address()
 
 # 配置limiter使用自定義的鍵生成函數
 limiter.key_func = get_rate_limit_key
@@ -79,8 +227,6 @@ class Admin(UserMixin, db.Model):
     force_password_change = db.Column(db.Boolean, default=True)
 
     def set_password(self, password):
-        from auth import PasswordValidator, PasswordPolicy
-        
         # 驗證新密碼
         validator = PasswordValidator()
         is_valid, error_msg = validator.validate(password, [self.username])
@@ -89,11 +235,11 @@ class Admin(UserMixin, db.Model):
             
         # 檢查密碼歷史
         policy = PasswordPolicy()
-        new_hash = generate_password_hash(password)
-        if not policy.can_reuse_password(new_hash, self.password_history or []):
+        if not policy.can_reuse_password(password, self.password_history or []):
             raise ValueError("不能重複使用最近使用過的密碼")
             
         # 更新密碼
+        new_hash = policy.hash_password(password)
         self.password_hash = new_hash
         self.last_password_change = datetime.utcnow()
         
@@ -116,35 +262,47 @@ class Admin(UserMixin, db.Model):
         is_valid = check_password_hash(self.password_hash, password)
         
         if not is_valid:
-            self.failed_login_attempts += 1
-            self.last_failed_login = datetime.utcnow()
+            # 失敗次數先累計在共享存儲，只有鎖定帳戶時才寫入資料庫
+            pending = record_failure(self.id)
+            total = (self.failed_login_attempts or 0) + (pending or 1)
             
             # 如果失敗次數過多，鎖定帳戶
-            if self.failed_login_attempts >= 5:
+            if total >= 5:
                 lock_duration = timedelta(minutes=15)  # 15分鐘後解鎖
+                self.failed_login_attempts = total
+                self.last_failed_login = datetime.utcnow()
                 self.account_locked_until = datetime.utcnow() + lock_duration
                 db.session.commit()
+                clear_failures(self.id)
                 raise ValueError(f"登入失敗次數過多，帳戶已被鎖定 {lock_duration.seconds//60} 分鐘")
             
-            db.session.commit()
+            if pending is None:
+                # 共享存儲無法使用時直接寫入資料庫
+                self.failed_login_attempts = total
+                self.last_failed_login = datetime.utcnow()
+                db.session.commit()
             return False
             
-        # 登入成功，重置失敗計數
-        if self.failed_login_attempts > 0:
+        # 登入成功，重置失敗計數（資料庫中有失敗記錄時才寫入）
+        clear_failures(self.id)
+        if self.failed_login_attempts or self.account_locked_until:
             self.failed_login_attempts = 0
             self.last_failed_login = None
             self.account_locked_until = None
             db.session.commit()
             
-        # 檢查密碼是否過期
-        from auth import PasswordPolicy
+        # 檢查密碼是否過期（尚未標記時才寫入）
         policy = PasswordPolicy()
-        if policy.is_password_expired(self.last_password_change):
+        if not self.force_password_change and policy.is_password_expired(self.last_password_change):
             self.force_password_change = True
             db.session.commit()
             
         return True
 
+    def total_failed_attempts(self):
+        """資料庫中已記錄及共享存儲中尚未寫入的失敗次數總和"""
+        return (self.failed_login_attempts or 0) + (pending_failures(self.id) or 0)
+
     def needs_password_change(self):
         """檢查是否需要更改密碼"""
         return self.force_password_change or (
@@ -162,9 +320,29 @@ class FeedingRecord(db.Model):
     notes = db.Column(db.Text)
     feeder_nickname = db.Column(db.String(50), nullable=False)  # 新增餵食人暱稱欄位
 
+    __table_args__ = (
+        # 今日記錄範圍查詢及 (timestamp, id) 鍵集分頁
+        db.Index('ix_feeding_record_timestamp_id', 'timestamp', 'id'),
+    )
+
     def __repr__(self):
         return f'<FeedingRecord {self.timestamp} {self.food_type}>'
 
+class DailyIntake(db.Model):
+    """每日攝取量彙總（以本地時區日期為鍵，隨餵食記錄寫入時同步更新）"""
+    date = db.Column(db.Date, primary_key=True)
+    total_calories = db.Column(db.Float, nullable=False, default=0.0)
+    treat_count = db.Column(db.Integer, nullable=False, default=0)
+    record_count = db.Column(db.Integer, nullable=False, default=0)
+
+class DailyFoodIntake(db.Model):
+    """每日各食物種類的份量及卡路里彙總（與 DailyIntake 同樣以本地日期為鍵），供攝取量統計 API 讀取"""
+    date = db.Column(db.Date, primary_key=True)
+    food_type = db.Column(db.String(50), primary_key=True)
+    amount = db.Column(db.Float, nullable=False, default=0.0)
+    calories = db.Column(db.Float, nullable=False, default=0.0)
+    record_count = db.Column(db.Integer, nullable=False, default=0)
+
 class CatProfile(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     weight = db.Column(db.Float, default=4.0)
@@ -178,12 +356,73 @@ class Settings(db.Model):
 class Photo(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     filename = db.Column(db.String(255), nullable=False)
+    content_hash = db.Column(db.String(64), index=True)  # SHA-256，相同內容的照片共用同一個檔案
     original_filename = db.Column(db.String(255), nullable=False)
     date_taken = db.Column(db.DateTime, nullable=False)
     description = db.Column(db.Text)
     photographer = db.Column(db.String(100), nullable=False)
     upload_date = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     is_approved = db.Column(db.Boolean, default=False)
+    # 原圖及衍生圖片尺寸（由 media.generate_derivatives 產生）
+    width = db.Column(db.Integer)
+    height = db.Column(db.Integer)
+    thumb_width = db.Column(db.Integer)
+    thumb_height = db.Column(db.Integer)
+    medium_width = db.Column(db.Integer)
+    medium_height = db.Column(db.Integer)
+    has_derivatives = db.Column(db.Boolean, default=False)
+    processing_status = db.Column(db.String(20), default='done')  # pending, processing, done, failed
+
+    @property
+    def fallback_ext(self):
+        return fallback_extension(self.filename)
+
+    def derivative_url(self, size, ext='webp'):
+        """取得衍生圖片的網址"""
+        return url_for('uploaded_file', filename=derivative_filename(self.filename, size, ext))
+
+    def srcset(self, ext='webp'):
+        """產生響應式圖片的 srcset 字串"""
+        return ', '.join(
+            f"{self.derivative_url(size, ext)} {getattr(self, f'{size}_width')}w"
+            for size in DERIVATIVE_SIZES
+        )
+
+    def apply_derivatives(self, upload_folder):
+        """產生衍生圖片並記錄尺寸
+
+        Raises:
+            OSError: 無法讀取或處理圖片（原檔保留，由呼叫端決定重試或略過）
+        """
+        dimensions = generate_derivatives(upload_folder, self.filename)
+        for column, value in dimensions.items():
+            setattr(self, column, value)
+        self.has_derivatives = True
+
+    __table_args__ = (
+        # 首頁輪播及關於頁面的已審核照片
+        db.Index('ix_photo_approved_date_taken', is_approved, date_taken.desc()),
+        # 照片審核頁面
+        db.Index('ix_photo_approved_upload_date', is_approved, upload_date.desc()),
+    )
+
+class Job(db.Model):
+    """背景工作佇列（與應用資料同一個 SQLite 資料庫，隨業務資料一起提交）"""
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)
+    payload = db.Column(db.JSON, default=dict)
+    status = db.Column(db.String(20), nullable=False, default='queued')  # queued, running, done, failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=3)
+    run_after = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    locked_until = db.Column(db.DateTime)
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime)
+
+    __table_args__ = (
+        db.Index('ix_job_status_run_after', 'status', 'run_after'),
+    )
 
 class Biography(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -192,20 +431,316 @@ class Biography(db.Model):
     created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    __table_args__ = (
+        db.Index('ix_biography_date', date.desc()),
+    )
+
 @login_manager.user_loader
 def load_user(user_id):
     return Admin.query.get(int(user_id))
 
-def get_current_timezone():
+# 行程內的時區快取，避免每筆記錄都查詢一次 Settings
+_timezone_cache = {'tz': None, 'expires_at': 0.0, 'version': None}
+
+def _timezone_version():
+    """時區版本檔案的 (inode, 修改時間)，只需一次 stat，檔案不存在時為 None"""
+    try:
+        stat = os.stat(app.config['TIMEZONE_VERSION_FILE'])
+    except OSError:
+        return None
+    return stat.st_ino, stat.st_mtime_ns
+
+def load_timezone():
+    """直接從資料庫讀取設定的時區（不使用快取）
+
+    寫入每日彙總的交易在取得寫入鎖後呼叫，讀到的時區與 update_timezone 重新計算彙總時一致。
+    """
     settings = Settings.query.first()
     return pytz.timezone(settings.timezone if settings else 'Asia/Taipei')
 
-def convert_to_local_time(utc_dt):
+def get_current_timezone():
+    """獲取目前設定的時區（快取於行程內，逾時或任一工作進程更新時區後重新讀取）"""
+    now = time.monotonic()
+    version = _timezone_version()
+    local_tz = _timezone_cache['tz']
+    if local_tz is None or now >= _timezone_cache['expires_at'] or version != _timezone_cache['version']:
+        local_tz = load_timezone()
+        _timezone_cache['tz'] = local_tz
+        _timezone_cache['expires_at'] = now + app.config['TIMEZONE_CACHE_TTL']
+        _timezone_cache['version'] = version
+    return local_tz
+
+def invalidate_timezone_cache():
+    """讓所有工作進程的時區快取失效（需在新設定提交後呼叫，其他進程才不會重新讀到舊值）"""
+    path = app.config['TIMEZONE_VERSION_FILE']
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f"{path}.{os.getpid()}"
+    with open(temp_path, 'w') as f:
+        f.write(str(time.time_ns()))
+    os.replace(temp_path, path)
+    _timezone_cache['tz'] = None
+    _timezone_cache['expires_at'] = 0.0
+
+def convert_to_local_time(utc_dt, local_tz=None):
     if not utc_dt:
         return None
-    local_tz = get_current_timezone()
+    if local_tz is None:
+        local_tz = get_current_timezone()
     return pytz.utc.localize(utc_dt).astimezone(local_tz)
 
+def localize_records(records, local_tz=None):
+    """批次將餵食記錄的時間轉換為本地時區（整批只解析一次時區）"""
+    if local_tz is None:
+        local_tz = get_current_timezone()
+    for record in records:
+        record.local_time = convert_to_local_time(record.timestamp, local_tz)
+    return records
+
+def encode_history_cursor(record):
+    """將記錄的 (timestamp, id) 編碼為分頁游標"""
+    return f"{record.timestamp.isoformat()}_{record.id}"
+
+def decode_history_cursor(cursor):
+    """解析分頁游標，格式錯誤時拋出 ValueError"""
+    timestamp, record_id = cursor.rsplit('_', 1)
+    return datetime.fromisoformat(timestamp), int(record_id)
+
+def feeding_history_query(cursor, limit):
+    """餵食記錄鍵集分頁的查詢（多取一筆用來判斷是否還有下一頁），格式錯誤的游標拋出 ValueError"""
+    query = FeedingRecord.query
+    if cursor:
+        before_timestamp, before_id = decode_history_cursor(cursor)
+        query = query.filter(or_(
+            FeedingRecord.timestamp < before_timestamp,
+            and_(FeedingRecord.timestamp == before_timestamp, FeedingRecord.id < before_id)
+        ))
+    return query.order_by(FeedingRecord.timestamp.desc(), FeedingRecord.id.desc()).limit(limit + 1)
+
+def get_feeding_history(cursor=None, limit=None):
+    """以 (timestamp, id) 鍵集分頁取得餵食記錄（由新到舊）
+
+    Args:
+        cursor: 上一頁最後一筆記錄的游標，None 表示第一頁
+        limit: 每頁筆數
+
+    Returns:
+        (list, str): (本頁記錄, 下一頁游標；沒有更多記錄時為 None)
+    """
+    if limit is None:
+        limit = app.config['HISTORY_PAGE_SIZE']
+
+    records = feeding_history_query(cursor, limit).all()
+
+    next_cursor = None
+    if len(records) > limit:
+        records = records[:limit]
+        next_cursor = encode_history_cursor(records[-1])
+    return records, next_cursor
+
+def approved_photos_query():
+    """已審核的照片（依拍攝日期由新到舊），首頁輪播及關於頁面使用"""
+    return Photo.query.filter_by(is_approved=True).order_by(Photo.date_taken.desc())
+
+def review_photos_query(approved):
+    """照片審核頁面的照片（依上傳日期由新到舊）"""
+    return Photo.query.filter_by(is_approved=approved).order_by(Photo.upload_date.desc())
+
+def biographies_query():
+    """生平記事（依日期由新到舊）"""
+    return Biography.query.order_by(Biography.date.desc())
+
+def update_daily_intake(record, sign=1, local_tz=None):
+    """在目前的交易中累加（sign=1）或扣除（sign=-1）某筆記錄對每日彙總的貢獻
+
+    呼叫前需先寫入（flush）記錄本身以取得資料庫寫入鎖；未指定 local_tz 時在交易內讀取時區設定，
+    其他工作進程的時區快取尚未失效時也不會以舊時區的日期寫入彙總。
+    """
+    local_date = convert_to_local_time(record.timestamp, local_tz or load_timezone()).date()
+    delta_calories = sign * (record.calories or 0.0)
+    delta_treats = sign * (1 if record.food_type == '貓條' else 0)
+
+    stmt = sqlite_insert(DailyIntake).values(
+        date=local_date,
+        total_calories=delta_calories,
+        treat_count=delta_treats,
+        record_count=sign
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[DailyIntake.date],
+        set_={
+            'total_calories': DailyIntake.total_calories + delta_calories,
+            'treat_count': DailyIntake.treat_count + delta_treats,
+            'record_count': DailyIntake.record_count + sign
+        }
+    )
+    db.session.execute(stmt)
+
+    delta_amount = sign * (record.amount or 0.0)
+    stmt = sqlite_insert(DailyFoodIntake).values(
+        date=local_date,
+        food_type=record.food_type,
+        amount=delta_amount,
+        calories=delta_calories,
+        record_count=sign
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[DailyFoodIntake.date, DailyFoodIntake.food_type],
+        set_={
+            'amount': DailyFoodIntake.amount + delta_amount,
+            'calories': DailyFoodIntake.calories + delta_calories,
+            'record_count': DailyFoodIntake.record_count + sign
+        }
+    )
+    db.session.execute(stmt)
+
+    if sign < 0:
+        # 當天已無記錄時移除彙總，避免浮點誤差殘留
+        DailyIntake.query.filter(
+            DailyIntake.date == local_date, DailyIntake.record_count <= 0
+        ).delete(synchronize_session=False)
+        DailyFoodIntake.query.filter(
+            DailyFoodIntake.date == local_date, DailyFoodIntake.record_count <= 0
+        ).delete(synchronize_session=False)
+
+def rebuild_daily_intake():
+    """依現有餵食記錄重新計算每日彙總（用於回填或時區變更後）"""
+    # 先刪除舊的彙總取得寫入鎖，再於同一交易中讀取時區設定
+    DailyIntake.query.delete(synchronize_session=False)
+    DailyFoodIntake.query.delete(synchronize_session=False)
+    local_tz = load_timezone()
+    totals = {}
+    foods = {}
+    rows = db.session.query(
+        FeedingRecord.timestamp, FeedingRecord.calories, FeedingRecord.food_type, FeedingRecord.amount
+    ).execution_options(yield_per=1000)
+    for timestamp, calories, food_type, amount in rows:
+        local_date = convert_to_local_time(timestamp, local_tz).date()
+        entry = totals.setdefault(local_date, [0.0, 0, 0])
+        entry[0] += calories or 0.0
+        entry[1] += 1 if food_type == '貓條' else 0
+        entry[2] += 1
+        entry = foods.setdefault((local_date, food_type), [0.0, 0.0, 0])
+        entry[0] += amount or 0.0
+        entry[1] += calories or 0.0
+        entry[2] += 1
+
+    db.session.add_all([
+        DailyIntake(date=local_date, total_calories=total, treat_count=treats, record_count=count)
+        for local_date, (total, treats, count) in totals.items()
+    ])
+    db.session.add_all([
+        DailyFoodIntake(date=local_date, food_type=food_type, amount=amount, calories=calories, record_count=count)
+        for (local_date, food_type), (amount, calories, count) in foods.items()
+    ])
+    return len(totals)
+
+def enqueue_job(kind, payload=None):
+    """將工作加入佇列（不提交，與呼叫端的資料變更在同一交易中寫入）"""
+    job = Job(kind=kind, payload=payload or {}, max_attempts=app.config['JOB_MAX_ATTEMPTS'])
+    db.session.add(job)
+    return job
+
+def claim_next_job():
+    """取得下一個可執行的工作並加上租約
+
+    租約逾時（例如工作進程當機）的工作會被重新取得，因此已入列的工作不會遺失。
+
+    Returns:
+        Job: 已取得的工作，沒有可執行的工作時為 None
+    """
+    now = datetime.utcnow()
+    candidates = Job.query.filter(or_(
+        and_(Job.status == 'queued', Job.run_after <= now),
+        and_(Job.status == 'running', Job.locked_until < now)
+    )).order_by(Job.run_after, Job.id).limit(5).all()
+
+    for job in candidates:
+        # 以條件式更新取得工作，避免多個工作進程重複執行
+        claimed = Job.query.filter(
+            Job.id == job.id,
+            Job.status == job.status,
+            Job.attempts == job.attempts
+        ).update({
+            'status': 'running',
+            'attempts': Job.attempts + 1,
+            'locked_until': now + timedelta(seconds=app.config['JOB_LEASE_SECONDS'])
+        }, synchronize_session=False)
+        db.session.commit()
+        if claimed:
+            db.session.refresh(job)
+            return job
+    return None
+
+def run_job(job):
+    """執行工作，失敗時依指數退避重試，超過次數後標記為失敗"""
+    handler = JOB_HANDLERS.get(job.kind)
+    try:
+        if handler is None:
+            raise ValueError(f"未知的工作類型: {job.kind}")
+        handler(job.payload or {})
+        job.status = 'done'
+        job.finished_at = datetime.utcnow()
+        job.last_error = None
+        db.session.commit()
+        return True
+    except Exception as e:
+        db.session.rollback()
+        app.logger.error(f"工作 {job.id} ({job.kind}) 執行失敗: {str(e)}")
+        job = db.session.get(Job, job.id)
+        job.last_error = str(e)
+        job.locked_until = None
+        if job.attempts >= job.max_attempts:
+            job.status = 'failed'
+            job.finished_at = datetime.utcnow()
+            failure_handler = JOB_FAILURE_HANDLERS.get(job.kind)
+            if failure_handler:
+                failure_handler(job.payload or {})
+        else:
+            job.status = 'queued'
+            job.run_after = datetime.utcnow() + timedelta(seconds=2 ** job.attempts * 5)
+        db.session.commit()
+        return False
+
+def process_photo_job(payload):
+    """背景處理上傳的照片（產生衍生圖片）"""
+    photo = db.session.get(Photo, payload['photo_id'])
+    if not photo:
+        return  # 照片已被刪除
+    photo.processing_status = 'processing'
+    db.session.commit()
+
+    # 相同內容的照片已處理過時直接沿用衍生圖片
+    processed = Photo.query.filter(
+        Photo.filename == photo.filename,
+        Photo.id != photo.id,
+        Photo.has_derivatives.is_(True)
+    ).first()
+    if processed:
+        for column in ('width', 'height', 'thumb_width', 'thumb_height', 'medium_width', 'medium_height'):
+            setattr(photo, column, getattr(processed, column))
+        photo.has_derivatives = True
+        photo.processing_status = 'done'
+    else:
+        # 無法處理時拋出 OSError，交由 run_job 依退避時間重試，超過次數後才由 mark_photo_failed 標記失敗
+        photo.apply_derivatives(app.config['UPLOAD_FOLDER'])
+        photo.processing_status = 'done'
+    db.session.commit()
+    if photo.is_approved:
+        page_cache.bump_version()
+
+def mark_photo_failed(payload):
+    photo = db.session.get(Photo, payload['photo_id'])
+    if photo:
+        photo.processing_status = 'failed'
+
+JOB_HANDLERS = {
+    'process_photo': process_photo_job,
+}
+
+JOB_FAILURE_HANDLERS = {
+    'process_photo': mark_photo_failed,
+}
+
 def calculate_calories(food_type, amount):
     calories_per_gram = {
         '貓罐頭': 0.8,
@@ -256,13 +791,20 @@ def can_edit_record(record):
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
-with app.app_context():
+def init_db():
+    """建立資料表及預設資料，可重複執行
+
+    只在部署時由 `flask init` 執行一次，工作進程匯入模組時不會觸碰資料庫
+    """
     db.create_all()
     # 確保有一個貓咪檔案
     if not CatProfile.query.first():
         default_profile = CatProfile()
         db.session.add(default_profile)
         db.session.commit()
+    if not Settings.query.first():
+        db.session.add(Settings(timezone='Asia/Taipei'))
+        db.session.commit()
     # 創建默認管理員帳號（如果不存在）
     if not Admin.query.first():
         admin = Admin(username='admin')
@@ -270,7 +812,41 @@ with app.app_context():
         db.session.add(admin)
         db.session.commit()
 
+def create_app():
+    """Gunicorn 使用的應用程式進入點
+
+    路由均註冊在模組層級的 app 上，這裡回傳同一個實例；匯入時只建立設定與擴充套件，
+    不建立資料表或寫入資料，資料庫初始化請執行 `flask --app app init`
+    """
+    return app
+
+def warm_up():
+    """預先載入各工作進程都會用到的資料
+
+    在 Gunicorn preload_app 模式下由主進程在 fork 前呼叫，編譯後的模板、時區清單及 zxcvbn
+    的內部結構只建立一次，工作進程以寫入時複製的方式共用這些記憶體頁面；不會連線資料庫
+    """
+    for name in app.jinja_env.list_templates():
+        if name.endswith('.html'):
+            app.jinja_env.get_template(name)
+    len(pytz.common_timezones)
+    len(pytz.common_timezones_set)
+    pytz.timezone('Asia/Taipei')
+    warm_up_scorer()
+
+@app.cli.command('init')
+def init_command():
+    """建立資料表及預設的貓咪檔案與管理員帳號"""
+    init_db()
+    print("資料庫初始化完成")
+
+def local_date_key():
+    """目前的本地日期，加入首頁的快取鍵，跨日後今日攝取統計會重新產生"""
+    return datetime.now(get_current_timezone()).date().isoformat()
+
 @app.route('/')
+@query_budget(8)
+@page_cache.cached(vary=local_date_key)
 def index():
     # 獲取當前時區
     local_tz = get_current_timezone()
@@ -283,18 +859,10 @@ def index():
         db.session.add(cat)
         db.session.commit()
 
-    # 計算今日攝取的卡路里
-    today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
-    records = FeedingRecord.query.filter(
-        FeedingRecord.timestamp >= today_start.astimezone(pytz.UTC)
-    ).order_by(FeedingRecord.timestamp.desc()).all()
-
-    # 轉換時間到本地時區
-    for record in records:
-        record.local_time = convert_to_local_time(record.timestamp)
-
-    # 計算今日總卡路里
-    total_calories = sum(record.calories for record in records if record.calories)
+    # 從每日彙總讀取今日攝取的卡路里及貓條數量
+    today_intake = db.session.get(DailyIntake, now.date())
+    total_calories = round(today_intake.total_calories, 4) if today_intake else 0
+    treat_count = today_intake.treat_count if today_intake else 0
 
     # 計算每日建議攝取量
     daily_needs = calculate_daily_needs(cat.weight, cat.is_neutered, cat.activity_level)
@@ -310,23 +878,23 @@ def index():
             'message': request.args.get('status_message')
         }
 
-    all_records = FeedingRecord.query.order_by(FeedingRecord.timestamp.desc()).all()
-    for record in all_records:
-        record.local_time = convert_to_local_time(record.timestamp)
+    # 只載入第一頁歷史記錄，其餘由 /api/records 於捲動時分頁載入
+    history_records, next_cursor = get_feeding_history()
+    localize_records(history_records, local_tz)
 
-    treats_message = f'今日還可以吃 {max(2 - sum(1 for record in records if record.food_type == "貓條"), 0)} 條貓條'
+    treats_message = f'今日還可以吃 {max(2 - treat_count, 0)} 條貓條'
 
     # 獲取最近的照片（最多5張）
-    recent_photos = Photo.query.filter_by(is_approved=True).order_by(Photo.date_taken.desc()).limit(5).all()
+    recent_photos = approved_photos_query().limit(5).all()
 
     return render_template('index.html',
-                         records=all_records,
+                         records=history_records,
+                         next_cursor=next_cursor,
                          total_calories=total_calories,
                          daily_needs=daily_needs,
                          remaining_treats=remaining_treats,
                          status=status,
                          now=now,
-                         can_edit_record=can_edit_record,
                          recent_photos=recent_photos)
 
 @app.route('/add_record', methods=['POST'])
@@ -347,11 +915,191 @@ def add_record():
     )
     
     db.session.add(new_record)
+    db.session.flush()
+    update_daily_intake(new_record)
     db.session.commit()
+    page_cache.bump_version()
     
     return redirect(url_for('index'))
 
+@app.route('/api/records')
+@query_budget(2)
+def get_records():
+    """以游標分頁回傳餵食歷史記錄（format=html 時回傳與首頁相同的表格列，含編輯及刪除按鈕）"""
+    limit = min(request.args.get('limit', app.config['HISTORY_PAGE_SIZE'], type=int),
+                app.config['HISTORY_MAX_PAGE_SIZE'])
+    if limit < 1:
+        return jsonify({"error": "無效的分頁大小"}), 400
+    try:
+        records, next_cursor = get_feeding_history(request.args.get('cursor'), limit)
+    except ValueError:
+        return jsonify({"error": "無效的分頁參數"}), 400
+
+    localize_records(records)
+    if request.args.get('format') == 'html':
+        return jsonify({
+            'html': ''.join(render_template('_record_row.html', record=record, row_class='history-record')
+                            for record in records),
+            'next_cursor': next_cursor
+        })
+    return jsonify({
+        'records': [{
+            'id': record.id,
+            'timestamp': record.timestamp.isoformat(),
+            'local_time': record.local_time.strftime('%m/%d %H:%M'),
+            'feeder_nickname': record.feeder_nickname,
+            'food_type': record.food_type,
+            'amount': record.amount,
+            'unit': record.unit,
+            'calories': record.calories,
+            'notes': record.notes
+        } for record in records],
+        'next_cursor': next_cursor
+    })
+
+# 匯出及匯入的欄位（時間為 UTC）
+RECORD_EXPORT_FIELDS = ['id', 'timestamp', 'food_type', 'amount', 'unit', 'calories', 'notes', 'feeder_nickname']
+
+def export_feeding_records(fmt):
+    """以 (timestamp, id) 鍵集逐批讀取全部餵食記錄並產生 CSV 或 NDJSON 文字區塊
+
+    每批讀取後先把連線歸還連線池再傳送給客戶端，gevent 模式下慢速下載不會一直佔用資料庫連線。
+    """
+    table = FeedingRecord.__table__
+    query = (db.select(*[table.c[field] for field in RECORD_EXPORT_FIELDS])
+             .order_by(table.c.timestamp, table.c.id)
+             .limit(app.config['EXPORT_BATCH_SIZE']))
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if fmt == 'csv':
+        writer.writerow(RECORD_EXPORT_FIELDS)
+    batch_query = query
+    while True:
+        rows = db.session.execute(batch_query).all()
+        db.session.close()
+        for row in rows:
+            values = dict(zip(RECORD_EXPORT_FIELDS, row))
+            values['timestamp'] = values['timestamp'].isoformat()
+            if fmt == 'csv':
+                writer.writerow(values.values())
+            else:
+                buffer.write(json.dumps(values, ensure_ascii=False) + '\n')
+        if buffer.tell():
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        if len(rows) < app.config['EXPORT_BATCH_SIZE']:
+            break
+        last = rows[-1]
+        batch_query = query.where(or_(
+            table.c.timestamp > last.timestamp,
+            and_(table.c.timestamp == last.timestamp, table.c.id > last.id)
+        ))
+
+def parse_import_row(row, line):
+    """驗證一筆匯入資料，回傳可直接寫入 feeding_record 的欄位"""
+    def error(message):
+        return ValueError(f"第 {line} 筆：{message}")
+
+    if not isinstance(row, dict):
+        raise error("無法解析的資料")
+    food_type = (row.get('food_type') or '').strip()
+    feeder_nickname = (row.get('feeder_nickname') or '').strip()
+    if not food_type or not feeder_nickname:
+        raise error("food_type 及 feeder_nickname 為必填欄位")
+    if len(food_type) > 50 or len(feeder_nickname) > 50:
+        raise error("food_type 及 feeder_nickname 不能超過 50 個字元")
+    try:
+        amount = float(row.get('amount'))
+        calories = row.get('calories')
+        calories = float(calories) if calories not in (None, '') else calculate_calories(food_type, amount)
+    except (TypeError, ValueError):
+        raise error("amount 及 calories 必須是數字")
+    if not math.isfinite(amount) or not math.isfinite(calories):
+        raise error("amount 及 calories 必須是有限的數字")
+    if amount < 0 or calories < 0:
+        raise error("amount 及 calories 不能為負數")
+    try:
+        timestamp = datetime.fromisoformat(str(row.get('timestamp')))
+    except ValueError:
+        raise error("timestamp 必須是 ISO 8601 格式")
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone(pytz.UTC).replace(tzinfo=None)
+    return {
+        'timestamp': timestamp,
+        'food_type': food_type,
+        'amount': amount,
+        'unit': (row.get('unit') or '克').strip(),
+        'calories': calories,
+        'notes': row.get('notes') or None,
+        'feeder_nickname': feeder_nickname,
+    }
+
+def read_import_rows(stream, fmt):
+    """從請求內容逐行讀取匯入資料（CSV 首列為欄位名稱，NDJSON 每行一個 JSON 物件）"""
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    if fmt == 'csv':
+        yield from csv.DictReader(text)
+        return
+    for line in text:
+        if line.strip():
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                yield None
+
+def import_feeding_records(rows):
+    """以 executemany 分批寫入餵食記錄，每批一個交易，完成後重建每日彙總"""
+    insert = FeedingRecord.__table__.insert()
+    chunk_size = app.config['IMPORT_CHUNK_SIZE']
+    for start in range(0, len(rows), chunk_size):
+        db.session.execute(insert, rows[start:start + chunk_size])
+        db.session.commit()
+    rebuild_daily_intake()
+    db.session.commit()
+    page_cache.bump_version()
+
+@app.route('/api/records/export')
+@login_required
+def export_records():
+    """以串流方式匯出全部餵食記錄（format=csv 或 ndjson）"""
+    fmt = request.args.get('format', 'csv')
+    if fmt not in ('csv', 'ndjson'):
+        return jsonify({"error": "不支援的匯出格式"}), 400
+    mimetype = 'text/csv' if fmt == 'csv' else 'application/x-ndjson'
+    response = app.response_class(stream_with_context(export_feeding_records(fmt)), mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename=feeding_records.{fmt}'
+    return response
+
+@app.route('/api/records/import', methods=['POST'])
+@login_required
+def import_records():
+    """匯入餵食記錄（請求內容為 CSV 或 NDJSON），全部驗證通過後才寫入，原有 id 不會保留"""
+    fmt = request.args.get('format') or ('ndjson' if 'ndjson' in (request.mimetype or '') else 'csv')
+    if fmt not in ('csv', 'ndjson'):
+        return jsonify({"error": "不支援的匯入格式"}), 400
+
+    rows, errors = [], []
+    try:
+        for line, row in enumerate(read_import_rows(request.stream, fmt), start=1):
+            try:
+                rows.append(parse_import_row(row, line))
+            except ValueError as e:
+                errors.append(str(e))
+                if len(errors) >= 20:
+                    break
+    except (UnicodeDecodeError, csv.Error):
+        return jsonify({"error": "無法解析匯入內容"}), 400
+    if errors:
+        return jsonify({"error": "匯入資料驗證失敗", "details": errors}), 400
+    if not rows:
+        return jsonify({"error": "沒有可匯入的記錄"}), 400
+
+    import_feeding_records(rows)
+    return jsonify({"imported": len(rows)})
+
 @app.route('/admin/login', methods=['GET', 'POST'])
+@query_budget(5)
 @limiter.limit(os.getenv('RATELIMIT_LOGIN_LIMIT', '5 per minute'))
 def admin_login():
     if current_user.is_authenticated:
@@ -379,8 +1127,8 @@ def admin_login():
             else:
                 flash('使用者名稱或密碼錯誤', 'error')
                 # 如果登入失敗次數過多，封鎖 IP
-                if admin.failed_login_attempts >= 5:
-                    block_ip(request.remote_addr, 900)  # 封鎖 15 分鐘
+                if admin.total_failed_attempts() >= 5:
+                    block_ip(get_remote_address(), 900)  # 封鎖 15 分鐘
         except ValueError as e:
             flash(str(e), 'error')
             
@@ -393,15 +1141,13 @@ def admin_logout():
     return redirect(url_for('index'))
 
 @app.route('/admin_dashboard')
+@query_budget(6)
 @login_required
 def admin_dashboard():
     timezones = pytz.common_timezones
     current_timezone = get_current_timezone()
-    records = FeedingRecord.query.order_by(FeedingRecord.timestamp.desc()).all()
-    for record in records:
-        record.local_time = convert_to_local_time(record.timestamp)
-    
-    # 獲取貓咪資料和設定
+
+    # 獲取貓咪資料和設定（需在讀取記錄前建立，commit 會讓已載入的記錄過期而逐筆重新查詢）
     cat = CatProfile.query.first()
     if not cat:
         cat = CatProfile(name='滅霸', weight=4.5, daily_calories=237.6)
@@ -413,15 +1159,24 @@ def admin_dashboard():
         settings = Settings(timezone='Asia/Taipei')
         db.session.add(settings)
         db.session.commit()
+
+    try:
+        records, next_cursor = get_feeding_history(request.args.get('cursor'))
+    except ValueError:
+        flash('無效的分頁參數', 'danger')
+        return redirect(url_for('admin_dashboard'))
+    localize_records(records, current_timezone)
     
     return render_template('admin_dashboard.html', 
                          timezones=timezones, 
                          current_timezone=current_timezone,
                          records=records,
+                         next_cursor=next_cursor,
                          cat=cat,
                          settings=settings)
 
 @app.route('/admin/change_password', methods=['GET', 'POST'])
+@query_budget(4)
 @login_required
 @limiter.limit(os.getenv('RATELIMIT_API_LIMIT', '30 per minute'))
 def change_password():
@@ -464,6 +1219,7 @@ def update_profile():
     cat.activity_level = request.form.get('activity_level')
     
     db.session.commit()
+    page_cache.bump_version()
     flash('貓咪資料已更新')
     return redirect(url_for('admin_dashboard'))
 
@@ -471,7 +1227,7 @@ def update_profile():
 @login_required
 def update_timezone():
     timezone = request.form.get('timezone')
-    if timezone not in pytz.common_timezones:
+    if timezone not in pytz.common_timezones_set:
         flash('無效的時區設定', 'danger')
         return redirect(url_for('admin_dashboard'))
     
@@ -482,7 +1238,12 @@ def update_timezone():
     else:
         settings.timezone = timezone
     
+    # 每日彙總以本地日期為鍵，時區變更後需重新計算
+    rebuild_daily_intake()
     db.session.commit()
+    # 提交後才通知所有工作進程，避免其他進程在提交前重新讀取到舊時區並快取
+    invalidate_timezone_cache()
+    page_cache.bump_version()
     flash('時區設定已更新', 'success')
     return redirect(url_for('admin_dashboard'))
 
@@ -495,13 +1256,20 @@ def edit_record(record_id):
         return redirect(url_for('index'))
     
     if request.method == 'POST':
+        previous = SimpleNamespace(timestamp=record.timestamp, food_type=record.food_type,
+                                   amount=record.amount, calories=record.calories)
         record.food_type = request.form.get('food_type')
         record.amount = float(request.form.get('amount'))
         record.notes = request.form.get('notes')
         record.feeder_nickname = request.form.get('feeder_nickname')
         record.calories = calculate_calories(record.food_type, record.amount)
+        db.session.flush()
+        local_tz = load_timezone()
+        update_daily_intake(previous, sign=-1, local_tz=local_tz)
+        update_daily_intake(record, local_tz=local_tz)
         
         db.session.commit()
+        page_cache.bump_version()
         flash('記錄已更新', 'success')
         return redirect(url_for('index'))
     
@@ -516,17 +1284,56 @@ def delete_record(record_id):
         return redirect(url_for('index'))
     
     db.session.delete(record)
+    db.session.flush()
+    update_daily_intake(record, sign=-1)
     db.session.commit()
+    page_cache.bump_version()
     flash('記錄已刪除', 'success')
     return redirect(url_for('index'))
 
 # 關於頁面路由
 @app.route('/about')
+@query_budget(4)
+@page_cache.cached()
 def about():
-    approved_photos = Photo.query.filter_by(is_approved=True).order_by(Photo.date_taken.desc()).all()
-    biographies = Biography.query.order_by(Biography.date.desc()).all()
+    approved_photos = approved_photos_query().all()
+    biographies = biographies_query().all()
     return render_template('about.html', photos=approved_photos, biographies=biographies)
 
+def validate_photo_form(form):
+    """驗證照片上傳表單
+
+    Returns:
+        (datetime, str): (拍攝日期, 錯誤訊息；驗證通過時為 None)
+    """
+    try:
+        date_taken = datetime.strptime(form.get('date_taken', ''), '%Y-%m-%d')
+    except ValueError:
+        return None, '無效的日期格式'
+
+    if not form.get('photographer'):
+        return None, '請填寫拍攝者'
+    return date_taken, None
+
+def add_photo(filename, content_hash, original_filename, date_taken, form):
+    """新增照片記錄並將處理工作入列"""
+    new_photo = Photo(
+        filename=filename,
+        content_hash=content_hash,
+        original_filename=original_filename,
+        date_taken=date_taken,
+        description=form.get('description', ''),
+        photographer=form['photographer'],
+        is_approved=False,  # 確保新上傳的照片預設為未審核狀態
+        processing_status='pending'
+    )
+    db.session.add(new_photo)
+    db.session.flush()
+    # 衍生圖片交由背景工作進程產生，與照片記錄在同一交易中入列
+    enqueue_job('process_photo', {'photo_id': new_photo.id})
+    db.session.commit()
+    return new_photo
+
 # 照片上傳路由
 @app.route('/upload_photo', methods=['POST'])
 @limiter.limit(os.getenv('RATELIMIT_API_LIMIT', '30 per minute'))
@@ -544,43 +1351,105 @@ def upload_photo():
         flash('不支援的檔案格式', 'danger')
         return redirect(url_for('about'))
 
-    try:
-        date_taken = datetime.strptime(request.form['date_taken'], '%Y-%m-%d')
-    except ValueError:
-        flash('無效的日期格式', 'danger')
+    date_taken, error = validate_photo_form(request.form)
+    if error:
+        flash(error, 'danger')
         return redirect(url_for('about'))
 
-    if not request.form.get('photographer'):
-        flash('請填寫拍攝者', 'danger')
-        return redirect(url_for('about'))
+    filename = secure_filename(file.filename)
+    ext = filename.rsplit('.', 1)[1].lower()
+    # 移入檔案與寫入照片記錄在同一把鎖內完成，刪除照片時才不會移除剛被沿用的檔案
+    with blob_lock(app.config['UPLOAD_FOLDER']):
+        if isinstance(file.stream, HashingFile):
+            # 上傳內容已在解析時寫入磁碟並計算雜湊，直接移入內容定址的位置
+            stored_filename, content_hash = file.stream.commit(ext)
+        else:
+            stored_filename, content_hash = store_stream(file.stream, app.config['UPLOAD_FOLDER'], ext)
+        add_photo(stored_filename, content_hash, filename, date_taken, request.form)
+
+    flash('照片上傳成功，等待管理員審核', 'success')
+    return redirect(url_for('about'))
+
+# 分段上傳路由（可續傳）
+@app.route('/upload_photo/chunks', methods=['POST'])
+@limiter.limit(os.getenv('RATELIMIT_API_LIMIT', '30 per minute'))
+def create_chunked_upload():
+    data = request.get_json(silent=True) or {}
+    filename = secure_filename(data.get('filename', ''))
+    size = data.get('size')
+
+    if not filename or not allowed_file(filename):
+        return jsonify({"error": "不支援的檔案格式"}), 400
+    if not isinstance(size, int) or size <= 0 or size > app.config['MAX_PHOTO_SIZE']:
+        return jsonify({"error": "無效的檔案大小"}), 400
+
+    cleanup_stale_uploads(app.config['UPLOAD_FOLDER'])
+    upload_id = create_upload(app.config['UPLOAD_FOLDER'], filename, size)
+    return jsonify({
+        'upload_id': upload_id,
+        'offset': 0,
+        'chunk_size': app.config['UPLOAD_CHUNK_SIZE']
+    }), 201
 
-    if file and allowed_file(file.filename):
-        filename = secure_filename(file.filename)
-        # 使用時間戳確保檔名唯一
-        unique_filename = f"{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}_{filename}"
-        file.save(os.path.join(app.config['UPLOAD_FOLDER'], unique_filename))
-        
-        new_photo = Photo(
-            filename=unique_filename,
-            original_filename=filename,
-            date_taken=date_taken,
-            description=request.form.get('description', ''),
-            photographer=request.form['photographer'],
-            is_approved=False  # 確保新上傳的照片預設為未審核狀態
-        )
-        db.session.add(new_photo)
-        db.session.commit()
-        
-        flash('照片上傳成功，等待管理員審核', 'success')
-        return redirect(url_for('about'))
+@app.route('/upload_photo/chunks/<upload_id>', methods=['GET'])
+def get_chunked_upload(upload_id):
+    try:
+        upload = get_upload(app.config['UPLOAD_FOLDER'], upload_id)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if upload is None:
+        return jsonify({"error": "上傳不存在或已過期"}), 404
+    return jsonify({'offset': upload['offset'], 'size': upload['size']})
+
+@app.route('/upload_photo/chunks/<upload_id>', methods=['PUT'])
+def upload_chunk(upload_id):
+    offset = request.headers.get('Upload-Offset', type=int)
+    if offset is None:
+        return jsonify({"error": "缺少 Upload-Offset 標頭"}), 400
+    try:
+        # 直接從請求串流寫入磁碟，不經過 multipart 解析
+        new_offset = append_chunk(app.config['UPLOAD_FOLDER'], upload_id, offset, request.stream)
+    except ValueError as e:
+        upload = None
+        try:
+            upload = get_upload(app.config['UPLOAD_FOLDER'], upload_id)
+        except ValueError:
+            pass
+        return jsonify({
+            "error": str(e),
+            "offset": upload['offset'] if upload else None
+        }), 409 if upload else 404
+    return jsonify({'offset': new_offset})
+
+@app.route('/upload_photo/chunks/<upload_id>/complete', methods=['POST'])
+@limiter.limit(os.getenv('RATELIMIT_API_LIMIT', '30 per minute'))
+def complete_chunked_upload(upload_id):
+    date_taken, error = validate_photo_form(request.form)
+    if error:
+        return jsonify({"error": error}), 400
+
+    try:
+        upload = get_upload(app.config['UPLOAD_FOLDER'], upload_id)
+        if upload is None:
+            return jsonify({"error": "上傳不存在或已過期"}), 404
+        ext = upload['filename'].rsplit('.', 1)[1].lower()
+        with blob_lock(app.config['UPLOAD_FOLDER']):
+            stored_filename, content_hash = finish_upload(app.config['UPLOAD_FOLDER'], upload_id, ext)
+            add_photo(stored_filename, content_hash, upload['filename'], date_taken, request.form)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    flash('照片上傳成功，等待管理員審核', 'success')
+    return jsonify({'redirect': url_for('about')}), 201
 
 # 照片審核路由
 @app.route('/admin/photos')
+@query_budget(4)
 @login_required
 @limiter.limit(os.getenv('RATELIMIT_API_LIMIT', '30 per minute'))
 def admin_photos():
-    pending_photos = Photo.query.filter_by(is_approved=False).order_by(Photo.upload_date.desc()).all()
-    approved_photos = Photo.query.filter_by(is_approved=True).order_by(Photo.upload_date.desc()).all()
+    pending_photos = review_photos_query(False).all()
+    approved_photos = review_photos_query(True).all()
     return render_template('admin_photos.html', pending_photos=pending_photos, approved_photos=approved_photos)
 
 # 審核照片路由
@@ -590,6 +1459,7 @@ def approve_photo(photo_id):
     photo = Photo.query.get_or_404(photo_id)
     photo.is_approved = True
     db.session.commit()
+    page_cache.bump_version()
     flash('照片已審核通過', 'success')
     return redirect(url_for('admin_photos'))
 
@@ -598,12 +1468,20 @@ def approve_photo(photo_id):
 @login_required
 def delete_photo(photo_id):
     photo = Photo.query.get_or_404(photo_id)
-    try:
-        os.remove(os.path.join(app.config['UPLOAD_FOLDER'], photo.filename))
-    except OSError:
-        pass  # 如果檔案不存在就忽略
-    db.session.delete(photo)
-    db.session.commit()
+    filename = photo.filename
+    # 相同內容的照片共用同一個檔案，只有最後一筆記錄被刪除時才移除檔案；
+    # 檢查參照、刪除記錄及移除檔案在同一把鎖內完成，與新增照片互斥
+    with blob_lock(app.config['UPLOAD_FOLDER']):
+        references = Photo.query.filter(Photo.filename == filename, Photo.id != photo.id).count()
+        db.session.delete(photo)
+        db.session.commit()
+        if references == 0:
+            remove_derivatives(app.config['UPLOAD_FOLDER'], filename)
+            try:
+                os.remove(os.path.join(app.config['UPLOAD_FOLDER'], filename))
+            except OSError:
+                pass  # 如果檔案不存在就忽略
+    page_cache.bump_version()
     flash('照片已刪除', 'success')
     return redirect(url_for('admin_photos'))
 
@@ -612,9 +1490,24 @@ def delete_photo(photo_id):
 @limiter.limit(os.getenv('RATELIMIT_DEFAULT', '200 per day'), exempt_when=lambda: current_user.is_authenticated)
 def uploaded_file(filename):
     try:
-        response = send_from_directory(app.config['UPLOAD_FOLDER'], filename)
-        response.headers['Cache-Control'] = 'public, max-age=31536000'  # 一年的快取
-        response.headers['X-Accel-Buffering'] = 'no'  # 禁用 Nginx 緩衝
+        path = safe_join(os.path.abspath(app.config['UPLOAD_FOLDER']), filename)
+        if path is None or not os.path.isfile(path):
+            return "照片不存在", 404
+
+        if app.config['UPLOADS_SENDFILE_MODE'] == 'x-accel':
+            # Python 只負責授權，檔案內容、條件式請求及 Range 交由 Nginx 處理
+            response = app.response_class()
+            response.headers['X-Accel-Redirect'] = app.config['UPLOADS_ACCEL_PREFIX'] + filename
+            response.headers['Content-Type'] = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        else:
+            # 支援 ETag / Last-Modified 條件式請求（304）及 Range 請求；x-sendfile 模式由 USE_X_SENDFILE 處理
+            response = send_from_directory(
+                app.config['UPLOAD_FOLDER'], filename,
+                etag=file_etag(path, filename),
+                conditional=True
+            )
+            response.headers['Accept-Ranges'] = 'bytes'
+        response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'  # 一年的快取，檔名隨內容改變
         return response
     except FileNotFoundError:
         return "照片不存在", 404
@@ -624,6 +1517,7 @@ def uploaded_file(filename):
 
 # 生平記事路由
 @app.route('/admin/biography', methods=['GET', 'POST'])
+@query_budget(4)
 @login_required
 def manage_biography():
     if request.method == 'POST':
@@ -652,29 +1546,131 @@ def manage_biography():
                 flash('生平記事已新增', 'success')
             
             db.session.commit()
+            page_cache.bump_version()
             return redirect(url_for('manage_biography'))
         except ValueError:
             flash('無效的日期格式', 'danger')
             return redirect(url_for('manage_biography'))
     
-    biographies = Biography.query.order_by(Biography.date.desc()).all()
+    biographies = biographies_query().all()
     return render_template('admin_biography.html', biographies=biographies)
 
 @app.route('/api/biography')
+@query_budget(3)
+@page_cache.cached()
 def get_biography():
-    biographies = Biography.query.order_by(Biography.date.desc()).all()
+    biographies = biographies_query().all()
     return jsonify([{
         'id': bio.id,
         'date': bio.date.strftime('%Y-%m-%d'),
         'content': bio.content
     } for bio in biographies])
 
+@app.route('/api/intake/daily')
+@query_budget(2)
+def get_daily_intake():
+    """回傳最近每日的卡路里攝取量（由每日彙總表讀取）"""
+    days = min(request.args.get('days', 30, type=int), 3660)
+    if days < 1:
+        return jsonify({"error": "無效的天數"}), 400
+
+    local_tz = get_current_timezone()
+    since = datetime.now(local_tz).date() - timedelta(days=days - 1)
+    intakes = DailyIntake.query.filter(DailyIntake.date >= since).order_by(DailyIntake.date.desc()).all()
+    return jsonify([{
+        'date': intake.date.strftime('%Y-%m-%d'),
+        'total_calories': round(intake.total_calories, 1),
+        'treat_count': intake.treat_count,
+        'record_count': intake.record_count
+    } for intake in intakes])
+
+def query_food_intake(start, end, bucket):
+    """以 SQL 將每日各食物種類的彙總依區間分組
+
+    Returns:
+        list: (區間第一天距 1970-01-01 的天數, 食物種類, 份量, 卡路里, 記錄數)
+    """
+    # julianday 在午夜為 .5，減去 1970-01-01 的值後為整數天數
+    day = db.cast(db.func.julianday(DailyFoodIntake.date) - 2440587.5, db.Integer)
+    columns = [DailyFoodIntake.food_type, DailyFoodIntake.amount, DailyFoodIntake.calories, DailyFoodIntake.record_count]
+    query = db.session.query(day, *columns)
+    if bucket != 'day':
+        if bucket == 'week':
+            # 1970-01-01 是星期四，週一開始
+            key = day - (day + 3) % 7
+        else:
+            key = db.cast(db.func.julianday(DailyFoodIntake.date, 'start of month') - 2440587.5, db.Integer)
+        query = db.session.query(
+            key,
+            DailyFoodIntake.food_type,
+            db.func.sum(DailyFoodIntake.amount),
+            db.func.sum(DailyFoodIntake.calories),
+            db.func.sum(DailyFoodIntake.record_count)
+        ).group_by(key, DailyFoodIntake.food_type)
+    return query.filter(DailyFoodIntake.date >= start, DailyFoodIntake.date <= end).all()
+
+@app.route('/api/analytics/intake')
+@query_budget(3)
+def get_intake_analytics():
+    """回傳指定範圍內每日、每週或每月的卡路里、各食物種類份量、貓條數量及與每日建議量的比例
+
+    參數：start、end（本地日期 YYYY-MM-DD，預設為最近 30 天）、bucket（day、week、month）、
+    max_points（區間數超過時合併相鄰區間）
+    """
+    local_tz = get_current_timezone()
+    bucket = request.args.get('bucket', 'day')
+    if bucket not in ANALYTICS_BUCKETS:
+        return jsonify({"error": "bucket 必須是 day、week 或 month"}), 400
+    try:
+        end = datetime.strptime(request.args['end'], '%Y-%m-%d').date() if 'end' in request.args else datetime.now(local_tz).date()
+        start = datetime.strptime(request.args['start'], '%Y-%m-%d').date() if 'start' in request.args else end - timedelta(days=29)
+        max_points = int(request.args['max_points']) if 'max_points' in request.args else None
+    except ValueError:
+        return jsonify({"error": "日期格式必須是 YYYY-MM-DD，max_points 必須是整數"}), 400
+    if start > end or (end - start).days >= app.config['ANALYTICS_MAX_DAYS']:
+        return jsonify({"error": f"日期範圍必須介於 1 到 {app.config['ANALYTICS_MAX_DAYS']} 天"}), 400
+    if max_points is not None and max_points < 1:
+        return jsonify({"error": "max_points 必須大於 0"}), 400
+
+    cat = CatProfile.query.first()
+    if cat:
+        daily_needs = calculate_daily_needs(cat.weight, cat.is_neutered, cat.activity_level)
+    else:
+        daily_needs = calculate_daily_needs(4.0, True, 'low')
+    rows = query_food_intake(start, end, bucket)
+    return jsonify(intake_series(rows, start, end, bucket, daily_needs, max_points=max_points))
+
+@app.cli.command('backfill-intake')
+def backfill_intake_command():
+    """依現有餵食記錄回填每日攝取量彙總"""
+    days = rebuild_daily_intake()
+    db.session.commit()
+    page_cache.bump_version()
+    print(f"已回填 {days} 天的每日攝取量")
+
+@app.cli.command('backfill-photos')
+def backfill_photos_command():
+    """為尚未產生衍生圖片的照片補產生縮圖及 WebP 版本"""
+    photos = Photo.query.filter(db.or_(Photo.has_derivatives.is_(False), Photo.has_derivatives.is_(None))).all()
+    processed = 0
+    for photo in photos:
+        try:
+            photo.apply_derivatives(app.config['UPLOAD_FOLDER'])
+        except OSError as e:
+            app.logger.warning(f"無法產生照片衍生圖片 {photo.filename}: {str(e)}")
+            continue
+        processed += 1
+        db.session.commit()
+    page_cache.bump_version()
+    print(f"已處理 {processed}/{len(photos)} 張照片")
+
 @app.route('/admin/biography/<int:bio_id>', methods=['DELETE'])
 @login_required
 def delete_biography(bio_id):
     bio = Biography.query.get_or_404(bio_id)
     db.session.delete(bio)
     db.session.commit()
+    page_cache.bump_version()
     flash('生平記事已刪除', 'success')
     return '', 204
 
@@ -1,3 +1,3 @@
-from .password_validator import PasswordValidator, PasswordPolicy
+from .password_validator import PasswordValidator, PasswordPolicy, init_password_scorer, warm_up_scorer
 
-__all__ = ['PasswordValidator', 'PasswordPolicy']
+__all__ = ['PasswordValidator', 'PasswordPolicy', 'init_password_scorer', 'warm_up_scorer']
@@ -5,81 +5,304 @@
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 from functools import wraps
-from flask import request, jsonify, current_app
+from threading import Lock
+from flask import request, jsonify, current_app, abort
+import os
+import time
 import redis
+from limits import parse_many
+from .shared_storage import SharedMemoryStorage  # 註冊 shm:// 存儲
+
+# 每個工作進程各自的 Redis 連線池（以 PID 判斷，Gunicorn fork 後會重新建立）
+_redis_state = {'pid': None, 'client': None}
+_redis_lock = Lock()
+
+# 斷路器狀態：連續失敗達門檻後暫停使用 Redis，改用內存存儲
+_breaker = {'failures': 0, 'open_until': 0.0}
+
+# 本工作進程的 IP 封鎖清單 {ip: 到期時間}
+# local 為本進程寫入的封鎖（Redis 中斷時仍有效），synced 為定期從 Redis 批次同步的封鎖，
+# 同步時整個字典一次替換，請求只做無鎖的字典查詢
+# 未啟用 Redis 時封鎖改寫入 /dev/shm 的共享記憶體存儲，同樣定期批次同步到 synced
+BLOCK_KEY_PREFIX = 'catfeed/blocked_ip/'
+_blocklist = {'local': {}, 'synced': {}, 'synced_at': float('-inf')}
+_blocklist_sync_lock = Lock()
+
+def _create_redis_client(config):
+    # 連線用盡時等待歸還而非立即失敗，gevent 模式下大量協程同時存取也不會觸發斷路器
+    pool = redis.BlockingConnectionPool(
+        host=config.get('REDIS_HOST', 'localhost'),
+        port=config.get('REDIS_PORT', 6379),
+        db=config.get('REDIS_DB', 0),
+        decode_responses=True,
+        max_connections=config.get('REDIS_MAX_CONNECTIONS', 10),
+        socket_connect_timeout=config.get('REDIS_SOCKET_TIMEOUT', 0.5),
+        socket_timeout=config.get('REDIS_SOCKET_TIMEOUT', 0.5),
+        timeout=config.get('REDIS_SOCKET_TIMEOUT', 0.5),
+        health_check_interval=config.get('REDIS_HEALTH_CHECK_INTERVAL', 30)
+    )
+    return redis.Redis(connection_pool=pool)
 
 def get_redis_client():
-    """獲取 Redis 客戶端實例"""
-    try:
-        return redis.Redis(
-            host=current_app.config.get('REDIS_HOST', 'localhost'),
-            port=current_app.config.get('REDIS_PORT', 6379),
-            db=current_app.config.get('REDIS_DB', 0),
-            decode_responses=True
-        )
-    except redis.ConnectionError:
-        current_app.logger.warning("無法連接到 Redis，將使用內存存儲")
+    """獲取共用的 Redis 客戶端實例
+
+    Returns:
+        redis.Redis: 未啟用 Redis 或斷路器開啟時為 None
+    """
+    if not current_app.config.get('REDIS_ENABLED'):
+        return None
+    if _breaker['open_until'] > time.monotonic():
         return None
 
+    pid = os.getpid()
+    if _redis_state['pid'] != pid:
+        with _redis_lock:
+            if _redis_state['pid'] != pid:
+                _redis_state['client'] = _create_redis_client(current_app.config)
+                _redis_state['pid'] = pid
+    return _redis_state['client']
+
+def reset_redis_client():
+    """捨棄目前的連線池（例如 Gunicorn fork 後），下次使用時重新建立"""
+    with _redis_lock:
+        _redis_state['pid'] = None
+        _redis_state['client'] = None
+
+def _record_redis_failure():
+    _breaker['failures'] += 1
+    if _breaker['failures'] >= current_app.config.get('REDIS_FAILURE_THRESHOLD', 3):
+        _breaker['open_until'] = time.monotonic() + current_app.config.get('REDIS_RETRY_INTERVAL', 30)
+        _breaker['failures'] = 0
+        current_app.logger.warning("無法連接到 Redis，將暫時使用內存存儲")
+
+def run_redis(operation, default=None):
+    """透過斷路器執行 Redis 操作
+
+    Args:
+        operation: 接收 Redis 客戶端的函式
+        default: Redis 無法使用時的回傳值
+
+    Returns:
+        operation 的回傳值，或 default
+    """
+    redis_client = get_redis_client()
+    if redis_client is None:
+        return default
+    try:
+        result = operation(redis_client)
+    except redis.RedisError:
+        _record_redis_failure()
+        return default
+    _breaker['failures'] = 0
+    return result
+
 def init_limiter(app):
-    """初始化限制器"""
-    storage_url = "memory://"
+    """初始化限制器
+
+    存儲後端：啟用 Redis 時使用 Redis，否則使用 RATELIMIT_STORAGE_URI
+    （預設為 /dev/shm 中的共享記憶體存儲，所有工作進程共用計數）。
+    限制策略由 RATELIMIT_STRATEGY 設定（fixed-window、moving-window、sliding-window-counter）。
+    """
+    storage_url = app.config.get('RATELIMIT_STORAGE_URI') or "memory://"
     if app.config.get('REDIS_ENABLED'):
         redis_host = app.config.get('REDIS_HOST', 'localhost')
         redis_port = app.config.get('REDIS_PORT', 6379)
         redis_db = app.config.get('REDIS_DB', 0)
         storage_url = f"redis://{redis_host}:{redis_port}/{redis_db}"
-    
+
     limiter = Limiter(
         app=app,
         key_func=get_remote_address,
         storage_uri=storage_url,
-        strategy="fixed-window",  # 固定時間窗口策略
+        storage_options={
+            'socket_connect_timeout': app.config.get('REDIS_SOCKET_TIMEOUT', 0.5),
+            'socket_timeout': app.config.get('REDIS_SOCKET_TIMEOUT', 0.5),
+            'health_check_interval': app.config.get('REDIS_HEALTH_CHECK_INTERVAL', 30)
+        } if app.config.get('REDIS_ENABLED') else {},
+        in_memory_fallback_enabled=True,  # Redis 無法使用時改用內存計數
+        strategy=app.config.get('RATELIMIT_STRATEGY', 'moving-window'),
         default_limits=["200 per day", "50 per hour"]  # 默認限制
     )
     
     return limiter
 
-def rate_limit_by_ip(limit_string):
-    """基於 IP 的請求限制裝飾器"""
+def _exceeded_limit(limiter, limit_items, key, scope):
+    """回傳第一個超過的限制，全部通過時為 None
+
+    只有一個限制時直接 hit（檢查與遞增在同一次存儲操作中原子完成）；
+    有多個限制時先以 test 檢查全部限制，都通過後才逐一 hit，被後面的限制拒絕的請求不會消耗前面限制的額度。
+    """
+    rate_limiter = limiter.limiter
+    if len(limit_items) == 1:
+        item = limit_items[0]
+        return None if rate_limiter.hit(item, key, scope) else item
+    for item in limit_items:
+        if not rate_limiter.test(item, key, scope):
+            return item
+    for item in limit_items:
+        if not rate_limiter.hit(item, key, scope):
+            return item
+    return None
+
+def _limit_by(limit_string, key_func):
+    """依 key_func 計數的限制裝飾器
+
+    限制字串在裝飾時解析一次，通過後才執行被裝飾的函式，且只執行一次。
+    存儲無法使用時與 Flask-Limiter 的處理方式相同：啟用 in_memory_fallback 時改用內存計數，
+    否則依 swallow_errors 決定放行或拋出例外。
+    """
+    limit_items = parse_many(limit_string)
+
     def decorator(f):
+        scope = f"{f.__module__}.{f.__name__}"
+
         @wraps(f)
         def wrapped(*args, **kwargs):
-            # 獲取當前的限制器實例
-            limiter = current_app.extensions['limiter']
-            
-            # 應用限制
-            limiter.limit(limit_string)(f)(*args, **kwargs)
-            
+            limiter = next(iter(current_app.extensions['limiter']))
+            if limiter.enabled:
+                key = key_func()
+                try:
+                    exceeded = _exceeded_limit(limiter, limit_items, key, scope)
+                except Exception:
+                    # 與 Flask-Limiter 的 _check_request_limit 相同的處理；這些私有屬性依賴固定的 Flask-Limiter==3.5.0，
+                    # 升級版本時需確認仍然存在
+                    if limiter._in_memory_fallback_enabled and not limiter._storage_dead:
+                        limiter.logger.warning("速率限制存儲無法使用，改用內存計數")
+                        limiter._storage_dead = True
+                        exceeded = _exceeded_limit(limiter, limit_items, key, scope)
+                    elif limiter._swallow_errors:
+                        limiter.logger.exception("速率限制檢查失敗，放行請求")
+                        exceeded = None
+                    else:
+                        raise
+                if exceeded is not None:
+                    abort(429, description=str(exceeded))
             return f(*args, **kwargs)
         return wrapped
     return decorator
 
+def _user_or_ip_key():
+    from flask_login import current_user
+
+    # 如果用戶已登入，使用用戶 ID 作為鍵
+    if current_user.is_authenticated:
+        return f"user:{current_user.id}"
+    return get_remote_address()
+
+def rate_limit_by_ip(limit_string):
+    """基於 IP 的請求限制裝飾器"""
+    return _limit_by(limit_string, get_remote_address)
+
 def rate_limit_by_user(limit_string):
-    """基於用戶的請求限制裝飾器"""
-    def decorator(f):
-        @wraps(f)
-        def wrapped(*args, **kwargs):
-            from flask_login import current_user
-            
-            # 獲取當前的限制器實例
-            limiter = current_app.extensions['limiter']
-            
-            # 如果用戶已登入，使用用戶 ID 作為鍵
-            if current_user.is_authenticated:
-                key = f"user:{current_user.id}"
-            else:
-                key = get_remote_address()
-            
-            # 應用限制
-            limiter.limit(
-                limit_string,
-                key_func=lambda: key
-            )(f)(*args, **kwargs)
-            
-            return f(*args, **kwargs)
-        return wrapped
-    return decorator
+    """基於用戶的請求限制裝飾器（未登入時以 IP 計數）"""
+    return _limit_by(limit_string, _user_or_ip_key)
+
+def sync_blocklist(force=False):
+    """從 Redis（未啟用時為共享記憶體存儲）批次同步封鎖清單到本工作進程
+
+    同步間隔由 BLOCKLIST_SYNC_INTERVAL 設定，其他工作進程寫入的封鎖會在間隔內生效。
+    已有其他執行緒正在同步時直接略過，不會阻塞請求。
+    """
+    now = time.monotonic()
+    interval = current_app.config.get('BLOCKLIST_SYNC_INTERVAL', 5)
+    if not force and now - _blocklist['synced_at'] < interval:
+        return
+    if not _blocklist_sync_lock.acquire(blocking=False):
+        return
+    try:
+        def operation(redis_client):
+            keys = list(redis_client.scan_iter(match='blocked_ip:*', count=500))
+            if not keys:
+                return {}
+            pipe = redis_client.pipeline(transaction=False)
+            for key in keys:
+                pipe.ttl(key)
+            blocked = {}
+            for key, ttl in zip(keys, pipe.execute()):
+                # TTL 為 -1 表示沒有到期時間
+                if ttl > 0 or ttl == -1:
+                    blocked[key.split(':', 1)[1]] = now + ttl if ttl > 0 else float('inf')
+            return blocked
+
+        storage = _shared_block_storage()
+        if storage is None:
+            synced = run_redis(operation)
+        else:
+            synced = _load_shared_blocks(storage, now)
+        if synced is not None:
+            _blocklist['synced'] = synced
+        _blocklist['local'] = {ip: expires_at for ip, expires_at in _blocklist['local'].items() if expires_at > now}
+        _blocklist['synced_at'] = now
+    finally:
+        _blocklist_sync_lock.release()
+
+def _is_blocked_locally(ip_address, now):
+    return (_blocklist['local'].get(ip_address, 0) > now
+            or _blocklist['synced'].get(ip_address, 0) > now)
+
+def _shared_block_storage():
+    """未啟用 Redis 且速率限制器使用共享記憶體存儲時回傳該存儲，封鎖經由它在工作進程間共用
+
+    memory:// 存儲只存在於單一進程中，此時封鎖只在設定它的工作進程內有效。
+    """
+    if current_app.config.get('REDIS_ENABLED'):
+        return None
+    for limiter in current_app.extensions.get('limiter', ()):
+        if isinstance(limiter.storage, SharedMemoryStorage):
+            return limiter.storage
+    return None
+
+def _load_shared_blocks(storage, now):
+    """以單次查詢讀取共享存儲中的全部封鎖，到期時間換算為 time.monotonic() 的時間軸"""
+    try:
+        expirations = storage.expirations(BLOCK_KEY_PREFIX)
+    except Exception as e:
+        current_app.logger.warning(f"無法同步共享的 IP 封鎖: {str(e)}")
+        return None
+    offset = now - time.time()
+    return {key[len(BLOCK_KEY_PREFIX):]: expires_at + offset for key, expires_at in expirations.items()}
+
+def block_ips(ip_addresses, duration):
+    """以單次管線操作封鎖多個 IP 地址
+
+    Args:
+        ip_addresses: 要封鎖的 IP 地址列表
+        duration: 封鎖時間（秒）
+    """
+    def operation(redis_client):
+        pipe = redis_client.pipeline(transaction=False)
+        for ip_address in ip_addresses:
+            pipe.setex(f"blocked_ip:{ip_address}", duration, "1")
+        pipe.execute()
+        return True
+
+    # 本進程立即生效，其他工作進程於下次同步時生效
+    expires_at = time.monotonic() + duration
+    local = dict(_blocklist['local'])
+    for ip_address in ip_addresses:
+        local[ip_address] = expires_at
+    _blocklist['local'] = local
+    storage = _shared_block_storage()
+    if storage is None:
+        run_redis(operation, default=False)
+        return
+    try:
+        for ip_address in ip_addresses:
+            # 先清除再遞增，重新封鎖時到期時間從現在重新計算
+            storage.clear(f"{BLOCK_KEY_PREFIX}{ip_address}")
+            storage.incr(f"{BLOCK_KEY_PREFIX}{ip_address}", duration)
+    except Exception as e:
+        current_app.logger.warning(f"無法寫入共享的 IP 封鎖: {str(e)}")
+
+def blocked_ips(ip_addresses):
+    """檢查多個 IP 是否被封鎖
+
+    Returns:
+        set: 被封鎖的 IP 地址
+    """
+    sync_blocklist()
+    now = time.monotonic()
+    return {ip for ip in ip_addresses if _is_blocked_locally(ip, now)}
 
 def block_ip(ip_address, duration):
     """封鎖特定 IP 地址一段時間
@@ -88,10 +311,7 @@ def block_ip(ip_address, duration):
         ip_address: 要封鎖的 IP 地址
         duration: 封鎖時間（秒）
     """
-    redis_client = get_redis_client()
-    if redis_client:
-        key = f"blocked_ip:{ip_address}"
-        redis_client.setex(key, duration, "1")
+    block_ips([ip_address], duration)
 
 def is_ip_blocked(ip_address):
     """檢查 IP 是否被封鎖
@@ -102,14 +322,15 @@ def is_ip_blocked(ip_address):
     Returns:
         bool: 是否被封鎖
     """
-    redis_client = get_redis_client()
-    if redis_client:
-        key = f"blocked_ip:{ip_address}"
-        return bool(redis_client.exists(key))
-    return False
+    sync_blocklist()
+    return _is_blocked_locally(ip_address, time.monotonic())
 
 def check_ip_block():
-    """檢查 IP 封鎖的中間件"""
+    """檢查 IP 封鎖的中間件
+
+    客戶端 IP 取自 request.remote_addr；位於反向代理之後時，
+    需由 ProxyFix（PROXY_FIX_X_FOR）改寫為 X-Forwarded-For 中的實際來源。
+    """
     def middleware():
         ip = get_remote_address()
         if is_ip_blocked(ip):
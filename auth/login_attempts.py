@@ -0,0 +1,58 @@
+"""登入失敗計數模組
+
+此模組把登入失敗次數存放在速率限制器使用的存儲（Redis 或 /dev/shm 共享記憶體），
+以原子遞增累計，資料庫只在鎖定帳戶或成功登入重置等狀態轉換時才寫入，
+暴力破解時登入頁面不會變成每個請求一次的資料庫寫入。
+存儲無法使用，或只是單一進程內的 memory:// 存儲時，各函式回傳 None，由呼叫端改為直接寫入資料庫：
+進程內的計數不會在工作進程間共用，進程重啟後也會遺失，鎖定門檻會失效。
+"""
+from flask import current_app
+from limits.storage import MemoryStorage
+
+KEY_PREFIX = 'catfeed/login_failures/'
+
+def _get_storage():
+    for limiter in current_app.extensions.get('limiter', ()):
+        if isinstance(limiter.storage, MemoryStorage):
+            return None
+        return limiter.storage
+    return None
+
+def _key(admin_id):
+    return f"{KEY_PREFIX}{admin_id}"
+
+def record_failure(admin_id):
+    """原子遞增帳號的失敗次數
+
+    Returns:
+        int: 尚未寫入資料庫的失敗次數；存儲無法使用時為 None
+    """
+    storage = _get_storage()
+    if storage is None:
+        return None
+    try:
+        return storage.incr(_key(admin_id), current_app.config.get('LOGIN_FAILURE_TTL', 86400))
+    except Exception as e:
+        current_app.logger.warning(f"無法記錄登入失敗次數: {str(e)}")
+        return None
+
+def pending_failures(admin_id):
+    """取得尚未寫入資料庫的失敗次數，存儲無法使用時為 None"""
+    storage = _get_storage()
+    if storage is None:
+        return None
+    try:
+        return storage.get(_key(admin_id))
+    except Exception as e:
+        current_app.logger.warning(f"無法讀取登入失敗次數: {str(e)}")
+        return None
+
+def clear_failures(admin_id):
+    """清除尚未寫入資料庫的失敗次數（已寫入資料庫或登入成功後呼叫）"""
+    storage = _get_storage()
+    if storage is None:
+        return
+    try:
+        storage.clear(_key(admin_id))
+    except Exception as e:
+        current_app.logger.warning(f"無法清除登入失敗次數: {str(e)}")
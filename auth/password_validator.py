@@ -1,11 +1,82 @@
 import re
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, TimeoutError as FutureTimeoutError, wait
 from datetime import datetime, timedelta
+import multiprocessing
+import os
+from flask import current_app, has_app_context
+from werkzeug.security import check_password_hash, generate_password_hash
 import zxcvbn
 
+# zxcvbn 的耗時隨長度超線性成長（64 字元約 30ms，128 字元約 200ms），只評分前段字元；
+# 額外的字元只會讓密碼更難猜，前段通過評分即可視為通過
+SCORE_MAX_LENGTH = 64
+
+# 評分設定，由 init_password_scorer 依應用程式設定更新
+# processes 為 0 時在目前進程評分；大於 0 時交由進程池評分，並以 timeout 限制等待時間
+_scorer = {'processes': 0, 'timeout': 2.0, 'pid': None, 'pool': None}
+
+def warm_up_scorer():
+    """執行一次評分，讓 zxcvbn 第一次呼叫的初始化成本不落在請求上"""
+    zxcvbn.zxcvbn('warm-up-Passw0rd!')
+
+def score_password(password, user_inputs):
+    """以 zxcvbn 評分（進程池的工作函式，只回傳需要的欄位）"""
+    result = zxcvbn.zxcvbn(password[:SCORE_MAX_LENGTH], user_inputs)
+    return result['score'], result['feedback']['warning'], result['feedback']['suggestions']
+
+def init_password_scorer(app):
+    """依應用程式設定初始化密碼評分方式"""
+    _scorer['processes'] = app.config.get('PASSWORD_SCORER_PROCESSES', 0)
+    _scorer['timeout'] = app.config.get('PASSWORD_SCORER_TIMEOUT', 2.0)
+
+def _get_pool():
+    # 進程池不跨 fork 共用；以 spawn 啟動，避免複製工作進程中的執行緒及 gevent 狀態
+    pid = os.getpid()
+    if _scorer['pid'] != pid:
+        _scorer['pool'] = ProcessPoolExecutor(
+            max_workers=_scorer['processes'],
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=warm_up_scorer
+        )
+        _scorer['pid'] = pid
+    return _scorer['pool']
+
+def _score(password, user_inputs):
+    if not _scorer['processes']:
+        return score_password(password, user_inputs)
+    future = _get_pool().submit(score_password, password, user_inputs)
+    try:
+        return future.result(timeout=_scorer['timeout'])
+    except FutureTimeoutError:
+        future.cancel()
+        raise TimeoutError("密碼強度檢查逾時，請稍後再試")
+
+# 密碼雜湊方法及工作因子（werkzeug 格式，例如 scrypt:32768:8:1 或 pbkdf2:sha256:600000）
+DEFAULT_HASH_METHOD = 'scrypt:32768:8:1'
+
+# 比對密碼歷史用的執行緒池（以 PID 判斷，fork 後重新建立）
+_history_pool = {'pid': None, 'pool': None}
+
+def _get_history_pool(max_workers):
+    pid = os.getpid()
+    if _history_pool['pid'] != pid:
+        executor_class = ThreadPoolExecutor
+        try:
+            from gevent import monkey
+            if monkey.is_module_patched('threading'):
+                # gevent 下 threading 已被替換為協程，改用 gevent 的原生執行緒池才能平行計算
+                from gevent.threadpool import ThreadPoolExecutor as executor_class
+        except ImportError:
+            pass
+        _history_pool['pool'] = executor_class(max_workers=max_workers)
+        _history_pool['pid'] = pid
+    return _history_pool['pool']
+
 class PasswordValidator:
     def __init__(self):
         self.min_length = 12
         self.max_length = 128
+        self.min_unique_chars = 5  # 重複字元過多的密碼不需要完整評分即可拒絕
         self.min_score = 3  # zxcvbn 評分最低要求（0-4）
         
     def validate(self, password, user_inputs=None):
@@ -28,19 +99,7 @@ class PasswordValidator:
         if len(password) > self.max_length:
             return False, f"密碼長度不能超過 {self.max_length} 個字符"
             
-        # 使用 zxcvbn 檢查密碼強度
-        result = zxcvbn.zxcvbn(password, user_inputs)
-        if result['score'] < self.min_score:
-            suggestions = result['feedback']['suggestions']
-            warning = result['feedback']['warning']
-            error_msg = "密碼強度不足。"
-            if warning:
-                error_msg += f" {warning}"
-            if suggestions:
-                error_msg += f" 建議：{' '.join(suggestions)}"
-            return False, error_msg
-            
-        # 檢查基本要求
+        # 檢查基本要求（成本低，先於 zxcvbn 評分執行）
         if not re.search(r'[A-Z]', password):
             return False, "密碼必須包含至少一個大寫字母"
         if not re.search(r'[a-z]', password):
@@ -49,13 +108,34 @@ class PasswordValidator:
             return False, "密碼必須包含至少一個數字"
         if not re.search(r'[!@#$%^&*(),.?":{}|<>]', password):
             return False, "密碼必須包含至少一個特殊字符"
-            
+        if len(set(password)) < self.min_unique_chars:
+            return False, "密碼強度不足。 重複的字元太多"
+
+        # 使用 zxcvbn 檢查密碼強度
+        try:
+            score, warning, suggestions = _score(password, user_inputs)
+        except TimeoutError as e:
+            return False, str(e)
+        if score < self.min_score:
+            error_msg = "密碼強度不足。"
+            if warning:
+                error_msg += f" {warning}"
+            if suggestions:
+                error_msg += f" 建議：{' '.join(suggestions)}"
+            return False, error_msg
+
         return True, ""
 
 class PasswordPolicy:
     def __init__(self):
         self.max_age_days = 90  # 密碼最大有效期（天）
         self.history_size = 5   # 記住最近幾個密碼，防止重複使用
+        self.hash_method = (current_app.config.get('PASSWORD_HASH_METHOD', DEFAULT_HASH_METHOD)
+                            if has_app_context() else DEFAULT_HASH_METHOD)
+
+    def hash_password(self, password):
+        """依設定的工作因子產生密碼雜湊"""
+        return generate_password_hash(password, method=self.hash_method)
         
     def is_password_expired(self, last_password_change):
         """檢查密碼是否過期"""
@@ -64,6 +144,34 @@ class PasswordPolicy:
         max_age = timedelta(days=self.max_age_days)
         return datetime.utcnow() - last_password_change > max_age
         
-    def can_reuse_password(self, new_password_hash, password_history):
-        """檢查是否可以重複使用密碼"""
-        return new_password_hash not in password_history
+    def can_reuse_password(self, password, password_history):
+        """檢查是否可以重複使用密碼
+
+        雜湊含有隨機鹽值，必須以明文逐一驗證最近的雜湊。各次驗證在執行緒池中平行執行
+        （hashlib 的 KDF 計算時會釋放 GIL），任一筆相符即回傳，尚未開始的驗證會被取消。
+
+        Args:
+            password: 新密碼明文
+            password_history: 最近使用過的密碼雜湊
+
+        Returns:
+            bool: 不在歷史記錄中時為 True
+        """
+        history = [h for h in password_history[-self.history_size:] if h]
+        if not history:
+            return True
+        if len(history) == 1:
+            return not check_password_hash(history[0], password)
+
+        pool = _get_history_pool(self.history_size)
+        # 最近的密碼最可能被重複使用，先送出
+        pending = {pool.submit(check_password_hash, h, password) for h in reversed(history)}
+        try:
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                if any(future.result() for future in done):
+                    return False
+            return True
+        finally:
+            for future in pending:
+                future.cancel()
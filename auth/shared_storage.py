@@ -0,0 +1,228 @@
+"""共享記憶體速率限制存儲模組
+
+此模組提供 limits 的存儲後端，以位於 /dev/shm 的 SQLite 檔案保存計數，
+讓同一台主機上的所有 Gunicorn 工作進程共用精確的限制計數，不需要 Redis 或網路連線。
+
+使用方式：storage_uri="shm:///dev/shm/catfeed-ratelimit.db"
+"""
+from contextlib import contextmanager
+from math import floor
+import os
+import sqlite3
+import threading
+import time
+from limits.storage import Storage
+from limits.storage.base import MovingWindowSupport, SlidingWindowCounterSupport, TimestampedSlidingWindow
+
+try:
+    # gevent 會把 threading.local 換成協程區域變數，這裡需要的是真正的執行緒區域變數：
+    # 交易內沒有會切換協程的操作，同一執行緒的協程可以安全共用連線，不必每個請求重新連線
+    from gevent.monkey import get_original
+    _thread_local = get_original('threading', 'local')
+except ImportError:
+    _thread_local = threading.local
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS counters (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS events (
+    key TEXT NOT NULL,
+    ts REAL NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_events_key_ts ON events (key, ts);
+CREATE INDEX IF NOT EXISTS ix_events_expires_at ON events (expires_at);
+"""
+
+# 清除過期資料的間隔（秒）
+PURGE_INTERVAL = 60
+
+class SharedMemoryStorage(Storage, MovingWindowSupport, SlidingWindowCounterSupport, TimestampedSlidingWindow):
+    """以共享記憶體中的 SQLite 檔案實作的速率限制存儲
+
+    每個操作都在 BEGIN IMMEDIATE 交易中完成，多個進程同時存取時計數仍然精確。
+    """
+
+    STORAGE_SCHEME = ["shm"]
+
+    def __init__(self, uri=None, wrap_exceptions=False, **options):
+        self.path = uri[len("shm://"):] if uri else "/dev/shm/catfeed-ratelimit.db"
+        self.busy_timeout = int(options.pop('busy_timeout', 1000))
+        self._local = _thread_local()
+        self._last_purge = 0.0
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+        conn = self._connection()
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(events)")}
+        if columns and 'expires_at' not in columns:
+            # 舊版本建立的事件表沒有到期時間，內容只是短期計數，直接重建
+            conn.execute("DROP TABLE events")
+        conn.executescript(SCHEMA)
+
+    @property
+    def base_exceptions(self):
+        return sqlite3.Error
+
+    def _connection(self):
+        # 連線不跨執行緒或 fork 共用
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+            conn.execute(f"PRAGMA busy_timeout = {self.busy_timeout}")
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = OFF")  # 檔案位於記憶體中，不需要寫入磁碟
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        """取得寫入鎖的交易，確保讀取與更新之間不會被其他進程插入"""
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def _purge_expired(self, conn, now):
+        """每個寫入操作都會呼叫，實際清除最多每 PURGE_INTERVAL 秒一次"""
+        if now - self._last_purge < PURGE_INTERVAL:
+            return
+        self._last_purge = now
+        conn.execute("DELETE FROM counters WHERE expires_at <= ?", (now,))
+        # 事件在寫入時記錄所屬窗口的到期時間，不再出現的鍵也會被清除
+        conn.execute("DELETE FROM events WHERE expires_at <= ?", (now,))
+
+    def _incr(self, conn, key, expiry, amount, now):
+        conn.execute(
+            """
+            INSERT INTO counters (key, value, expires_at) VALUES (?, ?, ?)
+            ON CONFLICT (key) DO UPDATE SET
+                value = CASE WHEN counters.expires_at <= ? THEN excluded.value ELSE counters.value + excluded.value END,
+                expires_at = CASE WHEN counters.expires_at <= ? THEN excluded.expires_at ELSE counters.expires_at END
+            """,
+            (key, amount, now + expiry, now, now)
+        )
+        return conn.execute("SELECT value FROM counters WHERE key = ?", (key,)).fetchone()[0]
+
+    def _get(self, conn, key, now):
+        row = conn.execute(
+            "SELECT value FROM counters WHERE key = ? AND expires_at > ?", (key, now)
+        ).fetchone()
+        return row[0] if row else 0
+
+    def incr(self, key, expiry, amount=1):
+        now = time.time()
+        with self._transaction() as conn:
+            self._purge_expired(conn, now)
+            return self._incr(conn, key, expiry, amount, now)
+
+    def decr(self, key, amount=1):
+        now = time.time()
+        with self._transaction() as conn:
+            self._purge_expired(conn, now)
+            conn.execute(
+                "UPDATE counters SET value = MAX(value - ?, 0) WHERE key = ? AND expires_at > ?",
+                (amount, key, now)
+            )
+            return self._get(conn, key, now)
+
+    def get(self, key):
+        return self._get(self._connection(), key, time.time())
+
+    def get_expiry(self, key):
+        now = time.time()
+        row = self._connection().execute(
+            "SELECT expires_at FROM counters WHERE key = ? AND expires_at > ?", (key, now)
+        ).fetchone()
+        return row[0] if row else now
+
+    def expirations(self, prefix):
+        """以 prefix 開頭且未過期的計數鍵及其到期時間（epoch 秒），供批次同步使用"""
+        now = time.time()
+        rows = self._connection().execute(
+            "SELECT key, expires_at FROM counters WHERE key >= ? AND key < ? AND expires_at > ?",
+            (prefix, prefix + '\uffff', now)
+        )
+        return dict(rows)
+
+    def check(self):
+        try:
+            self._connection().execute("SELECT 1")
+            return True
+        except sqlite3.Error:
+            return False
+
+    def reset(self):
+        with self._transaction() as conn:
+            count = conn.execute("SELECT (SELECT COUNT(*) FROM counters) + (SELECT COUNT(*) FROM events)").fetchone()[0]
+            conn.execute("DELETE FROM counters")
+            conn.execute("DELETE FROM events")
+        return count
+
+    def clear(self, key):
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM counters WHERE key = ?", (key,))
+            conn.execute("DELETE FROM events WHERE key = ?", (key,))
+
+    # 移動窗口（moving-window）
+    def acquire_entry(self, key, limit, expiry, amount=1):
+        if amount > limit:
+            return False
+        now = time.time()
+        with self._transaction() as conn:
+            self._purge_expired(conn, now)
+            conn.execute("DELETE FROM events WHERE key = ? AND ts <= ?", (key, now - expiry))
+            count = conn.execute("SELECT COUNT(*) FROM events WHERE key = ?", (key,)).fetchone()[0]
+            if count + amount > limit:
+                return False
+            conn.executemany(
+                "INSERT INTO events (key, ts, expires_at) VALUES (?, ?, ?)", [(key, now, now + expiry)] * amount
+            )
+            return True
+
+    def get_moving_window(self, key, limit, expiry):
+        now = time.time()
+        oldest, count = self._connection().execute(
+            "SELECT MIN(ts), COUNT(*) FROM events WHERE key = ? AND ts > ?", (key, now - expiry)
+        ).fetchone()
+        return (oldest, count) if count else (now, 0)
+
+    # 滑動窗口計數（sliding-window-counter）
+    def _sliding_window_info(self, conn, key, expiry, now):
+        previous_key, current_key = self.sliding_window_keys(key, expiry, now)
+        previous_count = self._get(conn, previous_key, now)
+        current_count = self._get(conn, current_key, now)
+        if previous_count == 0:
+            previous_ttl = 0.0
+        else:
+            previous_ttl = (1 - (((now - expiry) / expiry) % 1)) * expiry
+        current_ttl = (1 - ((now / expiry) % 1)) * expiry + expiry
+        return previous_count, previous_ttl, current_count, current_ttl
+
+    def acquire_sliding_window_entry(self, key, limit, expiry, amount=1):
+        if amount > limit:
+            return False
+        now = time.time()
+        with self._transaction() as conn:
+            self._purge_expired(conn, now)
+            previous_count, previous_ttl, current_count, _ = self._sliding_window_info(conn, key, expiry, now)
+            # 在同一交易中檢查並遞增，不會有多個進程同時通過的競爭情況
+            if floor(previous_count * previous_ttl / expiry + current_count) + amount > limit:
+                return False
+            _, current_key = self.sliding_window_keys(key, expiry, now)
+            self._incr(conn, current_key, 2 * expiry, amount, now)
+            return True
+
+    def get_sliding_window(self, key, expiry):
+        return self._sliding_window_info(self._connection(), key, expiry, time.time())
+
+    def clear_sliding_window(self, key, expiry):
+        previous_key, current_key = self.sliding_window_keys(key, expiry, time.time())
+        self.clear(previous_key)
+        self.clear(current_key)
@@ -0,0 +1,88 @@
+"""攝取量統計 API 基準測試
+
+以 bench/generate_data.py 在臨時資料庫產生多年份的資料後，測量 /api/analytics/intake 各區間的回應時間，
+並與逐筆載入 FeedingRecord 物件、以 Python 依本地日期及食物種類加總的做法比較，同時確認兩者的結果一致。
+
+使用方式：
+    python bench/analytics_intake.py
+    python bench/analytics_intake.py --years 10 --iterations 50
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def timed(func, iterations):
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        result = func()
+        samples.append(time.perf_counter() - start)
+    return result, {
+        'median_ms': round(statistics.median(samples) * 1000, 2),
+        'max_ms': round(max(samples) * 1000, 2),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='測量攝取量統計 API 的回應時間')
+    parser.add_argument('--years', type=float, default=5)
+    parser.add_argument('--iterations', type=int, default=20)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='catfeed-bench-')
+    os.environ.update(
+        FLASK_SECRET_KEY='bench',
+        DATABASE_URL=f'sqlite:///{workdir}/catfeed.db',
+        UPLOAD_FOLDER=os.path.join(workdir, 'uploads'),
+        RATELIMIT_ENABLED='false',
+        METRICS_ENABLED='false',
+    )
+    try:
+        generated = json.loads(subprocess.run(
+            [sys.executable, os.path.join(ROOT, 'bench', 'generate_data.py'), '--years', str(args.years), '--images', '1'],
+            cwd=ROOT, check=True, capture_output=True, text=True
+        ).stdout)
+        sys.path.insert(0, ROOT)
+        import app as catfeed
+
+        start, end = generated['start'], generated['end']
+        client = catfeed.app.test_client()
+        report = {'feeding_records': generated['feeding_records'], 'days': None, 'api': {}}
+        for query in ('bucket=day', 'bucket=week', 'bucket=month', 'bucket=day&max_points=365'):
+            url = f'/api/analytics/intake?start={start}&end={end}&{query}'
+            client.get(url)
+            response, stats = timed(lambda: client.get(url), args.iterations)
+            assert response.status_code == 200, response.status_code
+            report['api'][query] = dict(stats, points=len(response.get_json()['series']['start']))
+        daily = client.get(f'/api/analytics/intake?start={start}&end={end}&bucket=day').get_json()
+        report['days'] = len(daily['series']['start'])
+
+        def per_row():
+            amounts = defaultdict(float)
+            with catfeed.app.app_context():
+                local_tz = catfeed.get_current_timezone()
+                for record in catfeed.FeedingRecord.query.all():
+                    local_date = catfeed.convert_to_local_time(record.timestamp, local_tz).date().isoformat()
+                    amounts[(local_date, record.food_type)] += record.amount
+            return amounts
+
+        amounts, report['per_row_orm'] = timed(per_row, max(1, args.iterations // 5))
+        for food_type, series in daily['series']['amount_by_food_type'].items():
+            for day, amount in zip(daily['series']['start'], series):
+                assert abs(amount - round(amounts.get((day, food_type), 0.0), 1)) < 0.05, (day, food_type)
+        report['results_match'] = True
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+if __name__ == '__main__':
+    main()
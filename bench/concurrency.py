@@ -0,0 +1,155 @@
+"""並行連線容量基準測試
+
+以指定的工作模式啟動 Gunicorn，先建立一批慢速客戶端（緩慢讀取大型照片檔案，佔住連線），
+再同時發出快速請求，統計在慢速客戶端存在時仍能完成的快速請求數量與延遲。
+
+使用方式：
+    python bench/concurrency.py --worker-class sync
+    python bench/concurrency.py --worker-class gevent --slow-clients 200
+"""
+import argparse
+import http.client
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def wait_ready(port, deadline):
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            conn.request('GET', '/')
+            conn.getresponse().read()
+            return True
+        except OSError:
+            time.sleep(0.2)
+    return False
+
+def slow_client(port, path, hold, stop, held):
+    """以極小的接收緩衝區緩慢讀取檔案，模擬慢速網路的下載"""
+    sock = socket.socket()
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+    try:
+        sock.connect(('127.0.0.1', port))
+        sock.sendall(f'GET {path} HTTP/1.1\r\nHost: bench\r\n\r\n'.encode())
+        sock.settimeout(hold)
+        first = sock.recv(1024)
+        if first:
+            held.append(1)
+        end = time.monotonic() + hold
+        while not stop.is_set() and time.monotonic() < end:
+            sock.recv(1024)
+            time.sleep(0.1)
+    except OSError:
+        pass
+    finally:
+        sock.close()
+
+def fast_request(port, timeout):
+    start = time.perf_counter()
+    try:
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=timeout)
+        conn.request('GET', '/')
+        ok = conn.getresponse().status == 200
+        conn.close()
+    except OSError:
+        ok = False
+    return ok, time.perf_counter() - start
+
+def percentile(values, pct):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+def run(args):
+    workdir = tempfile.mkdtemp(prefix='catfeed-bench-')
+    uploads = os.path.join(workdir, 'uploads')
+    os.makedirs(uploads)
+    with open(os.path.join(uploads, 'large.bin'), 'wb') as f:
+        f.write(os.urandom(args.file_size * 1024 * 1024))
+
+    env = dict(
+        os.environ,
+        FLASK_SECRET_KEY='bench',
+        DATABASE_URL=f'sqlite:///{workdir}/catfeed.db',
+        UPLOAD_FOLDER=uploads,
+        RATELIMIT_ENABLED='false',
+        GUNICORN_WORKER_CLASS=args.worker_class,
+        GUNICORN_WORKERS=str(args.workers),
+    )
+    # 先建立資料表及預設資料
+    subprocess.run([sys.executable, '-m', 'flask', '--app', 'app', 'init'], cwd=ROOT, env=env, check=True, stdout=subprocess.DEVNULL)
+    port = free_port()
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', '-b', f'127.0.0.1:{port}',
+         '--access-logfile', '/dev/null', '--error-logfile', os.path.join(workdir, 'error.log'), 'app:app'],
+        cwd=ROOT, env=env
+    )
+    try:
+        if not wait_ready(port, time.monotonic() + 30):
+            raise RuntimeError('Gunicorn 未能啟動，請查看 ' + os.path.join(workdir, 'error.log'))
+
+        stop = threading.Event()
+        held = []
+        slow_threads = [
+            threading.Thread(target=slow_client, args=(port, '/uploads/large.bin', args.hold, stop, held), daemon=True)
+            for _ in range(args.slow_clients)
+        ]
+        for t in slow_threads:
+            t.start()
+        time.sleep(1)
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            results = list(pool.map(lambda _: fast_request(port, args.timeout), range(args.requests)))
+        elapsed = time.perf_counter() - start
+        stop.set()
+
+        latencies = [latency for ok, latency in results if ok]
+        return {
+            'worker_class': args.worker_class,
+            'workers': args.workers,
+            'slow_clients': args.slow_clients,
+            'slow_clients_served': len(held),
+            'requests': args.requests,
+            'succeeded': len(latencies),
+            'failed': args.requests - len(latencies),
+            'elapsed': round(elapsed, 3),
+            'p50_ms': round(percentile(latencies, 50) * 1000, 1) if latencies else None,
+            'p95_ms': round(percentile(latencies, 95) * 1000, 1) if latencies else None,
+            'max_ms': round(max(latencies) * 1000, 1) if latencies else None,
+        }
+    finally:
+        server.terminate()
+        server.wait(10)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+def main():
+    parser = argparse.ArgumentParser(description='比較不同 Gunicorn 工作模式的並行連線容量')
+    parser.add_argument('--worker-class', default='sync', choices=['sync', 'gevent'])
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--slow-clients', type=int, default=50, help='佔住連線的慢速客戶端數量')
+    parser.add_argument('--hold', type=float, default=15, help='慢速客戶端保持連線的秒數')
+    parser.add_argument('--file-size', type=int, default=32, help='慢速客戶端下載的檔案大小（MB）')
+    parser.add_argument('--requests', type=int, default=200, help='快速請求總數')
+    parser.add_argument('--concurrency', type=int, default=20)
+    parser.add_argument('--timeout', type=float, default=5, help='快速請求逾時秒數')
+    args = parser.parse_args()
+    print(json.dumps(run(args), ensure_ascii=False, indent=2))
+
+if __name__ == '__main__':
+    main()
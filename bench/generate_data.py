@@ -0,0 +1,162 @@
+"""負載測試用的合成資料產生器
+
+在 DATABASE_URL 指定的資料庫（預設 instance/catfeed.db）中建立 N 年份的餵食記錄、照片及生平記事，
+照片檔案以 Pillow 繪製後寫入 UPLOAD_FOLDER 並產生衍生圖片，多筆照片記錄共用同一批檔案
+（與內容定址儲存相同）。相同的 --seed 與 --end 會產生相同的資料。
+會直接寫入資料庫及上傳目錄，請勿對正式資料執行。
+
+使用方式：
+    python bench/generate_data.py --years 3
+    DATABASE_URL=sqlite:////tmp/bench.db UPLOAD_FOLDER=/tmp/bench-uploads python bench/generate_data.py --years 5 --reset
+"""
+import argparse
+import io
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+FOOD_TYPES = {
+    # 食物種類: (出現權重, 最小份量, 最大份量)
+    '乾糧': (45, 5, 25),
+    '貓罐頭': (30, 40, 85),
+    '貓條': (15, 10, 15),
+    '其他': (10, 5, 30),
+}
+FEEDERS = ['爸爸', '媽媽', '姐姐', '弟弟', '室友', '保母']
+PHOTOGRAPHERS = ['爸爸', '媽媽', '姐姐', '室友']
+NOTES = [None, None, None, '吃很快', '剩一點', '挑食', '吃完又討']
+BIOGRAPHY_TEXT = '今天在窗邊曬太陽，追了一下午的逗貓棒，晚餐後在沙發上睡著了。'
+
+def render_image(rng, width, height):
+    """繪製一張帶有雜訊的 JPEG，讓檔案大小及壓縮成本接近真實照片"""
+    from PIL import Image, ImageDraw
+    # 雜訊取自 rng（而非 Image.effect_noise），相同的種子產生相同的檔案
+    image = Image.frombytes('L', (width, height), rng.randbytes(width * height)).convert('RGB')
+    overlay = Image.new('RGB', (width, height), tuple(rng.randint(0, 255) for _ in range(3)))
+    image = Image.blend(image, overlay, 0.6)
+    draw = ImageDraw.Draw(image)
+    for _ in range(12):
+        x, y = rng.randint(0, width), rng.randint(0, height)
+        r = rng.randint(20, min(width, height) // 4)
+        draw.ellipse((x - r, y - r, x + r, y + r), fill=tuple(rng.randint(0, 255) for _ in range(3)))
+    buffer = io.BytesIO()
+    image.save(buffer, 'JPEG', quality=85)
+    buffer.seek(0)
+    return buffer
+
+def feeding_rows(rng, start, end, per_day, calculate_calories):
+    names = list(FOOD_TYPES)
+    weights = [FOOD_TYPES[name][0] for name in names]
+    day = start
+    while day < end:
+        for _ in range(rng.randint(max(1, per_day - 2), per_day + 2)):
+            food_type = rng.choices(names, weights)[0]
+            _, low, high = FOOD_TYPES[food_type]
+            amount = float(rng.randint(low, high))
+            yield {
+                'timestamp': day + timedelta(seconds=rng.randrange(86400)),
+                'food_type': food_type,
+                'amount': amount,
+                'unit': '克',
+                'calories': calculate_calories(food_type, amount),
+                'notes': rng.choice(NOTES),
+                'feeder_nickname': rng.choice(FEEDERS),
+            }
+        day += timedelta(days=1)
+
+def main():
+    parser = argparse.ArgumentParser(description='產生負載測試用的合成資料')
+    parser.add_argument('--years', type=float, default=3)
+    parser.add_argument('--end', default=None, help='資料的最後一天（YYYY-MM-DD），預設為今天（UTC）')
+    parser.add_argument('--feedings-per-day', type=int, default=6)
+    parser.add_argument('--photos-per-week', type=int, default=5)
+    parser.add_argument('--biographies-per-month', type=int, default=2)
+    parser.add_argument('--images', type=int, default=24, help='實際繪製的照片檔案數，照片記錄輪流使用')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--reset', action='store_true', help='先刪除現有的餵食記錄、照片及生平記事')
+    args = parser.parse_args()
+
+    end = datetime.strptime(args.end, '%Y-%m-%d') if args.end else datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    end += timedelta(days=1)
+    start = end - timedelta(days=round(args.years * 365))
+    rng = random.Random(args.seed)
+
+    os.chdir(ROOT)
+    sys.path.insert(0, ROOT)
+    import app as catfeed
+    from media import generate_derivatives, store_stream
+
+    began = time.perf_counter()
+    with catfeed.app.app_context():
+        catfeed.init_db()
+        db = catfeed.db
+        if args.reset:
+            for model in (catfeed.FeedingRecord, catfeed.DailyIntake, catfeed.Photo, catfeed.Biography):
+                db.session.query(model).delete()
+            db.session.commit()
+
+        rows = list(feeding_rows(rng, start, end, args.feedings_per_day, catfeed.calculate_calories))
+        catfeed.import_feeding_records(rows)
+
+        upload_folder = catfeed.app.config['UPLOAD_FOLDER']
+        os.makedirs(upload_folder, exist_ok=True)
+        images = []
+        for _ in range(args.images):
+            width, height = rng.choice([(1600, 1200), (1200, 1600), (2048, 1536)])
+            filename, digest = store_stream(render_image(rng, width, height), upload_folder, 'jpg')
+            images.append((filename, digest, generate_derivatives(upload_folder, filename)))
+
+        photos = []
+        weeks = (end - start).days // 7
+        for week in range(weeks):
+            for _ in range(args.photos_per_week):
+                filename, digest, dimensions = rng.choice(images)
+                date_taken = start + timedelta(weeks=week, seconds=rng.randrange(7 * 86400))
+                photos.append(dict(
+                    dimensions,
+                    filename=filename,
+                    content_hash=digest,
+                    original_filename=f"IMG_{rng.randrange(10000):04d}.jpg",
+                    date_taken=date_taken,
+                    description=rng.choice(['', '午睡', '曬太陽', '討罐罐', '巡視領地']),
+                    photographer=rng.choice(PHOTOGRAPHERS),
+                    upload_date=date_taken + timedelta(hours=rng.randint(1, 72)),
+                    is_approved=rng.random() < 0.9,
+                    has_derivatives=True,
+                    processing_status='done',
+                ))
+        db.session.execute(catfeed.Photo.__table__.insert(), photos)
+
+        biographies = []
+        for month in range(round(args.years * 12)):
+            for _ in range(args.biographies_per_month):
+                date = start + timedelta(days=month * 30 + rng.randrange(30))
+                biographies.append({
+                    'date': date,
+                    'content': BIOGRAPHY_TEXT * rng.randint(1, 4),
+                    'created_at': date,
+                    'updated_at': date,
+                })
+        db.session.execute(catfeed.Biography.__table__.insert(), biographies)
+        db.session.commit()
+        catfeed.page_cache.bump_version()
+
+    print(json.dumps({
+        'database': catfeed.app.config['SQLALCHEMY_DATABASE_URI'],
+        'upload_folder': upload_folder,
+        'start': start.date().isoformat(),
+        'end': (end - timedelta(days=1)).date().isoformat(),
+        'feeding_records': len(rows),
+        'photos': len(photos),
+        'image_files': len(images),
+        'biographies': len(biographies),
+        'seconds': round(time.perf_counter() - began, 1),
+    }, ensure_ascii=False, indent=2))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""速率限制裝飾器的每請求成本基準測試
+
+在臨時的應用程式上註冊相同的測試路由，分別不加限制、使用 Flask-Limiter 的 limiter.limit，
+以及使用 rate_limit_by_ip / rate_limit_by_user，比較每個請求的平均耗時。
+被裝飾的函式每個請求只執行一次由 tests/test_limiter.py 驗證。
+
+使用方式：
+    python bench/limiter_overhead.py
+    python bench/limiter_overhead.py --requests 5000 --storage memory://
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LIMIT = '1000000 per minute'
+
+def main():
+    parser = argparse.ArgumentParser(description='測量速率限制裝飾器的每請求成本')
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--storage', default=None, help='RATELIMIT_STORAGE_URI，預設為 /dev/shm 的共享存儲')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='catfeed-bench-')
+    os.environ.update(
+        FLASK_SECRET_KEY='bench',
+        DATABASE_URL=f'sqlite:///{workdir}/catfeed.db',
+        UPLOAD_FOLDER=os.path.join(workdir, 'uploads'),
+        RATELIMIT_STORAGE_URI=args.storage or f'shm://{workdir}/ratelimit.db',
+    )
+    sys.path.insert(0, ROOT)
+    try:
+        import app as catfeed
+        from auth.limiter import rate_limit_by_ip, rate_limit_by_user
+
+        def make_view(name):
+            def view():
+                return 'ok'
+            view.__name__ = f'bench_{name}'
+            return view
+
+        variants = {
+            'none': lambda f: f,
+            'limiter.limit': catfeed.limiter.limit(LIMIT),
+            'rate_limit_by_ip': rate_limit_by_ip(LIMIT),
+            'rate_limit_by_user': rate_limit_by_user(LIMIT),
+        }
+        for name, decorate in variants.items():
+            catfeed.app.add_url_rule(f'/bench/{name}', f'bench_{name}', decorate(make_view(name)))
+        # 預設限制（default_limits）會套用到未加 limiter.limit 的路由，這裡只比較各裝飾器本身
+        for name in variants:
+            if name != 'limiter.limit':
+                catfeed.limiter.exempt(catfeed.app.view_functions[f'bench_{name}'])
+
+        client = catfeed.app.test_client()
+        report = {}
+        for name in variants:
+            client.get(f'/bench/{name}')  # 預熱
+            start = time.perf_counter()
+            for _ in range(args.requests):
+                assert client.get(f'/bench/{name}').status_code == 200
+            elapsed = time.perf_counter() - start
+            report[name] = {'us_per_request': round(elapsed / args.requests * 1e6, 1)}
+        for name in variants:
+            report[name]['overhead_us'] = round(report[name]['us_per_request'] - report['none']['us_per_request'], 1)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(json.dumps({'requests': args.requests, 'results': report}, ensure_ascii=False, indent=2))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,283 @@
+"""HTTP 負載測試
+
+在本機啟動 Gunicorn（或以 --url 指定已啟動的伺服器），以固定數量的並行客戶端依加權比例請求
+首頁、關於頁面、生平記事 API、新增餵食記錄、管理員登入及照片檔案，統計每個路由的吞吐量與
+p50/p95/p99 延遲，結果以 JSON 寫入 bench/results/，可用 bench/report.py 比較不同提交的結果。
+
+伺服器使用目前的 DATABASE_URL 與 UPLOAD_FOLDER（請先以 bench/generate_data.py 產生資料）。
+預設先複製資料庫到暫存目錄再啟動，/add_record 寫入的記錄不會留在原始資料庫，每次執行的起點相同。
+
+使用方式：
+    python bench/generate_data.py --years 3
+    python bench/load.py --duration 30 --concurrency 16
+    python bench/load.py --worker-class gevent --mix "/=50,/uploads=50" --output bench/results/gevent.json
+"""
+import argparse
+import http.client
+import json
+import os
+import platform
+import random
+import shutil
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from urllib.parse import urlencode, urlsplit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_MIX = '/=35,/about=15,/api/biography=10,/uploads=25,/add_record=10,/admin/login=5'
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def parse_mix(value):
+    mix = {}
+    for part in value.split(','):
+        route, _, weight = part.partition('=')
+        if route not in ROUTES:
+            raise argparse.ArgumentTypeError(f'未知的路由 {route}，可用：{", ".join(ROUTES)}')
+        mix[route] = float(weight or 1)
+    return mix
+
+def git_revision():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, check=True,
+                                capture_output=True, text=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=ROOT,
+                               capture_output=True, text=True).stdout.strip()
+        return commit + ('-dirty' if dirty else '')
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+def resolve_data():
+    """以應用程式的設定找出資料庫及上傳目錄的實際位置"""
+    sys.path.insert(0, ROOT)
+    os.chdir(ROOT)
+    import app as catfeed
+    with catfeed.app.app_context():
+        database = catfeed.db.engine.url.database
+    return database, os.path.abspath(catfeed.app.config['UPLOAD_FOLDER'])
+
+def load_targets(database):
+    """讀取已審核照片的原圖及衍生圖片檔名，以及資料量"""
+    from media import DERIVATIVE_SIZES, derivative_filename
+    conn = sqlite3.connect(f'file:{database}?mode=ro', uri=True)
+    try:
+        filenames = [row[0] for row in conn.execute('SELECT DISTINCT filename FROM photo WHERE is_approved = 1')]
+        counts = {table: conn.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+                  for table in ('feeding_record', 'photo', 'biography')}
+    finally:
+        conn.close()
+    uploads = []
+    for filename in filenames:
+        uploads.append(filename)
+        uploads.extend(derivative_filename(filename, size, 'webp') for size in DERIVATIVE_SIZES)
+    return uploads, counts
+
+def request_index(conn, rng, ctx):
+    conn.request('GET', '/')
+
+def request_about(conn, rng, ctx):
+    conn.request('GET', '/about')
+
+def request_biography(conn, rng, ctx):
+    conn.request('GET', '/api/biography')
+
+def request_upload(conn, rng, ctx):
+    conn.request('GET', '/uploads/' + rng.choice(ctx['uploads']))
+
+def request_add_record(conn, rng, ctx):
+    body = urlencode({
+        'food_type': rng.choice(['乾糧', '貓罐頭', '貓條']),
+        'amount': rng.randint(5, 60),
+        'notes': '',
+        'feeder_nickname': 'bench',
+    })
+    conn.request('POST', '/add_record', body, {'Content-Type': 'application/x-www-form-urlencoded'})
+
+def request_login(conn, rng, ctx):
+    body = urlencode({'username': ctx['username'], 'password': ctx['password']})
+    conn.request('POST', '/admin/login', body, {'Content-Type': 'application/x-www-form-urlencoded'})
+
+ROUTES = {
+    '/': request_index,
+    '/about': request_about,
+    '/api/biography': request_biography,
+    '/uploads': request_upload,
+    '/add_record': request_add_record,
+    '/admin/login': request_login,
+}
+
+def client_loop(index, args, ctx, measure_start, deadline, results):
+    rng = random.Random(args.seed + index)
+    routes = list(ctx['mix'])
+    weights = [ctx['mix'][route] for route in routes]
+    samples = []
+    while True:
+        now = time.monotonic()
+        if now >= deadline:
+            break
+        route = rng.choices(routes, weights)[0]
+        conn = http.client.HTTPConnection(ctx['host'], ctx['port'], timeout=args.timeout)
+        began = time.perf_counter()
+        try:
+            ROUTES[route](conn, rng, ctx)
+            response = conn.getresponse()
+            response.read()
+            status = response.status
+        except (OSError, http.client.HTTPException):
+            status = 0
+        finally:
+            conn.close()
+        if now >= measure_start:
+            samples.append((route, time.perf_counter() - began, status))
+    results[index] = samples
+
+def percentile(values, pct):
+    if not values:
+        return None
+    return round(values[min(len(values) - 1, max(0, int(len(values) * pct / 100 + 0.5) - 1))] * 1000, 2)
+
+def summarize(samples, duration):
+    latencies = sorted(latency for _, latency, _ in samples)
+    statuses = {}
+    for _, _, status in samples:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    return {
+        'requests': len(samples),
+        'errors': sum(1 for _, _, status in samples if status == 0 or status >= 400),
+        'status': statuses,
+        'rps': round(len(samples) / duration, 1),
+        'p50_ms': percentile(latencies, 50),
+        'p95_ms': percentile(latencies, 95),
+        'p99_ms': percentile(latencies, 99),
+        'max_ms': round(latencies[-1] * 1000, 2) if latencies else None,
+    }
+
+def start_server(args, workdir, database, upload_folder, port):
+    env = dict(
+        os.environ,
+        DATABASE_URL=f'sqlite:///{database}',
+        UPLOAD_FOLDER=upload_folder,
+        METRICS_DIR=os.path.join(workdir, 'metrics'),
+        RATELIMIT_ENABLED='true' if args.rate_limit else 'false',
+        GUNICORN_WORKERS=str(args.workers),
+        GUNICORN_WORKER_CLASS=args.worker_class,
+    )
+    env.setdefault('FLASK_SECRET_KEY', 'bench')
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', '-b', f'127.0.0.1:{port}',
+         '--access-logfile', '/dev/null', '--error-logfile', os.path.join(workdir, 'error.log'), 'app:create_app()'],
+        cwd=ROOT, env=env
+    )
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            conn.request('GET', '/')
+            if conn.getresponse().status == 200:
+                return server
+        except OSError:
+            time.sleep(0.2)
+        finally:
+            conn.close()
+    server.terminate()
+    raise RuntimeError('Gunicorn 未能啟動，請查看 ' + os.path.join(workdir, 'error.log'))
+
+def main():
+    parser = argparse.ArgumentParser(description='以混合請求對本機伺服器施加負載並輸出各路由的延遲百分位數')
+    parser.add_argument('--duration', type=float, default=30, help='統計的秒數（不含預熱）')
+    parser.add_argument('--warmup', type=float, default=5, help='開始統計前的預熱秒數')
+    parser.add_argument('--concurrency', type=int, default=8, help='並行客戶端數量')
+    parser.add_argument('--mix', type=parse_mix, default=DEFAULT_MIX, help=f'路由權重，預設 {DEFAULT_MIX}')
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--worker-class', default='sync', choices=['sync', 'gevent'])
+    parser.add_argument('--url', help='對已啟動的伺服器施加負載，不另外啟動 Gunicorn')
+    parser.add_argument('--in-place', action='store_true', help='直接使用原始資料庫，不先複製')
+    parser.add_argument('--rate-limit', action='store_true', help='保留速率限制（預設關閉，避免請求被拒絕）')
+    parser.add_argument('--username', default='admin')
+    parser.add_argument('--password', default='catfeed2024@TW')
+    parser.add_argument('--timeout', type=float, default=30, help='單一請求的逾時秒數')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='結果檔案路徑，預設為 bench/results/<時間>-<提交>.json')
+    args = parser.parse_args()
+
+    database, upload_folder = resolve_data()
+    if not os.path.exists(database):
+        parser.error(f'找不到資料庫 {database}，請先執行 bench/generate_data.py')
+    uploads, counts = load_targets(database)
+    if '/uploads' in args.mix and not uploads:
+        parser.error('資料庫中沒有已審核的照片，請先執行 bench/generate_data.py 或從 --mix 移除 /uploads')
+
+    workdir = tempfile.mkdtemp(prefix='catfeed-bench-')
+    server = None
+    try:
+        if args.url:
+            target = urlsplit(args.url)
+            host, port = target.hostname, target.port or 80
+        else:
+            if not args.in_place:
+                # 以 backup API 複製，包含尚未寫回主檔案的 WAL 內容
+                copy = os.path.join(workdir, 'catfeed.db')
+                src, dst = sqlite3.connect(database), sqlite3.connect(copy)
+                src.backup(dst)
+                src.close()
+                dst.close()
+                database = copy
+            host, port = '127.0.0.1', free_port()
+            server = start_server(args, workdir, database, upload_folder, port)
+
+        ctx = {'host': host, 'port': port, 'mix': args.mix, 'uploads': uploads,
+               'username': args.username, 'password': args.password}
+        measure_start = time.monotonic() + args.warmup
+        deadline = measure_start + args.duration
+        results = [None] * args.concurrency
+        threads = [threading.Thread(target=client_loop, args=(i, args, ctx, measure_start, deadline, results))
+                   for i in range(args.concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(10)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    samples = [sample for client in results for sample in client]
+    revision = git_revision()
+    report = {
+        'meta': {
+            'commit': revision,
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'cpus': os.cpu_count(),
+            'target': args.url or 'gunicorn',
+            'workers': None if args.url else args.workers,
+            'worker_class': None if args.url else args.worker_class,
+            'concurrency': args.concurrency,
+            'duration': args.duration,
+            'mix': args.mix,
+            'data': counts,
+        },
+        'total': summarize(samples, args.duration),
+        'routes': {route: summarize([s for s in samples if s[0] == route], args.duration) for route in args.mix},
+    }
+
+    output = args.output or os.path.join(ROOT, 'bench', 'results',
+                                         f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{revision}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(json.dumps({'output': output, 'total': report['total'], 'routes': report['routes']},
+                     ensure_ascii=False, indent=2))
+
+if __name__ == '__main__':
+    main()
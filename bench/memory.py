@@ -0,0 +1,160 @@
+"""工作進程記憶體與重啟時間報告
+
+分別以 preload（GUNICORN_PRELOAD=true）及非 preload 模式啟動 Gunicorn，對每個工作進程發出請求後，
+從 /proc/<pid>/smaps_rollup 讀取各工作進程的 RSS、PSS（依共用程度分攤）及 USS（私有頁面），
+並測量工作進程被終止後，新工作進程可以回應請求所需的時間（max_requests 重啟的成本）。
+僅支援 Linux。
+
+使用方式：
+    python bench/memory.py
+    python bench/memory.py --workers 8 --recycles 10
+"""
+import argparse
+import http.client
+import json
+import os
+import shutil
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PATHS = ['/', '/about', '/api/biography', '/admin/login']
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def get(port, path, timeout=2):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=timeout)
+    try:
+        conn.request('GET', path)
+        return conn.getresponse().status
+    finally:
+        conn.close()
+
+def wait_ready(port, deadline):
+    while time.monotonic() < deadline:
+        try:
+            if get(port, '/') == 200:
+                return True
+        except OSError:
+            pass
+        time.sleep(0.02)
+    return False
+
+def children(pid):
+    with open(f'/proc/{pid}/task/{pid}/children') as f:
+        return [int(child) for child in f.read().split()]
+
+def memory_kb(pid):
+    """讀取 smaps_rollup，回傳 rss、pss、uss（KB）"""
+    values = {}
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2 and parts[1].isdigit():
+                values[parts[0].rstrip(':')] = int(parts[1])
+    return {
+        'rss': values.get('Rss', 0),
+        'pss': values.get('Pss', 0),
+        'uss': values.get('Private_Clean', 0) + values.get('Private_Dirty', 0),
+    }
+
+def start_server(env, workdir, port, workers, preload):
+    env = dict(env, GUNICORN_WORKERS=str(workers), GUNICORN_PRELOAD='true' if preload else 'false')
+    return subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', '-b', f'127.0.0.1:{port}',
+         '--access-logfile', '/dev/null', '--error-logfile', os.path.join(workdir, 'error.log'), 'app:create_app()'],
+        cwd=ROOT, env=env
+    )
+
+def stop_server(server):
+    server.terminate()
+    server.wait(10)
+
+def measure_memory(env, workdir, args, preload):
+    port = free_port()
+    server = start_server(env, workdir, port, args.workers, preload)
+    try:
+        if not wait_ready(port, time.monotonic() + 60):
+            raise RuntimeError('Gunicorn 未能啟動，請查看 ' + os.path.join(workdir, 'error.log'))
+        # 等待所有工作進程啟動，並讓每個工作進程都處理過各種頁面
+        deadline = time.monotonic() + 60
+        while len(children(server.pid)) < args.workers and time.monotonic() < deadline:
+            time.sleep(0.1)
+        for _ in range(args.requests):
+            for path in PATHS:
+                get(port, path)
+        samples = [memory_kb(pid) for pid in children(server.pid)]
+        return {
+            'workers': len(samples),
+            'master_rss_kb': memory_kb(server.pid)['rss'],
+            'avg_rss_kb': round(statistics.mean(s['rss'] for s in samples)),
+            'avg_pss_kb': round(statistics.mean(s['pss'] for s in samples)),
+            'avg_uss_kb': round(statistics.mean(s['uss'] for s in samples)),
+            'total_pss_kb': sum(s['pss'] for s in samples),
+        }
+    finally:
+        stop_server(server)
+
+def measure_recycle(env, workdir, args, preload):
+    """以單一工作進程執行，終止工作進程後計時到新工作進程回應請求"""
+    port = free_port()
+    server = start_server(env, workdir, port, 1, preload)
+    try:
+        if not wait_ready(port, time.monotonic() + 60):
+            raise RuntimeError('Gunicorn 未能啟動，請查看 ' + os.path.join(workdir, 'error.log'))
+        samples = []
+        for _ in range(args.recycles):
+            worker_pid = children(server.pid)[0]
+            started = time.monotonic()
+            os.kill(worker_pid, signal.SIGTERM)
+            while children(server.pid) in ([], [worker_pid]):
+                time.sleep(0.005)
+            if not wait_ready(port, started + 60):
+                raise RuntimeError('工作進程未能重新啟動')
+            samples.append(time.monotonic() - started)
+        return {
+            'median_ms': round(statistics.median(samples) * 1000, 1),
+            'max_ms': round(max(samples) * 1000, 1),
+        }
+    finally:
+        stop_server(server)
+
+def main():
+    parser = argparse.ArgumentParser(description='比較 preload 與非 preload 模式的工作進程記憶體及重啟時間')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--requests', type=int, default=50, help='每個頁面發出的請求數')
+    parser.add_argument('--recycles', type=int, default=5)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='catfeed-bench-')
+    env = dict(
+        os.environ,
+        FLASK_SECRET_KEY='bench',
+        DATABASE_URL=f'sqlite:///{workdir}/catfeed.db',
+        UPLOAD_FOLDER=os.path.join(workdir, 'uploads'),
+        RATELIMIT_ENABLED='false',
+        GUNICORN_WORKER_CLASS='sync',
+    )
+    try:
+        subprocess.run([sys.executable, '-m', 'flask', '--app', 'app', 'init'], cwd=ROOT, env=env,
+                       check=True, stdout=subprocess.DEVNULL)
+        report = {}
+        for name, preload in (('no_preload', False), ('preload', True)):
+            report[name] = {
+                'memory': measure_memory(env, workdir, args, preload),
+                'recycle': measure_recycle(env, workdir, args, preload),
+            }
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+if __name__ == '__main__':
+    main()
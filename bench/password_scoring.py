@@ -0,0 +1,95 @@
+"""密碼強度評分微基準測試
+
+測量：
+- cold：全新進程中第一次評分的耗時（含匯入 zxcvbn）
+- 各長度強密碼的完整 zxcvbn 評分與 PasswordValidator.validate（限制評分長度）的耗時
+- 明顯弱密碼在預先檢查中被拒絕的耗時
+- 進程池評分（PASSWORD_SCORER_PROCESSES）的往返耗時
+
+使用方式：
+    python bench/password_scoring.py
+    python bench/password_scoring.py --iterations 50 --processes 2
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import string
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import zxcvbn  # noqa: E402
+from auth import password_validator  # noqa: E402
+from auth.password_validator import PasswordValidator, warm_up_scorer  # noqa: E402
+
+COLD_PROBE = """
+import sys, time
+sys.path.insert(0, {root!r})
+start = time.perf_counter()
+from auth.password_validator import PasswordValidator
+PasswordValidator().validate('Cold-start-Passw0rd!')
+print(time.perf_counter() - start)
+"""
+
+WEAK_PASSWORDS = ['password1234', 'aaaaaaaaaaaaaaaa', 'Aa1!Aa1!Aa1!Aa1!', 'catfeed2024catfeed']
+
+def strong_password(length, rng):
+    alphabet = string.ascii_letters + string.digits + '!@#$%^&*'
+    while True:
+        password = ''.join(rng.choice(alphabet) for _ in range(length))
+        if (any(c.isupper() for c in password) and any(c.islower() for c in password)
+                and any(c.isdigit() for c in password) and any(c in '!@#$%^&*' for c in password)):
+            return password
+
+def timed(func, iterations):
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return {
+        'median_ms': round(statistics.median(samples) * 1000, 3),
+        'max_ms': round(max(samples) * 1000, 3),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='密碼強度評分微基準測試')
+    parser.add_argument('--iterations', type=int, default=20)
+    parser.add_argument('--processes', type=int, default=1, help='進程池模式使用的進程數')
+    args = parser.parse_args()
+    rng = random.Random(42)
+
+    cold = [float(subprocess.run([sys.executable, '-c', COLD_PROBE.format(root=ROOT)], cwd=ROOT,
+                                 check=True, capture_output=True, text=True).stdout)
+            for _ in range(3)]
+    report = {'cold_first_validate_ms': round(statistics.median(cold) * 1000, 1)}
+
+    warm_up_scorer()
+    validator = PasswordValidator()
+    report['strong'] = {}
+    for length in (12, 32, 64, 128):
+        password = strong_password(length, rng)
+        report['strong'][length] = {
+            'full_zxcvbn': timed(lambda: zxcvbn.zxcvbn(password), args.iterations),
+            'validate': timed(lambda: validator.validate(password, ['admin']), args.iterations),
+        }
+    report['weak_rejected'] = {
+        password: timed(lambda: validator.validate(password, ['admin']), args.iterations)
+        for password in WEAK_PASSWORDS
+    }
+
+    password_validator._scorer.update(processes=args.processes, timeout=5.0)
+    password = strong_password(64, rng)
+    validator.validate(password)  # 啟動進程池
+    report['process_pool_64'] = timed(lambda: validator.validate(password, ['admin']), args.iterations)
+    password_validator._scorer['pool'].shutdown()
+
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+if __name__ == '__main__':
+    main()
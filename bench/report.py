@@ -0,0 +1,78 @@
+"""負載測試結果比較
+
+讀取 bench/load.py 輸出的一個或多個 JSON 結果，逐路由列出吞吐量及 p50/p95/p99 延遲；
+多個結果時以第一個為基準，並列出其他結果相對基準的變化百分比。
+
+使用方式：
+    python bench/report.py bench/results/20240101-120000-abc1234.json
+    python bench/report.py baseline.json candidate.json --json
+"""
+import argparse
+import json
+
+COLUMNS = ['rps', 'p50_ms', 'p95_ms', 'p99_ms', 'errors']
+
+def load(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+def change(base, value):
+    if base in (None, 0) or value is None:
+        return None
+    return round((value - base) / base * 100, 1)
+
+def compare(results):
+    """以第一個結果為基準，回傳 {路由: [{欄位: 數值, 欄位_change: 變化%}, ...]}"""
+    routes = ['total'] + [route for route in results[0]['routes']]
+    for result in results[1:]:
+        routes += [route for route in result['routes'] if route not in routes]
+    table = {}
+    for route in routes:
+        rows = []
+        base = results[0]['total'] if route == 'total' else results[0]['routes'].get(route, {})
+        for result in results:
+            stats = result['total'] if route == 'total' else result['routes'].get(route, {})
+            row = {column: stats.get(column) for column in COLUMNS}
+            if result is not results[0]:
+                row.update({f'{column}_change': change(base.get(column), stats.get(column))
+                            for column in COLUMNS if column != 'errors'})
+            rows.append(row)
+        table[route] = rows
+    return table
+
+def format_value(value, delta):
+    text = '-' if value is None else f'{value:g}'
+    if delta is not None:
+        text += f' ({delta:+.1f}%)'
+    return text
+
+def main():
+    parser = argparse.ArgumentParser(description='比較負載測試結果')
+    parser.add_argument('results', nargs='+', help='bench/load.py 輸出的 JSON 檔案，第一個為基準')
+    parser.add_argument('--json', action='store_true', help='以 JSON 輸出比較結果')
+    args = parser.parse_args()
+
+    results = [load(path) for path in args.results]
+    table = compare(results)
+    if args.json:
+        print(json.dumps({
+            'runs': [dict(result['meta'], file=path) for path, result in zip(args.results, results)],
+            'routes': table,
+        }, ensure_ascii=False, indent=2))
+        return
+
+    for index, (path, result) in enumerate(zip(args.results, results)):
+        meta = result['meta']
+        print(f"[{index}] {meta['commit']} {meta['timestamp']} {meta.get('worker_class') or meta['target']} "
+              f"workers={meta.get('workers')} concurrency={meta['concurrency']} ({path})")
+    print()
+    header = f"{'route':<16}{'run':>4}" + ''.join(f'{column:>20}' for column in COLUMNS)
+    print(header)
+    print('-' * len(header))
+    for route, rows in table.items():
+        for index, row in enumerate(rows):
+            cells = ''.join(f"{format_value(row[column], row.get(f'{column}_change')):>20}" for column in COLUMNS)
+            print(f"{route if index == 0 else '':<16}{index:>4}{cells}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+"""SQLite 多進程讀寫競爭基準測試
+
+以多個進程同時新增餵食記錄（與 add_record 相同的寫入路徑）及讀取首頁歷史記錄，
+比較預設 SQLite 設定（stock）與調校後設定（tuned，WAL 等 PRAGMA）的吞吐量、延遲及 database is locked 錯誤數。
+
+使用方式：
+    python bench/sqlite_contention.py
+    python bench/sqlite_contention.py --writers 8 --readers 8 --duration 20
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROFILES = {
+    # 未調校前的行為：rollback journal、完整同步、pysqlite 預設 5 秒鎖等待
+    'stock': {
+        'SQLITE_JOURNAL_MODE': 'DELETE',
+        'SQLITE_SYNCHRONOUS': 'FULL',
+        'SQLITE_BUSY_TIMEOUT': '5000',
+        'SQLITE_MMAP_SIZE': '0',
+        'SQLITE_CACHE_SIZE': '-2000',
+    },
+    # 使用 app.py 的預設值
+    'tuned': {},
+}
+
+def base_env(workdir):
+    return {
+        'FLASK_SECRET_KEY': 'bench',
+        'DATABASE_URL': f'sqlite:///{workdir}/catfeed.db',
+        'UPLOAD_FOLDER': os.path.join(workdir, 'uploads'),
+        'RATELIMIT_STORAGE_URI': 'memory://',
+    }
+
+def worker(role, env, start, duration, results):
+    os.environ.update(env)
+    sys.path.insert(0, ROOT)
+    import app as catfeed
+    from sqlalchemy.exc import OperationalError
+
+    latencies = []
+    errors = 0
+    with catfeed.app.app_context():
+        start.wait()
+        end = time.monotonic() + duration
+        while time.monotonic() < end:
+            began = time.perf_counter()
+            try:
+                if role == 'writer':
+                    record = catfeed.FeedingRecord(food_type='乾糧', amount=5, calories=15, feeder_nickname='bench')
+                    catfeed.db.session.add(record)
+                    catfeed.db.session.flush()
+                    catfeed.update_daily_intake(record)
+                    catfeed.db.session.commit()
+                else:
+                    catfeed.get_feeding_history(limit=20)
+                    catfeed.db.session.get(catfeed.DailyIntake, catfeed.datetime.utcnow().date())
+                    catfeed.db.session.commit()
+            except OperationalError:
+                catfeed.db.session.rollback()
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - began)
+    results.put((role, latencies, errors))
+
+def percentile(values, pct):
+    if not values:
+        return None
+    return round(values[min(len(values) - 1, int(len(values) * pct / 100))] * 1000, 2)
+
+def summarize(latencies, errors, duration):
+    latencies.sort()
+    return {
+        'ops': len(latencies),
+        'ops_per_sec': round(len(latencies) / duration, 1),
+        'locked_errors': errors,
+        'p50_ms': percentile(latencies, 50),
+        'p95_ms': percentile(latencies, 95),
+        'p99_ms': percentile(latencies, 99),
+    }
+
+def run_profile(name, args):
+    workdir = tempfile.mkdtemp(prefix='catfeed-bench-')
+    env = dict(base_env(workdir), **PROFILES[name])
+    try:
+        # 先建立資料表及預設資料
+        subprocess.run([sys.executable, '-m', 'flask', '--app', 'app', 'init'], cwd=ROOT, env=dict(os.environ, **env), check=True, stdout=subprocess.DEVNULL)
+
+        ctx = multiprocessing.get_context('spawn')
+        start = ctx.Event()
+        results = ctx.Queue()
+        roles = ['writer'] * args.writers + ['reader'] * args.readers
+        processes = [ctx.Process(target=worker, args=(role, env, start, args.duration, results)) for role in roles]
+        for p in processes:
+            p.start()
+        time.sleep(args.warmup)
+        start.set()
+
+        collected = {'writer': ([], 0), 'reader': ([], 0)}
+        for _ in processes:
+            role, latencies, errors = results.get()
+            merged, total_errors = collected[role]
+            collected[role] = (merged + latencies, total_errors + errors)
+        for p in processes:
+            p.join()
+        return {role: summarize(latencies, errors, args.duration)
+                for role, (latencies, errors) in collected.items()}
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+def main():
+    parser = argparse.ArgumentParser(description='比較 SQLite 預設設定與調校設定的多進程讀寫競爭')
+    parser.add_argument('--writers', type=int, default=4)
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--duration', type=float, default=10, help='每個設定的測試秒數')
+    parser.add_argument('--warmup', type=float, default=3, help='等待所有進程載入應用程式的秒數')
+    parser.add_argument('--profile', choices=sorted(PROFILES), action='append', help='只測試指定的設定')
+    args = parser.parse_args()
+
+    report = {name: run_profile(name, args) for name in (args.profile or ['stock', 'tuned'])}
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+if __name__ == '__main__':
+    main()
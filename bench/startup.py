@@ -0,0 +1,83 @@
+"""啟動時間基準測試
+
+在全新的 Python 進程中分別測量：
+- import：匯入 app 模組（每個 Gunicorn 工作進程啟動及 max_requests 重啟時的成本）
+- init：執行一次性的 init_db()（建立資料表並以 set_password 建立管理員帳號）
+
+使用方式：
+    python bench/startup.py
+    python bench/startup.py --runs 10
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 在子進程中執行，輸出各階段耗時（秒）
+PROBE = """
+import json, sys, time
+sys.path.insert(0, {root!r})
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+timings = {{'import': imported - start}}
+if {init!r}:
+    with app.app.app_context():
+        app.init_db()
+    timings['init'] = time.perf_counter() - imported
+print(json.dumps(timings))
+"""
+
+def measure(env, init):
+    output = subprocess.run(
+        [sys.executable, '-c', PROBE.format(root=ROOT, init=init)],
+        cwd=ROOT, env=env, check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def summarize(samples):
+    return {
+        'median_ms': round(statistics.median(samples) * 1000, 1),
+        'min_ms': round(min(samples) * 1000, 1),
+        'max_ms': round(max(samples) * 1000, 1),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='測量匯入 app 模組及一次性初始化的耗時')
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='catfeed-bench-')
+    env = dict(
+        os.environ,
+        FLASK_SECRET_KEY='bench',
+        DATABASE_URL=f'sqlite:///{workdir}/catfeed.db',
+        UPLOAD_FOLDER=os.path.join(workdir, 'uploads'),
+        RATELIMIT_STORAGE_URI='memory://',
+    )
+    try:
+        # 每次 init 都使用全新的資料庫，測量首次部署時的完整成本
+        init_samples = []
+        for _ in range(args.runs):
+            for suffix in ('', '-wal', '-shm'):
+                if os.path.exists(f'{workdir}/catfeed.db{suffix}'):
+                    os.remove(f'{workdir}/catfeed.db{suffix}')
+            init_samples.append(measure(env, True)['init'])
+        import_samples = [measure(env, False)['import'] for _ in range(args.runs)]
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(json.dumps({
+        'runs': args.runs,
+        'worker_import': summarize(import_samples),
+        'one_shot_init': summarize(init_samples),
+    }, ensure_ascii=False, indent=2))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,3 @@
+from .page_cache import PageCache
+
+__all__ = ['PageCache']
@@ -0,0 +1,152 @@
+"""頁面快取模組
+
+此模組快取公開頁面（首頁、關於頁面、生平記事 API）的回應內容，
+快取鍵包含資料版本號，資料變更時遞增版本號即可讓所有工作進程的快取失效；
+隨時間改變的內容（例如首頁的今日統計）以 vary 將日期等值加入快取鍵。
+"""
+from collections import OrderedDict
+from functools import wraps
+from threading import Lock
+import json
+import os
+import time
+from flask import request, session, current_app
+from auth.limiter import run_redis
+
+VERSION_KEY = 'catfeed:data_version'
+PAGE_KEY_PREFIX = 'catfeed:page:'
+
+class LRUCache:
+    """行程內的 LRU 快取（含逾時）"""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, timeout):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + timeout, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+class PageCache:
+    """公開頁面的回應快取
+
+    資料版本號在啟用 Redis 時存放於 Redis，否則存放於本機檔案，
+    讓同一台主機上的所有 Gunicorn 工作進程共用。
+    """
+
+    def __init__(self, app=None):
+        self.local = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('PAGE_CACHE_ENABLED', True)
+        app.config.setdefault('PAGE_CACHE_TIMEOUT', 60)
+        app.config.setdefault('PAGE_CACHE_MAX_ENTRIES', 256)
+        app.config.setdefault('PAGE_CACHE_VERSION_FILE', os.path.join(app.instance_path, 'data_version'))
+        os.makedirs(os.path.dirname(app.config['PAGE_CACHE_VERSION_FILE']), exist_ok=True)
+        self.local = LRUCache(app.config['PAGE_CACHE_MAX_ENTRIES'])
+        app.extensions['page_cache'] = self
+
+    def get_version(self):
+        """取得目前的資料版本號"""
+        version = run_redis(lambda r: r.get(VERSION_KEY))
+        if version is not None:
+            return int(version)
+        try:
+            with open(current_app.config['PAGE_CACHE_VERSION_FILE']) as f:
+                return int(f.read() or 0)
+        except (OSError, ValueError):
+            return 0
+
+    def bump_version(self):
+        """遞增資料版本號，讓所有已快取的頁面失效"""
+        run_redis(lambda r: r.incr(VERSION_KEY))
+
+        # 本機檔案同時更新，Redis 無法連線時仍能讓快取失效
+        path = current_app.config['PAGE_CACHE_VERSION_FILE']
+        temp_path = f"{path}.{os.getpid()}"
+        with open(temp_path, 'w') as f:
+            f.write(str(time.time_ns()))
+        os.replace(temp_path, path)
+        self.local.clear()
+
+    def _is_cacheable_request(self):
+        from flask_login import current_user
+
+        if not current_app.config['PAGE_CACHE_ENABLED'] or request.method != 'GET':
+            return False
+        # 帶有查詢參數、閃現訊息或已登入的請求內容因人而異，不使用快取
+        if request.args or '_flashes' in session:
+            return False
+        return not current_user.is_authenticated
+
+    def _load(self, key):
+        entry = self.local.get(key)
+        if entry is not None:
+            return entry
+        data = run_redis(lambda r: r.get(PAGE_KEY_PREFIX + key))
+        if data:
+            entry = json.loads(data)
+            self.local.set(key, entry, current_app.config['PAGE_CACHE_TIMEOUT'])
+            return entry
+        return None
+
+    def _store(self, key, entry, timeout):
+        self.local.set(key, entry, timeout)
+        run_redis(lambda r: r.setex(PAGE_KEY_PREFIX + key, timeout, json.dumps(entry)))
+
+    def cached(self, timeout=None, vary=None):
+        """快取匿名訪客的 GET 回應的裝飾器
+
+        Args:
+            timeout: 快取秒數，預設為 PAGE_CACHE_TIMEOUT
+            vary: 回傳字串的函式，其結果加入快取鍵；頁面內容隨時間改變而非隨資料寫入改變時使用（例如目前日期）
+        """
+        def decorator(f):
+            @wraps(f)
+            def wrapped(*args, **kwargs):
+                if not self._is_cacheable_request():
+                    return f(*args, **kwargs)
+
+                key = f"{request.path}:{self.get_version()}"
+                if vary is not None:
+                    key = f"{key}:{vary()}"
+                entry = self._load(key)
+                if entry is not None:
+                    response = current_app.response_class(
+                        entry['body'], status=200, mimetype=entry['mimetype']
+                    )
+                    response.headers['X-Cache'] = 'HIT'
+                    return response
+
+                response = current_app.make_response(f(*args, **kwargs))
+                if response.status_code == 200 and not response.direct_passthrough:
+                    self._store(key, {
+                        'body': response.get_data(as_text=True),
+                        'mimetype': response.mimetype
+                    }, timeout or current_app.config['PAGE_CACHE_TIMEOUT'])
+                response.headers['X-Cache'] = 'MISS'
+                return response
+            return wrapped
+        return decorator
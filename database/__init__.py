@@ -0,0 +1,3 @@
+from .sqlite import apply_sqlite_pragmas, configure_sqlite
+
+__all__ = ['apply_sqlite_pragmas', 'configure_sqlite']
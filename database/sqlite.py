@@ -0,0 +1,51 @@
+"""SQLite 連線調校模組
+
+此模組在每條新建立的 SQLite 連線上套用 PRAGMA 設定（WAL 日誌、同步等級、鎖等待、
+記憶體映射及頁面快取），讓多個 Gunicorn 工作進程同時讀寫時，讀取不會被寫入阻擋，
+寫入在鎖被佔用時等待而不是立即回報 database is locked。
+"""
+from sqlalchemy import event
+
+JOURNAL_MODES = {'DELETE', 'TRUNCATE', 'PERSIST', 'MEMORY', 'WAL', 'OFF'}
+SYNCHRONOUS_LEVELS = {'OFF', 'NORMAL', 'FULL', 'EXTRA'}
+
+def _sqlite_pragmas(config):
+    """依設定產生 PRAGMA 清單，設定值不合法時拋出 ValueError"""
+    journal_mode = config.get('SQLITE_JOURNAL_MODE', 'WAL').upper()
+    if journal_mode not in JOURNAL_MODES:
+        raise ValueError(f"無效的 SQLITE_JOURNAL_MODE: {journal_mode}")
+    synchronous = config.get('SQLITE_SYNCHRONOUS', 'NORMAL').upper()
+    if synchronous not in SYNCHRONOUS_LEVELS:
+        raise ValueError(f"無效的 SQLITE_SYNCHRONOUS: {synchronous}")
+    return [
+        # busy_timeout 需最先設定，切換日誌模式時若遇到鎖也會等待
+        f"PRAGMA busy_timeout = {int(config.get('SQLITE_BUSY_TIMEOUT', 5000))}",
+        f"PRAGMA journal_mode = {journal_mode}",
+        f"PRAGMA synchronous = {synchronous}",
+        f"PRAGMA mmap_size = {int(config.get('SQLITE_MMAP_SIZE', 268435456))}",
+        f"PRAGMA cache_size = {int(config.get('SQLITE_CACHE_SIZE', -20000))}",
+    ]
+
+def apply_sqlite_pragmas(dbapi_connection, pragmas):
+    """在 DB-API 連線上執行 PRAGMA"""
+    cursor = dbapi_connection.cursor()
+    try:
+        for pragma in pragmas:
+            cursor.execute(pragma)
+    finally:
+        cursor.close()
+
+def configure_sqlite(engine, config):
+    """為 SQLite 引擎註冊連線事件，每條新連線建立時套用 PRAGMA 設定
+
+    Args:
+        engine: SQLAlchemy 引擎，非 SQLite 引擎時不做任何事
+        config: 應用程式設定
+    """
+    if engine.dialect.name != 'sqlite':
+        return
+    pragmas = _sqlite_pragmas(config)
+
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        apply_sqlite_pragmas(dbapi_connection, pragmas)
@@ -1,20 +1,43 @@
+import gc
 import multiprocessing
+import os
+import sys
+from dotenv import load_dotenv
+
+# 設定檔在匯入應用程式之前執行，需先載入 .env，工作模式等設定才會生效
+load_dotenv()
 
 # 綁定的 IP 和端口
 bind = "0.0.0.0:8080"
 
-# 工作進程數量
-workers = multiprocessing.cpu_count() * 2 + 1
+# 工作模式：sync（每個進程一次處理一個請求）或 gevent（協作式，單一進程可同時保持大量連線）
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'sync')
+if worker_class == 'gevent':
+    try:
+        import gevent  # noqa: F401
+    except ImportError:
+        print("未安裝 gevent，改用 sync 工作模式", file=sys.stderr)
+        worker_class = 'sync'
+
+# 主進程預先匯入並預熱應用程式，fork 出的工作進程以寫入時複製共用記憶體，重啟也更快
+preload_app = os.getenv('GUNICORN_PRELOAD', 'true').lower() == 'true'
+if preload_app and worker_class == 'gevent':
+    # 主進程匯入應用程式前就需完成 monkey patch，預先建立的鎖與 socket 才會是協作式的
+    from gevent import monkey
+    monkey.patch_all()
 
-# 工作模式
-worker_class = "sync"
+# 工作進程數量（gevent 模式下並行度來自協程，進程數只需對應 CPU 核心）
+if worker_class == 'gevent':
+    workers = int(os.getenv('GUNICORN_WORKERS', multiprocessing.cpu_count() + 1))
+else:
+    workers = int(os.getenv('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
 
 # 每個工作進程的最大請求數
 max_requests = 1000
 max_requests_jitter = 50
 
-# 超時設定
-timeout = 300
+# 超時設定（gevent 模式下慢速客戶端不會佔住進程，心跳逾時可以縮短）
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 30 if worker_class == 'gevent' else 300))
 keepalive = 2
 
 # 緩衝區設定
@@ -47,5 +70,43 @@ sendfile = True
 # 綁定設定
 backlog = 2048
 
-# 工作進程設定
-worker_connections = 1000 
\ No newline at end of file
+# 每個 gevent 工作進程可同時處理的連線數（sync 模式不使用）
+worker_connections = int(os.getenv('GUNICORN_WORKER_CONNECTIONS', 1000)) 
+
+def when_ready(server):
+    """preload 模式下在 fork 工作進程前預熱，並凍結目前的物件讓 GC 不再掃描（避免觸發寫入時複製）"""
+    if not preload_app:
+        return
+    from app import warm_up
+    warm_up()
+    gc.freeze()
+
+def post_fork(server, worker):
+    """捨棄從主進程繼承的資料庫及 Redis 連線，每個工作進程各自重新建立"""
+    if not preload_app:
+        return
+    from app import app, db
+    from auth.limiter import reset_redis_client
+    with app.app_context():
+        db.engine.dispose(close=False)
+    reset_redis_client()
+
+def _metrics_dir():
+    from metrics import DEFAULT_METRICS_DIR
+    if os.getenv('METRICS_ENABLED', 'true').lower() != 'true':
+        return None
+    return os.getenv('METRICS_DIR', DEFAULT_METRICS_DIR)
+
+def on_starting(server):
+    """清除上次執行留下的指標檔案"""
+    from metrics import reset_metrics_dir
+    metrics_dir = _metrics_dir()
+    if metrics_dir:
+        reset_metrics_dir(metrics_dir)
+
+def child_exit(server, worker):
+    """工作進程結束時移除其即時指標"""
+    from metrics import mark_worker_dead
+    metrics_dir = _metrics_dir()
+    if metrics_dir:
+        mark_worker_dead(metrics_dir, worker.pid)
@@ -0,0 +1,8 @@
+from .images import DERIVATIVE_SIZES, derivative_filename, fallback_extension, generate_derivatives, remove_derivatives
+from .storage import HashingFile, append_chunk, blob_lock, cleanup_stale_uploads, create_upload, file_etag, finish_upload, get_upload, store_stream
+
+__all__ = [
+    'DERIVATIVE_SIZES', 'derivative_filename', 'fallback_extension', 'generate_derivatives', 'remove_derivatives',
+    'HashingFile', 'append_chunk', 'blob_lock', 'cleanup_stale_uploads', 'create_upload', 'file_etag', 'finish_upload', 'get_upload',
+    'store_stream',
+]
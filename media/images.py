@@ -0,0 +1,73 @@
+"""照片衍生圖片模組
+
+此模組在上傳時為照片產生縮圖、中尺寸及 WebP 版本，讓頁面以 srcset 只下載需要的尺寸。
+"""
+import os
+from PIL import Image, ImageOps
+
+# 衍生圖片尺寸（最長邊像素）
+DERIVATIVE_SIZES = {
+    'thumb': 480,
+    'medium': 1280,
+}
+
+WEBP_QUALITY = 80
+JPEG_QUALITY = 85
+
+def fallback_extension(filename):
+    """不支援 WebP 的瀏覽器所使用的格式（保留透明度的格式輸出 PNG）"""
+    ext = filename.rsplit('.', 1)[-1].lower()
+    return 'png' if ext in ('png', 'gif') else 'jpg'
+
+def derivative_filename(filename, size, ext):
+    """取得衍生圖片的檔名，例如 20240101_cat_thumb.webp"""
+    stem = os.path.splitext(filename)[0]
+    return f"{stem}_{size}.{ext}"
+
+def _save(image, path, ext):
+    if ext == 'webp':
+        image.save(path, 'WEBP', quality=WEBP_QUALITY, method=4)
+    elif ext == 'png':
+        image.save(path, 'PNG', optimize=True)
+    else:
+        image.convert('RGB').save(path, 'JPEG', quality=JPEG_QUALITY, optimize=True, progressive=True)
+
+def generate_derivatives(upload_folder, filename):
+    """為照片產生各尺寸的 WebP 及備援格式衍生圖片
+
+    Args:
+        upload_folder: 上傳目錄
+        filename: 原始照片檔名
+
+    Returns:
+        dict: 原圖及各尺寸的寬高，鍵與 Photo 的欄位名稱相同
+
+    Raises:
+        OSError: 無法讀取或寫入圖片時
+    """
+    fallback_ext = fallback_extension(filename)
+    with Image.open(os.path.join(upload_folder, filename)) as original:
+        # 依 EXIF 方向旋轉（手機照片常見），動態 GIF 只取第一幀
+        image = ImageOps.exif_transpose(original)
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if fallback_ext == 'png' else 'RGB')
+
+        dimensions = {'width': image.width, 'height': image.height}
+        for size, max_edge in DERIVATIVE_SIZES.items():
+            resized = image.copy()
+            resized.thumbnail((max_edge, max_edge), Image.LANCZOS)
+            for ext in ('webp', fallback_ext):
+                _save(resized, os.path.join(upload_folder, derivative_filename(filename, size, ext)), ext)
+            dimensions[f'{size}_width'] = resized.width
+            dimensions[f'{size}_height'] = resized.height
+
+    return dimensions
+
+def remove_derivatives(upload_folder, filename):
+    """刪除照片的所有衍生圖片（不存在的檔案會被忽略）"""
+    for size in DERIVATIVE_SIZES:
+        for ext in ('webp', fallback_extension(filename)):
+            try:
+                os.remove(os.path.join(upload_folder, derivative_filename(filename, size, ext)))
+            except OSError:
+                pass
@@ -0,0 +1,248 @@
+"""照片檔案儲存模組
+
+此模組以內容雜湊（SHA-256）命名照片檔案，相同的照片只會儲存一份，
+並提供可續傳的分段上傳功能，讓上傳內容直接寫入磁碟而不佔用記憶體。
+"""
+from contextlib import contextmanager
+import fcntl
+import hashlib
+import json
+import os
+import re
+import secrets
+import tempfile
+import threading
+import time
+
+PARTIAL_DIR = '.partial'
+READ_SIZE = 64 * 1024
+UPLOAD_ID_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+DIGEST_PATTERN = re.compile(r'^[0-9a-f]{64}$')
+BLOB_LOCK_FILE = 'blobs.lock'
+
+# 同一進程內的執行緒（gevent 模式下為協程）先在此等待，同一時間只有一個持有檔案鎖，
+# 避免協程在 flock 上阻塞整個進程
+_blob_lock = threading.Lock()
+
+def blob_filename(digest, ext):
+    """以內容雜湊命名的檔名"""
+    return f"{digest}.{ext}"
+
+def _partial_dir(upload_folder):
+    path = os.path.join(upload_folder, PARTIAL_DIR)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+@contextmanager
+def blob_lock(upload_folder):
+    """內容定址檔案的跨進程鎖
+
+    新增照片（移入檔案並寫入照片記錄）與刪除照片（檢查其他記錄的參照、刪除記錄並移除檔案）
+    都需在鎖內完成，刪除才不會移除剛被另一個上傳沿用、但記錄尚未寫入的檔案。
+    """
+    with _blob_lock:
+        with open(os.path.join(_partial_dir(upload_folder), BLOB_LOCK_FILE), 'a') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+@contextmanager
+def _locked_partial(data_path, mode):
+    """以非阻塞的檔案鎖開啟分段上傳的暫存檔，同一個上傳同時只有一個請求能寫入或完成
+
+    Raises:
+        ValueError: 上傳不存在，或正由其他請求處理
+    """
+    try:
+        f = open(data_path, mode)
+    except FileNotFoundError:
+        raise ValueError("上傳不存在或已過期")
+    with f:
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            raise ValueError("此上傳正由其他請求寫入，請稍後再試")
+        yield f
+
+def _commit_blob(upload_folder, temp_path, digest, ext):
+    """將暫存檔移入內容定址的位置，已存在相同內容時直接捨棄暫存檔"""
+    filename = blob_filename(digest, ext)
+    final_path = os.path.join(upload_folder, filename)
+    if os.path.exists(final_path):
+        os.remove(temp_path)
+    else:
+        os.replace(temp_path, final_path)
+    return filename
+
+def file_etag(path, filename):
+    """產生強 ETag：內容定址的檔案直接使用雜湊，其他檔案使用 inode、修改時間及大小"""
+    stem = os.path.splitext(filename)[0]
+    if DIGEST_PATTERN.match(stem):
+        return stem
+    stat = os.stat(path)
+    return f"{stat.st_ino:x}-{stat.st_mtime_ns:x}-{stat.st_size:x}"
+
+class HashingFile:
+    """寫入時同步計算 SHA-256 的暫存檔，供 multipart 解析直接寫入磁碟"""
+
+    def __init__(self, upload_folder):
+        self.upload_folder = upload_folder
+        fd, self.path = tempfile.mkstemp(dir=_partial_dir(upload_folder), suffix='.part')
+        self._file = os.fdopen(fd, 'w+b')
+        self._hash = hashlib.sha256()
+
+    def write(self, data):
+        self._hash.update(data)
+        return self._file.write(data)
+
+    def __getattr__(self, name):
+        return getattr(self._file, name)
+
+    def __iter__(self):
+        return iter(self._file)
+
+    def commit(self, ext):
+        """完成寫入並移入內容定址的位置
+
+        Returns:
+            (str, str): (檔名, SHA-256)
+        """
+        self._file.close()
+        digest = self._hash.hexdigest()
+        filename = _commit_blob(self.upload_folder, self.path, digest, ext)
+        self.path = None
+        return filename, digest
+
+    def discard(self):
+        """捨棄未使用的暫存檔"""
+        self._file.close()
+        if self.path:
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+            self.path = None
+
+def store_stream(stream, upload_folder, ext):
+    """將串流寫入磁碟並同步計算雜湊，再移入內容定址的位置
+
+    Returns:
+        (str, str): (檔名, SHA-256)
+    """
+    target = HashingFile(upload_folder)
+    try:
+        for chunk in iter(lambda: stream.read(READ_SIZE), b''):
+            target.write(chunk)
+    except Exception:
+        target.discard()
+        raise
+    return target.commit(ext)
+
+def _upload_paths(upload_folder, upload_id):
+    if not UPLOAD_ID_PATTERN.match(upload_id or ''):
+        raise ValueError("無效的上傳編號")
+    directory = _partial_dir(upload_folder)
+    return os.path.join(directory, f"{upload_id}.part"), os.path.join(directory, f"{upload_id}.json")
+
+def create_upload(upload_folder, original_filename, size):
+    """建立分段上傳
+
+    Returns:
+        str: 上傳編號
+    """
+    upload_id = secrets.token_hex(16)
+    data_path, meta_path = _upload_paths(upload_folder, upload_id)
+    open(data_path, 'wb').close()
+    with open(meta_path, 'w') as f:
+        json.dump({'filename': original_filename, 'size': size}, f)
+    return upload_id
+
+def get_upload(upload_folder, upload_id):
+    """取得分段上傳的狀態，不存在時回傳 None
+
+    Returns:
+        dict: {'filename', 'size', 'offset'}
+    """
+    data_path, meta_path = _upload_paths(upload_folder, upload_id)
+    try:
+        with open(meta_path) as f:
+            meta = json.load(f)
+        meta['offset'] = os.path.getsize(data_path)
+    except OSError:
+        return None
+    return meta
+
+def append_chunk(upload_folder, upload_id, offset, stream):
+    """從指定位置寫入一段上傳內容
+
+    Args:
+        offset: 用戶端認為的目前位置，必須與已寫入的大小相同
+        stream: 請求內容串流
+
+    Returns:
+        int: 寫入後的位置
+
+    Raises:
+        ValueError: 上傳不存在、正由其他請求寫入、位置不符或超過宣告的大小
+    """
+    upload = get_upload(upload_folder, upload_id)
+    if upload is None:
+        raise ValueError("上傳不存在或已過期")
+
+    data_path, _ = _upload_paths(upload_folder, upload_id)
+    with _locked_partial(data_path, 'r+b') as f:
+        # 取得鎖之後才比對位置，同時送出相同位置的請求只有一個會寫入
+        current = os.fstat(f.fileno()).st_size
+        if offset != current:
+            raise ValueError(f"上傳位置不符，目前位置為 {current}")
+        written = offset
+        f.seek(offset)
+        while True:
+            chunk = stream.read(READ_SIZE)
+            if not chunk:
+                break
+            written += len(chunk)
+            if written > upload['size']:
+                f.truncate(offset)
+                raise ValueError("上傳內容超過宣告的大小")
+            f.write(chunk)
+    return written
+
+def finish_upload(upload_folder, upload_id, ext):
+    """完成分段上傳，計算 SHA-256 後移入內容定址的位置
+
+    Returns:
+        (str, str): (檔名, SHA-256)
+
+    Raises:
+        ValueError: 上傳不存在或尚未完成
+    """
+    upload = get_upload(upload_folder, upload_id)
+    if upload is None:
+        raise ValueError("上傳不存在或已過期")
+
+    data_path, meta_path = _upload_paths(upload_folder, upload_id)
+    with _locked_partial(data_path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size != upload['size']:
+            raise ValueError("上傳尚未完成")
+        sha256 = hashlib.sha256()
+        for chunk in iter(lambda: f.read(READ_SIZE), b''):
+            sha256.update(chunk)
+        digest = sha256.hexdigest()
+        filename = _commit_blob(upload_folder, data_path, digest, ext)
+    os.remove(meta_path)
+    return filename, digest
+
+def cleanup_stale_uploads(upload_folder, max_age=86400):
+    """刪除超過期限仍未完成的上傳暫存檔"""
+    directory = _partial_dir(upload_folder)
+    cutoff = time.time() - max_age
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+        except OSError:
+            pass
@@ -0,0 +1,5 @@
+from .prometheus import DEFAULT_METRICS_DIR, init_metrics, mark_worker_dead, reset_metrics_dir
+from .profiling import QueryBudgetExceeded, init_profiling, query_budget
+
+__all__ = ['DEFAULT_METRICS_DIR', 'init_metrics', 'mark_worker_dead', 'reset_metrics_dir',
+           'QueryBudgetExceeded', 'init_profiling', 'query_budget']
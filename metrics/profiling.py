@@ -0,0 +1,155 @@
+"""慢請求分析與查詢預算模組
+
+慢請求分析（PROFILE_SLOW_REQUESTS=true 時啟用）：背景執行緒每隔 PROFILE_INTERVAL_MS 取樣
+進行中請求的 Python 呼叫堆疊，請求耗時超過 PROFILE_THRESHOLD_MS 時，將取樣結果以
+flamegraph.pl / speedscope 可讀取的 collapsed stack 格式寫入 PROFILE_DIR，並附上該請求執行的 SQL 語句。
+取樣以作業系統執行緒為單位，gevent 工作進程中同一執行緒上其他協程的堆疊也會被記入。
+
+查詢預算：以 @query_budget(n) 宣告路由每個請求最多執行的 SQL 查詢次數，超過時記錄警告；
+測試模式（app.testing）或 QUERY_BUDGET_STRICT=true 時改為拋出 QueryBudgetExceeded，
+讓 N+1 查詢在 CI 中失敗。
+"""
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from flask import g, request
+from .sql_tracker import install_sql_tracker, start_sql_tracking
+
+try:
+    # gevent 會把執行緒替換為協程，取樣需要真正的執行緒才能在請求執行中途讀取堆疊
+    from gevent.monkey import get_original
+    _get_ident, _start_thread = get_original('_thread', ['get_ident', 'start_new_thread'])
+    _sleep = get_original('time', 'sleep')
+except ImportError:
+    import _thread
+    _get_ident, _start_thread, _sleep = _thread.get_ident, _thread.start_new_thread, time.sleep
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 取樣執行緒不跨 fork 共用，各工作進程在第一個請求時啟動自己的執行緒
+_profiler = {'pid': None, 'interval': 0.005, 'active': {}, 'lock': threading.Lock()}
+_labels = {}
+
+class QueryBudgetExceeded(RuntimeError):
+    """請求執行的 SQL 查詢次數超過路由宣告的預算"""
+
+def query_budget(max_queries):
+    """宣告路由每個請求最多執行的 SQL 查詢次數（含登入使用者及時區等共用查詢）
+
+    需放在 @app.route 的正下方，讓註冊的視圖函式帶有預算屬性
+    """
+    def decorator(view):
+        view.query_budget = max_queries
+        return view
+    return decorator
+
+def _label(code):
+    label = _labels.get(code)
+    if label is None:
+        filename = code.co_filename
+        if filename.startswith(ROOT + os.sep):
+            filename = os.path.relpath(filename, ROOT)
+        elif 'site-packages' + os.sep in filename:
+            filename = filename.split('site-packages' + os.sep, 1)[1]
+        # collapsed stack 以分號分隔堆疊層、以最後一個空白分隔次數
+        label = _labels[code] = f"{code.co_name} ({filename}:{code.co_firstlineno})".replace(';', ',')
+    return label
+
+def _collapse(frame):
+    stack = []
+    while frame is not None:
+        stack.append(_label(frame.f_code))
+        frame = frame.f_back
+    return ';'.join(reversed(stack))
+
+def _sample_loop():
+    interval = _profiler['interval']
+    active = _profiler['active']
+    while True:
+        _sleep(interval)
+        if not active:
+            continue
+        frames = sys._current_frames()
+        for ident, samples in list(active.items()):
+            frame = frames.get(ident)
+            if frame is not None:
+                samples[_collapse(frame)] += 1
+
+def _ensure_sampler():
+    pid = os.getpid()
+    if _profiler['pid'] != pid:
+        with _profiler['lock']:
+            if _profiler['pid'] != pid:
+                _profiler['active'].clear()
+                _start_thread(_sample_loop, ())
+                _profiler['pid'] = pid
+
+def _dump_profile(profile_dir, samples, statements, elapsed):
+    endpoint = re.sub(r'[^\w.-]', '_', request.endpoint or 'none')
+    stem = os.path.join(profile_dir, f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{endpoint}-{elapsed * 1000:.0f}ms")
+    with open(stem + '.folded', 'w', encoding='utf-8') as f:
+        for stack, count in samples.most_common():
+            f.write(f"{stack} {count}\n")
+    with open(stem + '.sql', 'w', encoding='utf-8') as f:
+        f.write(f"-- {request.method} {request.full_path.rstrip('?')}\n")
+        f.write(f"-- {elapsed * 1000:.1f} ms, {len(statements)} 個查詢, "
+                f"{sum(t for _, t in statements) * 1000:.1f} ms\n\n")
+        for statement, query_time in statements:
+            f.write(f"-- {query_time * 1000:.2f} ms\n{statement.strip()};\n\n")
+    return stem
+
+def init_profiling(app, db):
+    """註冊查詢預算檢查，並在 PROFILE_SLOW_REQUESTS 啟用時註冊慢請求取樣
+
+    Args:
+        app: Flask 應用程式
+        db: Flask-SQLAlchemy 實例，在其引擎上註冊查詢事件
+    """
+    profiling = app.config.get('PROFILE_SLOW_REQUESTS', False)
+    threshold = app.config.get('PROFILE_THRESHOLD_MS', 500) / 1000
+    profile_dir = app.config.get('PROFILE_DIR')
+    _profiler['interval'] = app.config.get('PROFILE_INTERVAL_MS', 5) / 1000
+    if profiling:
+        os.makedirs(profile_dir, exist_ok=True)
+
+    def start_request():
+        start_sql_tracking(capture=profiling)
+        if profiling:
+            _ensure_sampler()
+            g.profile_start = time.perf_counter()
+            g.profile_thread = _get_ident()
+            _profiler['active'][g.profile_thread] = Counter()
+
+    def check_query_budget(response):
+        budget = getattr(app.view_functions.get(request.endpoint), 'query_budget', None)
+        if budget is None or g.get('sql_count', 0) <= budget:
+            return response
+        message = f"{request.endpoint} 執行了 {g.sql_count} 個查詢，超過預算 {budget}"
+        if app.testing or app.config.get('QUERY_BUDGET_STRICT'):
+            raise QueryBudgetExceeded(message)
+        app.logger.warning(message)
+        return response
+
+    def finish_profile(exc):
+        start = g.pop('profile_start', None)
+        if start is None:
+            return
+        samples = _profiler['active'].pop(g.profile_thread, None)
+        elapsed = time.perf_counter() - start
+        if samples is None or elapsed < threshold:
+            return
+        try:
+            stem = _dump_profile(profile_dir, samples, g.get('sql_statements', []), elapsed)
+            app.logger.info(f"慢請求 {request.endpoint} 耗時 {elapsed * 1000:.0f} ms，取樣結果已寫入 {stem}.folded")
+        except OSError as e:
+            app.logger.warning(f"無法寫入慢請求取樣結果: {str(e)}")
+
+    # 與請求指標相同，需在 IP 封鎖及速率限制之前開始
+    app.before_request_funcs.setdefault(None, []).insert(0, start_request)
+    app.after_request(check_query_budget)
+    app.teardown_request(finish_profile)
+    with app.app_context():
+        install_sql_tracker(db.engine)
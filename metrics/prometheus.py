@@ -0,0 +1,124 @@
+"""請求指標模組
+
+此模組以 Prometheus 格式記錄每個 Flask 端點的請求延遲、模板渲染時間、SQL 查詢次數與耗時，
+以及速率限制拒絕次數。各 Gunicorn 工作進程將數值寫入 METRICS_DIR 中的 mmap 檔案
+（prometheus_client 的 multiprocess 模式），/metrics 端點讀取時再彙總所有進程的數值。
+"""
+import glob
+import hmac
+import os
+import tempfile
+import time
+from flask import g, request, has_request_context, before_render_template, template_rendered
+from flask_login import current_user
+from .sql_tracker import install_sql_tracker, start_sql_tracking
+
+# 依請求數量分布調整的延遲區間（秒）
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250)
+
+DEFAULT_METRICS_DIR = '/dev/shm/catfeed-metrics' if os.path.isdir('/dev/shm') else os.path.join(tempfile.gettempdir(), 'catfeed-metrics')
+
+# 指標物件在 init_metrics 中建立（prometheus_client 需在設定 PROMETHEUS_MULTIPROC_DIR 後才匯入）
+_metrics = {}
+
+def reset_metrics_dir(path):
+    """清除上次執行留下的指標檔案（在 Gunicorn 主進程啟動時呼叫）"""
+    os.makedirs(path, exist_ok=True)
+    for filename in glob.glob(os.path.join(path, '*.db')):
+        os.remove(filename)
+
+def mark_worker_dead(path, pid):
+    """工作進程結束後移除其即時數值（gauge）檔案，累計數值保留（在 Gunicorn 主進程呼叫）"""
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(pid, path)
+
+def _endpoint():
+    return request.url_rule.endpoint if request.url_rule else 'none'
+
+def _create_metrics():
+    from prometheus_client import Counter, Histogram
+
+    _metrics.update(
+        requests=Counter('catfeed_requests_total', '請求數', ['endpoint', 'method', 'status']),
+        latency=Histogram('catfeed_request_duration_seconds', '請求處理時間', ['endpoint', 'method'],
+                          buckets=LATENCY_BUCKETS),
+        render=Histogram('catfeed_template_render_seconds', '模板渲染時間', ['endpoint', 'template'],
+                         buckets=LATENCY_BUCKETS),
+        queries=Histogram('catfeed_sql_queries_per_request', '每個請求的 SQL 查詢次數', ['endpoint'],
+                          buckets=QUERY_COUNT_BUCKETS),
+        query_total=Counter('catfeed_sql_queries_total', 'SQL 查詢次數', ['endpoint']),
+        query_time=Counter('catfeed_sql_seconds_total', 'SQL 查詢總耗時', ['endpoint']),
+        rejections=Counter('catfeed_ratelimit_rejections_total', '速率限制拒絕次數', ['endpoint']),
+    )
+
+def _start_request():
+    g.metrics_start = time.perf_counter()
+    start_sql_tracking()
+
+def _record_request(response):
+    start = g.get('metrics_start')
+    if start is None:
+        return response
+    endpoint = _endpoint()
+    _metrics['latency'].labels(endpoint, request.method).observe(time.perf_counter() - start)
+    _metrics['requests'].labels(endpoint, request.method, str(response.status_code)).inc()
+    _metrics['queries'].labels(endpoint).observe(g.sql_count)
+    if g.sql_count:
+        _metrics['query_total'].labels(endpoint).inc(g.sql_count)
+        _metrics['query_time'].labels(endpoint).inc(g.sql_time)
+    if response.status_code == 429:
+        _metrics['rejections'].labels(endpoint).inc()
+    return response
+
+def _before_render(sender, template, context, **extra):
+    if has_request_context():
+        g.metrics_render_start = time.perf_counter()
+
+def _after_render(sender, template, context, **extra):
+    start = g.pop('metrics_render_start', None) if has_request_context() else None
+    if start is not None:
+        _metrics['render'].labels(_endpoint(), template.name or 'string').observe(time.perf_counter() - start)
+
+def _authorized(app):
+    """已登入的管理員，或帶有 METRICS_TOKEN 的 Bearer 權杖（供 Prometheus 抓取）"""
+    token = app.config.get('METRICS_TOKEN')
+    header = request.headers.get('Authorization', '')
+    if token and header.startswith('Bearer ') and hmac.compare_digest(header[7:].encode(), token.encode()):
+        return True
+    return current_user.is_authenticated
+
+def init_metrics(app, db, limiter=None):
+    """註冊請求、模板及 SQL 事件的指標記錄，並提供 /metrics 端點
+
+    Args:
+        app: Flask 應用程式
+        db: Flask-SQLAlchemy 實例，在其引擎上註冊查詢事件
+        limiter: 速率限制器，/metrics 端點不受預設限制影響
+    """
+    if not app.config.get('METRICS_ENABLED'):
+        return
+    metrics_dir = app.config['METRICS_DIR']
+    os.makedirs(metrics_dir, exist_ok=True)
+    os.environ['PROMETHEUS_MULTIPROC_DIR'] = metrics_dir
+    from prometheus_client import CollectorRegistry, CONTENT_TYPE_LATEST, generate_latest, multiprocess
+    _create_metrics()
+
+    # 計時需在其他 before_request（例如 IP 封鎖、速率限制）之前開始
+    app.before_request_funcs.setdefault(None, []).insert(0, _start_request)
+    app.after_request(_record_request)
+    before_render_template.connect(_before_render, app)
+    template_rendered.connect(_after_render, app)
+    with app.app_context():
+        install_sql_tracker(db.engine)
+
+    def metrics_view():
+        if not _authorized(app):
+            return app.response_class('Unauthorized', status=401, headers={'WWW-Authenticate': 'Bearer'})
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry, path=metrics_dir)
+        return app.response_class(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
+
+    app.add_url_rule('/metrics', 'metrics', metrics_view)
+    if limiter is not None:
+        limiter.exempt(metrics_view)
@@ -0,0 +1,42 @@
+"""SQL 查詢追蹤模組
+
+在 SQLAlchemy 引擎上註冊游標事件，把目前請求執行的查詢次數與耗時累計在 g 中，
+供請求指標、查詢預算及慢請求分析共用（同一個引擎只註冊一次）。
+"""
+import time
+from flask import g, request, has_request_context
+from sqlalchemy import event
+
+def start_sql_tracking(capture=False):
+    """開始追蹤目前請求的查詢；capture 為 True 時同時保留 SQL 語句及耗時"""
+    # 測試或 CLI 中多個請求可能共用同一個應用程式上下文（g），以請求物件區分
+    current = request._get_current_object()
+    if g.get('sql_request') is current:
+        g.sql_capture = g.sql_capture or capture
+        return
+    g.sql_request = current
+    g.sql_count = 0
+    g.sql_time = 0.0
+    g.sql_capture = capture
+    g.sql_statements = []
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context():
+        conn.info.setdefault('sql_tracker_start', []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get('sql_tracker_start')
+    if not starts or not has_request_context():
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    if 'sql_count' in g:
+        g.sql_count += 1
+        g.sql_time += elapsed
+        if g.sql_capture:
+            g.sql_statements.append((statement, elapsed))
+
+def install_sql_tracker(engine):
+    """在引擎上註冊查詢追蹤事件（可重複呼叫）"""
+    if not event.contains(engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
@@ -1,5 +1,5 @@
 import sqlite3
-from app import app, db
+from app import app, db, rebuild_daily_intake
 import shutil
 import os
 from datetime import datetime
@@ -28,73 +28,61 @@ def migrate_data():
         new_conn.commit()
         
         # 遷移餵食記錄
-        backup_cur.execute("SELECT * FROM feeding_record")
-        records = backup_cur.fetchall()
-        for record in records:
-            new_cur.execute(
-                "INSERT INTO feeding_record (id, timestamp, food_type, amount, unit, calories, notes, feeder_nickname) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
-                record
-            )
+        # 以 executemany 批次寫入，直接逐列讀取備份資料庫的游標，不需一次載入全部記錄
+        new_cur.executemany(
+            "INSERT INTO feeding_record (id, timestamp, food_type, amount, unit, calories, notes, feeder_nickname) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            backup_cur.execute("SELECT * FROM feeding_record")
+        )
         
         # 遷移貓咪檔案
-        backup_cur.execute("SELECT * FROM cat_profile")
-        profiles = backup_cur.fetchall()
-        for profile in profiles:
-            new_cur.execute(
-                "INSERT INTO cat_profile (id, weight, is_neutered, activity_level) VALUES (?, ?, ?, ?)",
-                profile
-            )
+        new_cur.executemany(
+            "INSERT INTO cat_profile (id, weight, is_neutered, activity_level) VALUES (?, ?, ?, ?)",
+            backup_cur.execute("SELECT * FROM cat_profile")
+        )
         
         # 遷移設定
-        backup_cur.execute("SELECT * FROM settings")
-        settings = backup_cur.fetchall()
-        for setting in settings:
-            new_cur.execute(
-                "INSERT INTO settings (id, timezone) VALUES (?, ?)",
-                setting
-            )
+        new_cur.executemany(
+            "INSERT INTO settings (id, timezone) VALUES (?, ?)",
+            backup_cur.execute("SELECT * FROM settings")
+        )
             
         # 遷移管理員帳號，並設定新欄位的預設值
-        backup_cur.execute("SELECT * FROM admin")
-        admins = backup_cur.fetchall()
         current_time = datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
-        for admin in admins:
-            new_cur.execute(
-                """INSERT INTO admin 
-                   (id, username, password_hash, last_password_change, 
-                    password_history, failed_login_attempts, 
-                    last_failed_login, account_locked_until, 
-                    force_password_change)
-                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-                (admin[0], admin[1], admin[2], current_time, 
-                 '[]', 0, None, None, True)
-            )
+        new_cur.executemany(
+            """INSERT INTO admin 
+               (id, username, password_hash, last_password_change, 
+                password_history, failed_login_attempts, 
+                last_failed_login, account_locked_until, 
+                force_password_change)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+            ((admin[0], admin[1], admin[2], current_time, '[]', 0, None, None, True)
+             for admin in backup_cur.execute("SELECT * FROM admin"))
+        )
             
         # 遷移生平記事
-        backup_cur.execute("SELECT * FROM biography")
-        biographies = backup_cur.fetchall()
-        for bio in biographies:
-            new_cur.execute(
-                """INSERT INTO biography 
-                   (id, date, content, created_at, updated_at)
-                   VALUES (?, ?, ?, ?, ?)""",
-                bio
-            )
+        new_cur.executemany(
+            """INSERT INTO biography 
+               (id, date, content, created_at, updated_at)
+               VALUES (?, ?, ?, ?, ?)""",
+            backup_cur.execute("SELECT * FROM biography")
+        )
             
         # 遷移照片資料
-        backup_cur.execute("SELECT * FROM photo")
-        photos = backup_cur.fetchall()
-        for photo in photos:
-            new_cur.execute(
-                """INSERT INTO photo 
-                   (id, filename, original_filename, date_taken, 
-                    description, photographer, upload_date, is_approved)
-                   VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
-                photo
-            )
+        new_cur.executemany(
+            """INSERT INTO photo 
+               (id, filename, original_filename, date_taken, 
+                description, photographer, upload_date, is_approved)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+            backup_cur.execute("SELECT * FROM photo")
+        )
             
         # 提交更改
         new_conn.commit()
+
+        # 依遷移後的餵食記錄重建每日攝取量彙總
+        with app.app_context():
+            rebuild_daily_intake()
+            db.session.commit()
         print("資料遷移完成！")
         
     except Exception as e:
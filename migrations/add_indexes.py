@@ -0,0 +1,69 @@
+"""添加熱門查詢所需的索引
+
+此腳本將為 feeding_record、photo 及 biography 表添加索引。
+熱門查詢是否使用這些索引由 tests/test_query_plans.py 以 app.py 實際的 ORM 查詢檢查。
+"""
+from flask import Flask
+from flask_sqlalchemy import SQLAlchemy
+import sys
+import os
+from sqlalchemy import text
+
+# 獲取專案根目錄的絕對路徑
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DB_PATH = os.path.join(BASE_DIR, 'instance', 'catfeed.db')
+
+# 創建一個新的 Flask 應用和資料庫實例
+app = Flask(__name__)
+app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{DB_PATH}'
+db = SQLAlchemy(app)
+
+INDEXES = {
+    'ix_feeding_record_timestamp_id': 'feeding_record (timestamp, id)',
+    'ix_photo_approved_date_taken': 'photo (is_approved, date_taken DESC)',
+    'ix_photo_approved_upload_date': 'photo (is_approved, upload_date DESC)',
+    'ix_biography_date': 'biography (date DESC)',
+}
+
+def upgrade():
+    """執行資料庫升級"""
+    with app.app_context():
+        try:
+            with db.engine.connect() as conn:
+                for name, definition in INDEXES.items():
+                    conn.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON {definition};"))
+
+                # 更新查詢規劃器的統計資訊
+                conn.execute(text("ANALYZE;"))
+
+                # 提交事務
+                conn.commit()
+
+            print("資料庫升級完成")
+
+        except Exception as e:
+            print(f"錯誤：{str(e)}")
+            raise
+
+def downgrade():
+    """執行資料庫降級（回滾）"""
+    with app.app_context():
+        try:
+            with db.engine.connect() as conn:
+                for name in INDEXES:
+                    conn.execute(text(f"DROP INDEX IF EXISTS {name};"))
+
+                # 提交事務
+                conn.commit()
+
+            print("資料庫降級完成")
+
+        except Exception as e:
+            print(f"錯誤：{str(e)}")
+            raise
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == 'downgrade':
+        downgrade()
+    else:
+        upgrade()
@@ -0,0 +1,83 @@
+"""添加背景工作佇列
+
+此腳本將建立 job 表，並為 Photo 表添加處理狀態欄位。
+"""
+from flask import Flask
+from flask_sqlalchemy import SQLAlchemy
+import sys
+import os
+from sqlalchemy import text
+
+# 獲取專案根目錄的絕對路徑
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DB_PATH = os.path.join(BASE_DIR, 'instance', 'catfeed.db')
+
+# 創建一個新的 Flask 應用和資料庫實例
+app = Flask(__name__)
+app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{DB_PATH}'
+db = SQLAlchemy(app)
+
+def upgrade():
+    """執行資料庫升級"""
+    with app.app_context():
+        try:
+            with db.engine.connect() as conn:
+                conn.execute(text("""
+                CREATE TABLE IF NOT EXISTS job (
+                    id INTEGER PRIMARY KEY,
+                    kind VARCHAR(50) NOT NULL,
+                    payload JSON,
+                    status VARCHAR(20) NOT NULL DEFAULT 'queued',
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    max_attempts INTEGER NOT NULL DEFAULT 3,
+                    run_after DATETIME NOT NULL,
+                    locked_until DATETIME,
+                    last_error TEXT,
+                    created_at DATETIME NOT NULL,
+                    finished_at DATETIME
+                );
+                """))
+                conn.execute(text("""
+                CREATE INDEX IF NOT EXISTS ix_job_status_run_after ON job (status, run_after);
+                """))
+
+                # 既有照片已於上傳時處理完成
+                columns = {row[1] for row in conn.execute(text("PRAGMA table_info(photo);"))}
+                if 'processing_status' not in columns:
+                    conn.execute(text("""
+                    ALTER TABLE photo ADD COLUMN processing_status VARCHAR(20) DEFAULT 'done';
+                    """))
+
+                # 提交事務
+                conn.commit()
+
+            print("資料庫升級完成")
+
+        except Exception as e:
+            print(f"錯誤：{str(e)}")
+            raise
+
+def downgrade():
+    """執行資料庫降級（回滾）"""
+    with app.app_context():
+        try:
+            with db.engine.connect() as conn:
+                conn.execute(text("DROP TABLE IF EXISTS job;"))
+                columns = {row[1] for row in conn.execute(text("PRAGMA table_info(photo);"))}
+                if 'processing_status' in columns:
+                    conn.execute(text("ALTER TABLE photo DROP COLUMN processing_status;"))
+
+                # 提交事務
+                conn.commit()
+
+            print("資料庫降級完成")
+
+        except Exception as e:
+            print(f"錯誤：{str(e)}")
+            raise
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == 'downgrade':
+        downgrade()
+    else:
+        upgrade()
@@ -0,0 +1,65 @@
+"""添加照片內容雜湊欄位
+
+此腳本將為 Photo 表添加 content_hash 欄位及索引。
+既有照片沿用原本的檔名，刪除時同樣會檢查是否仍有其他記錄引用同一個檔案。
+"""
+from flask import Flask
+from flask_sqlalchemy import SQLAlchemy
+import sys
+import os
+from sqlalchemy import text
+
+# 獲取專案根目錄的絕對路徑
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DB_PATH = os.path.join(BASE_DIR, 'instance', 'catfeed.db')
+
+# 創建一個新的 Flask 應用和資料庫實例
+app = Flask(__name__)
+app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{DB_PATH}'
+db = SQLAlchemy(app)
+
+def upgrade():
+    """執行資料庫升級"""
+    with app.app_context():
+        try:
+            with db.engine.connect() as conn:
+                columns = {row[1] for row in conn.execute(text("PRAGMA table_info(photo);"))}
+                if 'content_hash' not in columns:
+                    conn.execute(text("ALTER TABLE photo ADD COLUMN content_hash VARCHAR(64);"))
+                conn.execute(text("""
+                CREATE INDEX IF NOT EXISTS ix_photo_content_hash ON photo (content_hash);
+                """))
+
+                # 提交事務
+                conn.commit()
+
+            print("資料庫升級完成")
+
+        except Exception as e:
+            print(f"錯誤：{str(e)}")
+            raise
+
+def downgrade():
+    """執行資料庫降級（回滾）"""
+    with app.app_context():
+        try:
+            with db.engine.connect() as conn:
+                conn.execute(text("DROP INDEX IF EXISTS ix_photo_content_hash;"))
+                columns = {row[1] for row in conn.execute(text("PRAGMA table_info(photo);"))}
+                if 'content_hash' in columns:
+                    conn.execute(text("ALTER TABLE photo DROP COLUMN content_hash;"))
+
+                # 提交事務
+                conn.commit()
+
+            print("資料庫降級完成")
+
+        except Exception as e:
+            print(f"錯誤：{str(e)}")
+            raise
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == 'downgrade':
+        downgrade()
+    else:
+        upgrade()
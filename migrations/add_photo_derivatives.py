@@ -0,0 +1,76 @@
+"""添加照片衍生圖片相關欄位
+
+此腳本將為 Photo 表添加原圖及衍生圖片尺寸欄位。
+新增欄位後請執行 flask --app app backfill-photos 為既有照片產生衍生圖片。
+"""
+from flask import Flask
+from flask_sqlalchemy import SQLAlchemy
+import sys
+import os
+from sqlalchemy import text
+
+# 獲取專案根目錄的絕對路徑
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DB_PATH = os.path.join(BASE_DIR, 'instance', 'catfeed.db')
+
+# 創建一個新的 Flask 應用和資料庫實例
+app = Flask(__name__)
+app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{DB_PATH}'
+db = SQLAlchemy(app)
+
+COLUMNS = {
+    'width': 'INTEGER',
+    'height': 'INTEGER',
+    'thumb_width': 'INTEGER',
+    'thumb_height': 'INTEGER',
+    'medium_width': 'INTEGER',
+    'medium_height': 'INTEGER',
+    'has_derivatives': 'BOOLEAN DEFAULT 0',
+}
+
+def get_existing_columns(conn):
+    return {row[1] for row in conn.execute(text("PRAGMA table_info(photo);"))}
+
+def upgrade():
+    """執行資料庫升級"""
+    with app.app_context():
+        try:
+            with db.engine.connect() as conn:
+                existing = get_existing_columns(conn)
+                for name, definition in COLUMNS.items():
+                    if name not in existing:
+                        conn.execute(text(f"ALTER TABLE photo ADD COLUMN {name} {definition};"))
+
+                # 提交事務
+                conn.commit()
+
+            print("資料庫升級完成")
+
+        except Exception as e:
+            print(f"錯誤：{str(e)}")
+            raise
+
+def downgrade():
+    """執行資料庫降級（回滾）"""
+    with app.app_context():
+        try:
+            with db.engine.connect() as conn:
+                existing = get_existing_columns(conn)
+                for name in COLUMNS:
+                    if name in existing:
+                        conn.execute(text(f"ALTER TABLE photo DROP COLUMN {name};"))
+
+                # 提交事務
+                conn.commit()
+
+            print("資料庫降級完成")
+
+        except Exception as e:
+            print(f"錯誤：{str(e)}")
+            raise
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == 'downgrade':
+        downgrade()
+    else:
+        upgrade()
@@ -19,6 +19,9 @@ if ! docker ps | grep -q catfeed_redis; then
         redis:7.2-alpine redis-server --appendonly yes
 fi
 
+# 建立資料表及預設資料（只在啟動前執行一次，工作進程不再於匯入時初始化）
+flask --app app init
+
 # 啟動 Gunicorn
 echo "啟動 Catfeed 應用程式..."
-exec gunicorn -c gunicorn.conf.py app:app 
\ No newline at end of file
+exec gunicorn -c gunicorn.conf.py 'app:create_app()' 
\ No newline at end of file
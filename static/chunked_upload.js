@@ -0,0 +1,97 @@
+// 分段上傳照片：將檔案切成小段依序上傳，網路中斷時可從伺服器記錄的位置續傳。
+// 不支援時回退為一般表單送出。
+(function() {
+    const MAX_RETRIES = 3;
+
+    async function request(url, options) {
+        const response = await fetch(url, options);
+        const data = await response.json().catch(() => ({}));
+        return { response, data };
+    }
+
+    async function uploadChunks(baseUrl, file, upload) {
+        let offset = upload.offset;
+        let retries = 0;
+        while (offset < file.size) {
+            const chunk = file.slice(offset, offset + upload.chunk_size);
+            try {
+                const { response, data } = await request(`${baseUrl}/${upload.upload_id}`, {
+                    method: 'PUT',
+                    headers: { 'Upload-Offset': String(offset) },
+                    body: chunk
+                });
+                if (response.ok) {
+                    offset = data.offset;
+                    retries = 0;
+                    continue;
+                }
+                if (response.status !== 409 || data.offset == null) {
+                    throw new Error(data.error || '上傳失敗');
+                }
+                // 位置不符時從伺服器記錄的位置續傳
+                offset = data.offset;
+            } catch (error) {
+                if (++retries > MAX_RETRIES) {
+                    throw error;
+                }
+                const { response, data } = await request(`${baseUrl}/${upload.upload_id}`, { method: 'GET' });
+                if (!response.ok) {
+                    throw new Error(data.error || '上傳失敗');
+                }
+                offset = data.offset;
+            }
+        }
+    }
+
+    async function chunkedSubmit(form) {
+        const baseUrl = form.dataset.chunkedUploadUrl;
+        const fileInput = form.querySelector('input[type="file"]');
+        const file = fileInput.files[0];
+        // 在第一次 await 之前讀取表單欄位，頁面在上傳期間重置表單也不影響完成請求
+        const fields = new FormData(form);
+        fields.delete(fileInput.name);
+
+        const { response, data: upload } = await request(baseUrl, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ filename: file.name, size: file.size })
+        });
+        if (!response.ok) {
+            throw new Error(upload.error || '上傳失敗');
+        }
+
+        await uploadChunks(baseUrl, file, upload);
+
+        const result = await request(`${baseUrl}/${upload.upload_id}/complete`, {
+            method: 'POST',
+            body: fields
+        });
+        if (!result.response.ok) {
+            throw new Error(result.data.error || '上傳失敗');
+        }
+        window.location.href = result.data.redirect;
+    }
+
+    document.addEventListener('DOMContentLoaded', function() {
+        if (!window.fetch || !window.Blob || !Blob.prototype.slice) {
+            return;
+        }
+        document.querySelectorAll('form[data-chunked-upload-url]').forEach(form => {
+            form.addEventListener('submit', function(event) {
+                const fileInput = form.querySelector('input[type="file"]');
+                if (!fileInput || !fileInput.files.length) {
+                    return;
+                }
+                event.preventDefault();
+                // 上傳期間頁面不可重置表單，失敗時才能以原本的欄位及檔案改用一般表單送出
+                form.dataset.chunkedUploading = 'true';
+                chunkedSubmit(form).catch(() => {
+                    // 分段上傳失敗時改用一般表單送出
+                    form.submit();
+                }).finally(() => {
+                    delete form.dataset.chunkedUploading;
+                });
+            });
+        });
+    });
+})();
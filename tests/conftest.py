@@ -0,0 +1,69 @@
+"""測試共用設定
+
+app.py 在匯入時讀取環境變數，因此先指定臨時的資料庫、上傳目錄及不需外部服務的存儲再匯入；
+每個測試使用新建的資料表，結束後刪除。
+"""
+import os
+import sys
+import tempfile
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+WORKDIR = tempfile.mkdtemp(prefix='catfeed-test-')
+
+os.environ.update(
+    FLASK_SECRET_KEY='test',
+    DATABASE_URL=f"sqlite:///{os.path.join(WORKDIR, 'catfeed.db')}",
+    UPLOAD_FOLDER=os.path.join(WORKDIR, 'uploads'),
+    REDIS_ENABLED='false',
+    RATELIMIT_STORAGE_URI='memory://',
+    METRICS_ENABLED='false',
+    PROFILE_SLOW_REQUESTS='false',
+    PROFILE_DIR=os.path.join(WORKDIR, 'profiles'),
+    GUNICORN_WORKER_CLASS='sync',
+    PASSWORD_SCORER_PROCESSES='0',
+    # 測試不需要正式的雜湊工作因子
+    PASSWORD_HASH_METHOD='pbkdf2:sha256:1000',
+    # 模擬位於一層反向代理之後
+    PROXY_FIX_X_FOR='1',
+)
+sys.path.insert(0, ROOT)
+
+import app as catfeed  # noqa: E402
+from auth import limiter as auth_limiter  # noqa: E402
+
+@pytest.fixture
+def app(tmp_path):
+    """已建立資料表及預設資料的應用程式（測試模式，超過查詢預算時拋出例外）"""
+    upload_folder = tmp_path / 'uploads'
+    upload_folder.mkdir()
+    catfeed.app.config.update(
+        TESTING=True,
+        UPLOAD_FOLDER=str(upload_folder),
+        PAGE_CACHE_VERSION_FILE=str(tmp_path / 'data_version'),
+        TIMEZONE_VERSION_FILE=str(tmp_path / 'timezone_version'),
+    )
+    catfeed.page_cache.local.clear()
+    catfeed.invalidate_timezone_cache()
+    catfeed.limiter.reset()
+    auth_limiter._blocklist['local'] = {}
+    with catfeed.app.app_context():
+        catfeed.init_db()
+    yield catfeed.app
+    with catfeed.app.app_context():
+        catfeed.db.session.remove()
+        catfeed.db.drop_all()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+@pytest.fixture
+def admin_client(app):
+    """已登入管理員的測試客戶端"""
+    client = app.test_client()
+    with app.app_context():
+        admin_id = catfeed.Admin.query.first().id
+    with client.session_transaction() as session:
+        session['_user_id'] = str(admin_id)
+    return client
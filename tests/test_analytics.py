@@ -0,0 +1,51 @@
+"""攝取量統計測試：合併相鄰區間（max_points）時的邊界情況"""
+from datetime import date, datetime
+from conftest import catfeed
+from analytics import intake_series
+from analytics.intake import EPOCH
+
+def day_key(day):
+    return (day - EPOCH).days
+
+def test_range_without_records_with_max_points(app, client):
+    response = client.get('/api/analytics/intake?start=2020-01-01&end=2020-01-30&max_points=12')
+
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data['buckets_per_point'] == 3
+    assert len(data['series']['start']) == 10
+    assert data['totals']['calories'] == 0
+    assert data['totals']['record_count'] == 0
+    assert data['series']['amount_by_food_type'] == {}
+
+def test_merge_keeps_partial_last_point():
+    start, end = date(2024, 1, 1), date(2024, 1, 10)
+    rows = [(day_key(date(2024, 1, d)), '乾糧', 10.0, 40.0, 1) for d in range(1, 11)]
+    rows.append((day_key(date(2024, 1, 10)), '貓條', 1.0, 5.0, 1))
+
+    series = intake_series(rows, start, end, 'day', 200.0, max_points=3)
+
+    # 10 天每 4 天合併一點，最後一點只有 2 天
+    assert series['buckets_per_point'] == 4
+    assert series['series']['start'] == ['2024-01-01', '2024-01-05', '2024-01-09']
+    assert series['series']['days'] == [4, 4, 2]
+    assert series['series']['calories'] == [160.0, 160.0, 85.0]
+    assert series['series']['amount_by_food_type'] == {'乾糧': [40.0, 40.0, 20.0], '貓條': [0.0, 0.0, 1.0]}
+    assert series['totals']['calories'] == 405.0
+    assert series['totals']['record_count'] == 11
+    assert series['totals']['treat_count'] == 1
+
+def test_api_totals_unchanged_by_max_points(app, client):
+    with app.app_context():
+        catfeed.import_feeding_records([{
+            'timestamp': datetime(2024, 1, d, 4, 0), 'food_type': '乾糧', 'amount': 10, 'unit': '克',
+            'calories': 40.0, 'notes': None, 'feeder_nickname': '小明'
+        } for d in range(1, 11)])
+    url = '/api/analytics/intake?start=2024-01-01&end=2024-01-10'
+
+    daily = client.get(url).get_json()
+    merged = client.get(url + '&max_points=3').get_json()
+
+    assert merged['totals'] == daily['totals']
+    assert len(merged['series']['start']) == 3
+    assert sum(merged['series']['calories']) == sum(daily['series']['calories'])
@@ -0,0 +1,37 @@
+"""餵食記錄匯出測試：鍵集分批讀取，且每批之間不佔用資料庫連線"""
+import json
+from datetime import datetime
+from conftest import catfeed
+
+def add_records(app, timestamps):
+    with app.app_context():
+        for timestamp in timestamps:
+            catfeed.db.session.add(catfeed.FeedingRecord(
+                timestamp=timestamp, food_type='乾飼料', amount=10, unit='克', calories=38.0, feeder_nickname='小明'
+            ))
+        catfeed.db.session.commit()
+        return [record.id for record in catfeed.FeedingRecord.query.order_by(
+            catfeed.FeedingRecord.timestamp, catfeed.FeedingRecord.id)]
+
+def test_export_reads_batches_by_keyset(app, admin_client):
+    # 同一時間的多筆記錄跨越批次邊界
+    same = datetime(2024, 1, 2, 8, 0)
+    ids = add_records(app, [datetime(2024, 1, 1, 8, 0), same, same, same, same, datetime(2024, 1, 3, 8, 0), same])
+    app.config['EXPORT_BATCH_SIZE'] = 3
+
+    response = admin_client.get('/api/records/export?format=ndjson', buffered=False)
+    chunks = []
+    for chunk in response.response:
+        chunks.append(chunk)
+        # 傳送每個區塊時連線已歸還連線池
+        assert catfeed.db.engine.pool.checkedout() == 0
+    response.close()
+
+    exported = [json.loads(line) for line in b''.join(chunks).decode().splitlines()]
+    assert [row['id'] for row in exported] == ids
+    assert len(chunks) == 3
+
+def test_export_csv_header_only_when_empty(app, admin_client):
+    response = admin_client.get('/api/records/export?format=csv')
+    assert response.status_code == 200
+    assert response.get_data(as_text=True).splitlines() == [','.join(catfeed.RECORD_EXPORT_FIELDS)]
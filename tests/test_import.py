@@ -0,0 +1,31 @@
+"""餵食記錄匯入測試：不合法的數值在寫入前被拒絕"""
+import json
+import pytest
+from conftest import catfeed
+
+def ndjson(*rows):
+    return '\n'.join(json.dumps(row) for row in rows)
+
+def record(**values):
+    row = {'timestamp': '2024-01-01T08:00:00', 'food_type': '乾飼料', 'amount': 10, 'feeder_nickname': '小明'}
+    row.update(values)
+    return row
+
+@pytest.mark.parametrize('values', [
+    {'amount': 'nan'},
+    {'amount': 'inf'},
+    {'calories': '-inf'},
+    {'calories': 'NaN'},
+])
+def test_import_rejects_non_finite_numbers(app, admin_client, values):
+    response = admin_client.post('/api/records/import?format=ndjson', data=ndjson(record(), record(**values)))
+
+    assert response.status_code == 400
+    assert response.get_json()['details'] == ['第 2 筆：amount 及 calories 必須是有限的數字']
+    with app.app_context():
+        assert catfeed.FeedingRecord.query.count() == 0
+
+def test_import_accepts_valid_rows(app, admin_client):
+    response = admin_client.post('/api/records/import?format=ndjson', data=ndjson(record(), record(calories='12.5')))
+
+    assert response.get_json() == {'imported': 2}
@@ -0,0 +1,50 @@
+"""IP 封鎖測試：以代理轉送的客戶端 IP 為鍵，並經由共享存儲在工作進程間生效"""
+import pytest
+from conftest import auth_limiter, catfeed
+from auth.shared_storage import SharedMemoryStorage
+
+BLOCKED = '203.0.113.5'
+OTHER = '203.0.113.9'
+
+def get_about(client, ip):
+    return client.get('/about', headers={'X-Forwarded-For': ip})
+
+def test_block_applies_to_forwarded_client_only(app, client):
+    with app.test_request_context():
+        auth_limiter.block_ip(BLOCKED, 900)
+
+    assert get_about(client, BLOCKED).status_code == 429
+    # 其他經由同一個代理連入的訪客不受影響
+    assert get_about(client, OTHER).status_code == 200
+    assert client.get('/about').status_code == 200
+
+@pytest.fixture
+def shared_storage(tmp_path, monkeypatch):
+    """速率限制器改用 /dev/shm 式的共享記憶體存儲（測試中放在臨時目錄）"""
+    storage = SharedMemoryStorage(f"shm://{tmp_path / 'ratelimit.db'}")
+    monkeypatch.setattr(catfeed.limiter, '_storage', storage)
+    monkeypatch.setattr(auth_limiter, '_blocklist', {'local': {}, 'synced': {}, 'synced_at': float('-inf')})
+    return storage
+
+def test_block_is_shared_through_bulk_sync(app, client, shared_storage):
+    with app.test_request_context():
+        auth_limiter.block_ip(BLOCKED, 900)
+    # 模擬未設定此封鎖的其他工作進程：下次同步前只查詢本進程的字典
+    auth_limiter._blocklist['local'] = {}
+    auth_limiter._blocklist['synced_at'] = float('-inf')
+
+    assert get_about(client, BLOCKED).status_code == 429
+    assert BLOCKED in auth_limiter._blocklist['synced']
+    assert get_about(client, OTHER).status_code == 200
+    with app.test_request_context():
+        assert auth_limiter.blocked_ips([BLOCKED, OTHER]) == {BLOCKED}
+
+def test_request_check_does_not_query_storage(app, client, shared_storage, monkeypatch):
+    with app.test_request_context():
+        auth_limiter.sync_blocklist(force=True)
+
+    def fail(*args, **kwargs):
+        raise AssertionError('請求時不應查詢共享存儲')
+    monkeypatch.setattr(shared_storage, 'expirations', fail)
+    monkeypatch.setattr(shared_storage, 'get', fail)
+    assert get_about(client, OTHER).status_code == 200
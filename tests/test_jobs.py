@@ -0,0 +1,58 @@
+"""背景工作佇列：照片處理失敗時的重試與最終失敗"""
+import io
+from datetime import datetime
+from PIL import Image
+import app as catfeed
+from media import store_stream
+
+def add_photo(app, data):
+    filename, digest = store_stream(io.BytesIO(data), app.config['UPLOAD_FOLDER'], 'jpg')
+    photo = catfeed.add_photo(filename, digest, 'cat.jpg', datetime(2024, 1, 1), {'photographer': '爸爸'})
+    return photo.id
+
+def run_next_job():
+    job = catfeed.claim_next_job()
+    assert job is not None
+    return catfeed.run_job(job)
+
+def make_due(job_id):
+    catfeed.db.session.get(catfeed.Job, job_id).run_after = datetime.utcnow()
+    catfeed.db.session.commit()
+
+def test_photo_job_generates_derivatives(app):
+    buffer = io.BytesIO()
+    Image.new('RGB', (800, 600), (200, 120, 40)).save(buffer, 'JPEG')
+    with app.app_context():
+        photo_id = add_photo(app, buffer.getvalue())
+        assert run_next_job()
+        photo = catfeed.db.session.get(catfeed.Photo, photo_id)
+        assert photo.processing_status == 'done'
+        assert photo.has_derivatives
+        assert (photo.width, photo.height) == (800, 600)
+
+def test_photo_job_retries_before_marking_failed(app):
+    with app.app_context():
+        photo_id = add_photo(app, b'not an image')
+        job_id = catfeed.Job.query.one().id
+        max_attempts = catfeed.db.session.get(catfeed.Job, job_id).max_attempts
+        assert max_attempts > 1
+
+        for attempt in range(1, max_attempts):
+            assert not run_next_job()
+            job = catfeed.db.session.get(catfeed.Job, job_id)
+            photo = catfeed.db.session.get(catfeed.Photo, photo_id)
+            # 尚未用盡重試次數：工作重新排入佇列並延後執行，照片不會被標記為失敗或完成
+            assert job.status == 'queued'
+            assert job.attempts == attempt
+            assert job.run_after > datetime.utcnow()
+            assert job.last_error
+            assert photo.processing_status not in ('done', 'failed')
+            assert catfeed.claim_next_job() is None
+            make_due(job_id)
+
+        assert not run_next_job()
+        job = catfeed.db.session.get(catfeed.Job, job_id)
+        photo = catfeed.db.session.get(catfeed.Photo, photo_id)
+        assert job.status == 'failed'
+        assert photo.processing_status == 'failed'
+        assert not photo.has_derivatives
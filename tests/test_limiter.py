@@ -0,0 +1,79 @@
+"""rate_limit_by_ip / rate_limit_by_user 裝飾器測試"""
+import pytest
+from limits import parse_many
+from werkzeug.exceptions import TooManyRequests
+from conftest import catfeed
+from auth.limiter import rate_limit_by_ip, rate_limit_by_user
+
+def limited_view(decorator, name):
+    calls = []
+
+    def view():
+        calls.append(1)
+        return 'ok'
+    view.__name__ = name
+    return decorator(view), calls
+
+def test_view_runs_exactly_once_per_allowed_request(app):
+    view, calls = limited_view(rate_limit_by_ip('3 per minute'), 'once_view')
+    with app.test_request_context():
+        for expected in range(1, 4):
+            assert view() == 'ok'
+            assert len(calls) == expected
+        with pytest.raises(TooManyRequests):
+            view()
+    assert len(calls) == 3
+
+def test_rejected_request_does_not_consume_other_limits(app):
+    view, calls = limited_view(rate_limit_by_user('2 per minute;1 per hour'), 'multi_limit_view')
+    with app.test_request_context():
+        view()
+        with pytest.raises(TooManyRequests) as exc:
+            view()
+        assert '1 per 1 hour' in exc.value.description
+
+        minute, _ = parse_many('2 per minute;1 per hour')
+        stats = catfeed.limiter.limiter.get_window_stats(minute, '127.0.0.1', 'test_limiter.multi_limit_view')
+        assert stats.remaining == 1
+    assert len(calls) == 1
+
+@pytest.fixture
+def broken_storage(monkeypatch):
+    """讓主要存儲的每次操作都失敗（模擬 Redis 中斷）"""
+    def fail(*args, **kwargs):
+        raise ConnectionError('storage unreachable')
+    monkeypatch.setattr(catfeed.limiter._limiter, 'test', fail)
+    monkeypatch.setattr(catfeed.limiter._limiter, 'hit', fail)
+    monkeypatch.setattr(catfeed.limiter, '_storage_dead', False)
+
+def test_storage_outage_falls_back_to_memory(app, broken_storage):
+    view, calls = limited_view(rate_limit_by_ip('1 per minute'), 'fallback_view')
+    with app.test_request_context():
+        assert view() == 'ok'
+        assert catfeed.limiter._storage_dead
+        # 內存計數仍然限制後續請求
+        with pytest.raises(TooManyRequests):
+            view()
+    assert len(calls) == 1
+
+def test_storage_outage_without_fallback(app, broken_storage, monkeypatch):
+    monkeypatch.setattr(catfeed.limiter, '_in_memory_fallback_enabled', False)
+    view, calls = limited_view(rate_limit_by_ip('1 per minute'), 'no_fallback_view')
+    with app.test_request_context():
+        monkeypatch.setattr(catfeed.limiter, '_swallow_errors', True)
+        assert view() == 'ok'
+        monkeypatch.setattr(catfeed.limiter, '_swallow_errors', False)
+        with pytest.raises(ConnectionError):
+            view()
+    assert len(calls) == 1
+
+def test_single_limit_uses_one_storage_operation(app, monkeypatch):
+    calls = []
+    rate_limiter = catfeed.limiter.limiter
+    monkeypatch.setattr(rate_limiter, 'test', lambda *args: calls.append('test') or True)
+    original_hit = rate_limiter.hit
+    monkeypatch.setattr(rate_limiter, 'hit', lambda *args: calls.append('hit') or original_hit(*args))
+    view, _ = limited_view(rate_limit_by_ip('5 per minute'), 'single_limit_view')
+    with app.test_request_context():
+        view()
+    assert calls == ['hit']
@@ -0,0 +1,43 @@
+"""登入失敗計數測試：只有共享的存儲才延後寫入資料庫"""
+import pytest
+from conftest import catfeed
+from auth.login_attempts import pending_failures, record_failure
+from auth.shared_storage import SharedMemoryStorage
+
+def failed_login(client):
+    return client.post('/admin/login', data={'username': 'admin', 'password': 'wrong'})
+
+def admin():
+    return catfeed.Admin.query.filter_by(username='admin').first()
+
+def test_memory_storage_writes_failures_to_database(app, client):
+    # 測試設定使用 memory://，計數只存在於本進程
+    failed_login(client)
+    failed_login(client)
+    with app.app_context():
+        assert record_failure(admin().id) is None
+        assert pending_failures(admin().id) is None
+        assert admin().failed_login_attempts == 2
+
+def test_lockout_counts_across_workers_with_memory_storage(app, client):
+    for _ in range(4):
+        failed_login(client)
+    # 模擬工作進程重啟：進程內的計數遺失，資料庫中的次數仍然保留
+    catfeed.limiter.reset()
+    response = failed_login(client)
+    assert '帳戶已被鎖定'.encode() in response.data
+    with app.app_context():
+        assert admin().account_locked_until is not None
+
+@pytest.fixture
+def shared_storage(tmp_path, monkeypatch):
+    storage = SharedMemoryStorage(f"shm://{tmp_path / 'ratelimit.db'}")
+    monkeypatch.setattr(catfeed.limiter, '_storage', storage)
+    return storage
+
+def test_shared_storage_defers_database_writes(app, client, shared_storage):
+    failed_login(client)
+    failed_login(client)
+    with app.app_context():
+        assert pending_failures(admin().id) == 2
+        assert not admin().failed_login_attempts
@@ -0,0 +1,49 @@
+"""頁面快取：首頁的今日統計跨日後重新產生，快取內容不含依目前時間決定的編輯按鈕"""
+from datetime import date, datetime, timedelta
+import app as catfeed
+
+def fixed_clock(moment):
+    class FixedDatetime(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return tz.localize(moment) if tz is not None else moment
+    return FixedDatetime
+
+def test_index_cache_is_keyed_by_local_date(app, client, monkeypatch):
+    with app.app_context():
+        catfeed.db.session.add_all([
+            catfeed.DailyIntake(date=date(2024, 3, 1), total_calories=111.0, treat_count=0, record_count=1),
+            catfeed.DailyIntake(date=date(2024, 3, 2), total_calories=222.0, treat_count=0, record_count=1),
+        ])
+        catfeed.db.session.commit()
+
+    monkeypatch.setattr(catfeed, 'datetime', fixed_clock(datetime(2024, 3, 1, 23, 50)))
+    first = client.get('/')
+    assert first.headers['X-Cache'] == 'MISS'
+    assert '已攝取: 111.0 大卡' in first.get_data(as_text=True)
+    assert client.get('/').headers['X-Cache'] == 'HIT'
+
+    # 沒有任何資料寫入，但跨日後不再使用前一天的快取
+    monkeypatch.setattr(catfeed, 'datetime', fixed_clock(datetime(2024, 3, 2, 0, 10)))
+    second = client.get('/')
+    assert second.headers['X-Cache'] == 'MISS'
+    assert '已攝取: 222.0 大卡' in second.get_data(as_text=True)
+
+def test_cached_rows_leave_edit_window_to_the_browser(app, client):
+    now = datetime.utcnow()
+    with app.app_context():
+        catfeed.import_feeding_records([{
+            'timestamp': timestamp,
+            'food_type': '乾糧',
+            'amount': 5.0,
+            'unit': '克',
+            'calories': 17.5,
+            'notes': None,
+            'feeder_nickname': '媽媽',
+        } for timestamp in (now, now - timedelta(hours=2))])
+
+    html = client.get('/').get_data(as_text=True)
+    # 新舊記錄的 HTML 相同（操作按鈕預設隱藏並帶有時間），快取後仍由瀏覽器判斷是否可編輯
+    assert html.count('record-actions d-none') == 2
+    assert html.count('data-record-id=') == 2
+    assert html.count('<small class="text-muted countdown"></small>') == 2
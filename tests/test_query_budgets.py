@@ -0,0 +1,57 @@
+"""路由查詢預算測試
+
+以管理員及訪客身分請求所有宣告 @query_budget 的 GET 路由；測試模式下超過預算會拋出
+QueryBudgetExceeded，每筆記錄各查詢一次資料庫之類的回歸會讓測試失敗。
+"""
+from datetime import datetime, timedelta
+import pytest
+from conftest import catfeed
+from metrics import QueryBudgetExceeded
+
+BUDGET_RULES = sorted(
+    rule.rule for rule in catfeed.app.url_map.iter_rules()
+    if getattr(catfeed.app.view_functions[rule.endpoint], 'query_budget', None) is not None
+    and 'GET' in rule.methods and not rule.arguments
+)
+
+@pytest.fixture
+def seeded(app):
+    """足以讓逐筆查詢超過預算的記錄、照片及生平記事"""
+    now = datetime.utcnow()
+    with app.app_context():
+        catfeed.import_feeding_records([{
+            'timestamp': now - timedelta(hours=i),
+            'food_type': '乾糧',
+            'amount': 5,
+            'unit': '克',
+            'calories': catfeed.calculate_calories('乾糧', 5),
+            'notes': None,
+            'feeder_nickname': f'餵食者{i % 7}'
+        } for i in range(200)])
+        for i in range(12):
+            catfeed.db.session.add(catfeed.Photo(
+                filename=f'photo{i}.jpg', original_filename=f'photo{i}.jpg', date_taken=now - timedelta(days=i),
+                photographer=f'攝影者{i}', is_approved=i % 2 == 0
+            ))
+            catfeed.db.session.add(catfeed.Biography(date=now - timedelta(days=30 * i), content=f'記事 {i}'))
+        catfeed.db.session.commit()
+    return app
+
+def test_budget_rules_found():
+    assert '/' in BUDGET_RULES and '/api/records' in BUDGET_RULES
+
+def test_exceeding_budget_fails(seeded, client, monkeypatch):
+    monkeypatch.setattr(catfeed.app.view_functions['index'], 'query_budget', 1)
+    with pytest.raises(QueryBudgetExceeded):
+        client.get('/')
+
+@pytest.mark.parametrize('rule', BUDGET_RULES)
+def test_route_within_query_budget_as_admin(seeded, admin_client, rule):
+    response = admin_client.get(rule)
+    # 已登入時登入頁面會重新導向
+    assert response.status_code in (200, 302)
+
+@pytest.mark.parametrize('rule', BUDGET_RULES)
+def test_route_within_query_budget_anonymous(seeded, client, rule):
+    response = client.get(rule)
+    assert response.status_code in (200, 302)
@@ -0,0 +1,43 @@
+"""熱門查詢的查詢計畫
+
+以 EXPLAIN QUERY PLAN 檢查 app.py 實際建立的 ORM 查詢，確認使用對應的索引且沒有全表掃描或額外排序。
+"""
+import re
+from datetime import datetime
+import pytest
+import app as catfeed
+
+def query_plan(query):
+    sql = str(query.statement.compile(catfeed.db.engine, compile_kwargs={'literal_binds': True}))
+    rows = catfeed.db.session.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}").all()
+    return [row[-1] for row in rows]
+
+def assert_uses_index(plan, index):
+    assert any(index in step for step in plan), plan
+    # 「SCAN 表名」未帶 USING INDEX 即為全表掃描；USE TEMP B-TREE 表示無法以索引排序
+    assert not any(re.fullmatch(r'SCAN \w+', step) for step in plan), plan
+    assert not any('TEMP B-TREE' in step for step in plan), plan
+
+@pytest.mark.parametrize('cursor', [None, f"{datetime(2024, 1, 1, 8, 30).isoformat()}_42"])
+def test_feeding_history_uses_timestamp_index(app, cursor):
+    with app.app_context():
+        plan = query_plan(catfeed.feeding_history_query(cursor, app.config['HISTORY_PAGE_SIZE']))
+    assert_uses_index(plan, 'ix_feeding_record_timestamp_id')
+
+def test_approved_photos_use_date_taken_index(app):
+    with app.app_context():
+        plan = query_plan(catfeed.approved_photos_query())
+        carousel_plan = query_plan(catfeed.approved_photos_query().limit(5))
+    assert_uses_index(plan, 'ix_photo_approved_date_taken')
+    assert_uses_index(carousel_plan, 'ix_photo_approved_date_taken')
+
+@pytest.mark.parametrize('approved', [True, False])
+def test_review_photos_use_upload_date_index(app, approved):
+    with app.app_context():
+        plan = query_plan(catfeed.review_photos_query(approved))
+    assert_uses_index(plan, 'ix_photo_approved_upload_date')
+
+def test_biographies_use_date_index(app):
+    with app.app_context():
+        plan = query_plan(catfeed.biographies_query())
+    assert_uses_index(plan, 'ix_biography_date')
@@ -0,0 +1,58 @@
+"""共享記憶體速率限制存儲測試：各種限制策略寫入時都會清除過期資料"""
+import sqlite3
+import pytest
+from auth import shared_storage
+from auth.shared_storage import PURGE_INTERVAL, SharedMemoryStorage
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(shared_storage.time, 'time', lambda: now[0])
+    return now
+
+@pytest.fixture
+def storage(tmp_path, clock):
+    return SharedMemoryStorage(f"shm://{tmp_path / 'ratelimit.db'}")
+
+def rows(storage, table, key):
+    return storage._connection().execute(f"SELECT COUNT(*) FROM {table} WHERE key = ?", (key,)).fetchone()[0]
+
+def test_moving_window_purges_expired_events_of_other_keys(storage, clock):
+    for _ in range(3):
+        assert storage.acquire_entry('ip:a', 5, 60)
+    assert rows(storage, 'events', 'ip:a') == 3
+
+    clock[0] += max(61, PURGE_INTERVAL)
+    assert storage.acquire_entry('ip:b', 5, 60)
+    assert rows(storage, 'events', 'ip:a') == 0
+    assert rows(storage, 'events', 'ip:b') == 1
+
+    # 距上次清除未滿 PURGE_INTERVAL 時不會再清除
+    clock[0] += 61
+    storage._last_purge = clock[0] - 1
+    assert storage.acquire_entry('ip:c', 5, 60)
+    assert rows(storage, 'events', 'ip:b') == 1
+
+def test_moving_window_keeps_events_inside_their_window(storage, clock):
+    assert storage.acquire_entry('ip:a', 5, 3600)
+    clock[0] += PURGE_INTERVAL + 1
+    assert storage.acquire_entry('ip:b', 5, 60)
+    assert storage.get_moving_window('ip:a', 5, 3600)[1] == 1
+
+def test_sliding_window_purges_expired_counters(storage, clock):
+    assert storage.acquire_sliding_window_entry('ip:a', 5, 60)
+    clock[0] += 121 + PURGE_INTERVAL
+    assert storage.acquire_sliding_window_entry('ip:b', 5, 60)
+    remaining = storage._connection().execute("SELECT key FROM counters").fetchall()
+    assert all(key.startswith('ip:b') for key, in remaining)
+
+def test_rebuilds_events_table_without_expiry(tmp_path, clock):
+    path = tmp_path / 'old.db'
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE events (key TEXT NOT NULL, ts REAL NOT NULL)")
+    conn.execute("INSERT INTO events VALUES ('ip:a', 1.0)")
+    conn.commit()
+    conn.close()
+
+    storage = SharedMemoryStorage(f"shm://{path}")
+    assert storage.acquire_entry('ip:a', 1, 60)
@@ -0,0 +1,97 @@
+"""內容定址儲存：分段上傳的並行寫入，以及刪除照片與新增相同內容的照片互斥"""
+import io
+import os
+import threading
+import time
+import pytest
+import app as catfeed
+from media import append_chunk, create_upload, finish_upload, get_upload
+
+class BlockingStream:
+    """讀出第一段內容後暫停，直到測試放行"""
+
+    def __init__(self, data):
+        self.data = data
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.sent = False
+
+    def read(self, size):
+        if self.sent:
+            return b''
+        self.started.set()
+        self.release.wait(5)
+        self.sent = True
+        return self.data
+
+def test_concurrent_chunks_at_same_offset(tmp_path):
+    folder = str(tmp_path)
+    upload_id = create_upload(folder, 'cat.jpg', 8)
+    first = BlockingStream(b'AAAA')
+    result = {}
+    writer = threading.Thread(target=lambda: result.setdefault('offset', append_chunk(folder, upload_id, 0, first)))
+    writer.start()
+    assert first.started.wait(5)
+
+    # 第一個請求仍在寫入時，相同位置的第二個請求被拒絕，不會交錯寫入
+    with pytest.raises(ValueError, match='其他請求'):
+        append_chunk(folder, upload_id, 0, io.BytesIO(b'BBBB'))
+    first.release.set()
+    writer.join(5)
+    assert result['offset'] == 4
+
+    # 第一個請求完成後，以舊位置重送的請求因位置不符被拒絕
+    with pytest.raises(ValueError, match='位置不符'):
+        append_chunk(folder, upload_id, 0, io.BytesIO(b'BBBB'))
+    assert append_chunk(folder, upload_id, 4, io.BytesIO(b'CCCC')) == 8
+    filename, digest = finish_upload(folder, upload_id, 'jpg')
+    with open(os.path.join(folder, filename), 'rb') as f:
+        assert f.read() == b'AAAACCCC'
+    assert get_upload(folder, upload_id) is None
+
+def upload(client, data):
+    return client.post('/upload_photo', data={
+        'photo': (io.BytesIO(data), 'cat.jpg'),
+        'date_taken': '2024-01-01',
+        'photographer': '爸爸',
+    }, content_type='multipart/form-data')
+
+def test_shared_blob_removed_with_last_reference(app, client, admin_client):
+    upload(client, b'same content')
+    upload(client, b'same content')
+    with app.app_context():
+        photos = catfeed.Photo.query.all()
+    assert len(photos) == 2 and photos[0].filename == photos[1].filename
+    path = os.path.join(app.config['UPLOAD_FOLDER'], photos[0].filename)
+
+    admin_client.post(f'/admin/delete_photo/{photos[0].id}')
+    assert os.path.exists(path)
+    admin_client.post(f'/admin/delete_photo/{photos[1].id}')
+    assert not os.path.exists(path)
+
+def test_delete_does_not_remove_blob_reused_by_concurrent_upload(app, client, admin_client, monkeypatch):
+    upload(client, b'same content')
+    with app.app_context():
+        photo = catfeed.Photo.query.one()
+    path = os.path.join(app.config['UPLOAD_FOLDER'], photo.filename)
+
+    # 刪除已確認沒有其他參照、尚未移除檔案時暫停，讓相同內容的上傳在這段時間內送出
+    deleting = threading.Event()
+    remove_derivatives = catfeed.remove_derivatives
+
+    def slow_remove_derivatives(upload_folder, filename):
+        deleting.set()
+        time.sleep(0.3)
+        remove_derivatives(upload_folder, filename)
+
+    monkeypatch.setattr(catfeed, 'remove_derivatives', slow_remove_derivatives)
+    deleter = threading.Thread(target=lambda: admin_client.post(f'/admin/delete_photo/{photo.id}'))
+    deleter.start()
+    assert deleting.wait(5)
+    upload(app.test_client(), b'same content')
+    deleter.join(5)
+
+    with app.app_context():
+        remaining = catfeed.Photo.query.one()
+    assert remaining.filename == photo.filename
+    assert os.path.exists(path)
@@ -0,0 +1,55 @@
+"""時區設定測試：更新時區後所有工作進程一致，每日彙總不會以舊時區的日期寫入"""
+import os
+from datetime import date, datetime
+import pytz
+from conftest import catfeed
+
+def set_timezone_directly(name):
+    """模擬其他工作進程更新時區：只改資料庫及版本檔案，不清除本進程的快取"""
+    catfeed.Settings.query.first().timezone = name
+    catfeed.db.session.commit()
+    path = catfeed.app.config['TIMEZONE_VERSION_FILE']
+    with open(f"{path}.other", 'w') as f:
+        f.write('other worker')
+    os.replace(f"{path}.other", path)
+
+def test_other_worker_update_invalidates_cache(app):
+    with app.app_context():
+        assert catfeed.get_current_timezone().zone == 'Asia/Taipei'
+        set_timezone_directly('UTC')
+        assert catfeed.get_current_timezone().zone == 'UTC'
+
+def test_rollup_uses_committed_timezone_despite_stale_cache(app):
+    with app.app_context():
+        assert catfeed.get_current_timezone().zone == 'Asia/Taipei'
+        # 本進程仍快取舊時區（版本檔案尚未更新）
+        catfeed.Settings.query.first().timezone = 'UTC'
+        catfeed.db.session.commit()
+        assert catfeed.get_current_timezone().zone == 'Asia/Taipei'
+
+        # 台北時間為 1 月 2 日，UTC 為 1 月 1 日
+        record = catfeed.FeedingRecord(timestamp=datetime(2024, 1, 1, 20, 0), food_type='乾糧', amount=5,
+                                       calories=20.0, feeder_nickname='小明')
+        catfeed.db.session.add(record)
+        catfeed.db.session.flush()
+        catfeed.update_daily_intake(record)
+        catfeed.db.session.commit()
+
+        assert [row.date for row in catfeed.DailyIntake.query.all()] == [date(2024, 1, 1)]
+
+def test_update_timezone_rebuilds_and_invalidates(app, admin_client):
+    with app.app_context():
+        catfeed.db.session.add(catfeed.FeedingRecord(timestamp=datetime(2024, 1, 1, 20, 0), food_type='乾糧',
+                                                     amount=5, calories=20.0, feeder_nickname='小明'))
+        catfeed.db.session.commit()
+        catfeed.rebuild_daily_intake()
+        catfeed.db.session.commit()
+        assert [row.date for row in catfeed.DailyIntake.query.all()] == [date(2024, 1, 2)]
+        version = catfeed._timezone_version()
+
+    admin_client.post('/admin/update_timezone', data={'timezone': 'UTC'})
+
+    with app.app_context():
+        assert catfeed._timezone_version() != version
+        assert catfeed.get_current_timezone() is pytz.timezone('UTC')
+        assert [row.date for row in catfeed.DailyIntake.query.all()] == [date(2024, 1, 1)]
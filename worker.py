@@ -0,0 +1,35 @@
+"""背景工作進程
+
+從資料庫中的工作佇列取得工作並執行（例如照片衍生圖片處理），
+讓耗時的工作不佔用 Gunicorn 的請求處理進程。
+
+使用方式：
+    python worker.py
+"""
+import signal
+import time
+from app import app, claim_next_job, run_job
+
+running = True
+
+def stop(signum, frame):
+    """收到終止信號後，執行完目前的工作再結束"""
+    global running
+    running = False
+
+def main():
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    app.logger.info("背景工作進程已啟動")
+    while running:
+        with app.app_context():
+            job = claim_next_job()
+            if job:
+                run_job(job)
+                continue
+        time.sleep(app.config['JOB_POLL_INTERVAL'])
+    app.logger.info("背景工作進程已停止")
+
+if __name__ == '__main__':
+    main()